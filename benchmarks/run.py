@@ -0,0 +1,330 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, NamedTuple, Optional
+
+import pandas as pd
+
+import src.utils
+from benchmarks.synthetic import make_operations
+from src.data import get_data, prepare_operations
+from src.reports import get_expenses_for_3_months_by_category
+from src.serialization import dumps
+from src.services import filter_transaction_by_search_str
+from src.stub_server import StubMarketDataServer
+from src.utils import get_expenses, get_income, set_api_base_urls
+from src.views import get_events
+
+logger = logging.getLogger(__name__)
+
+# Объёмы операций по умолчанию
+DEFAULT_SIZES = "10k,100k,1m,10m"
+
+# Максимум строк данных на листе Excel (1 048 576 строк вместе с заголовком)
+EXCEL_MAX_ROWS = 1_048_575
+
+# Доля замедления относительно базовых результатов, после которой результат считается регрессией
+DEFAULT_THRESHOLD = 0.2
+
+# Настройки пользователя для get_events: запросы к стенду по двум валютам и двум акциям
+BENCHMARK_SETTINGS = {"user_currencies": ["USD", "EUR"], "user_stocks": ["AAPL", "AMZN"]}
+
+# Конец периода отчётов - последний день синтетических операций
+BENCHMARK_DATE = "2021-12-31"
+
+
+class Benchmark(NamedTuple):
+    """
+    Бенчмарк одной функции.
+
+    Атрибуты:
+        name (str): Имя бенчмарка
+        setup (Callable[[pd.DataFrame, str], Callable[[], Any]]): Готовит данные (время не измеряется)
+            по операциям и временной директории и возвращает измеряемый вызов без аргументов
+        max_rows (Optional[int]): Максимальный объём операций. Для больших объёмов бенчмарк пропускается
+    """
+
+    name: str
+    setup: Callable[[pd.DataFrame, str], Callable[[], Any]]
+    max_rows: Optional[int] = None
+
+
+def _setup_get_data(operation: pd.DataFrame, workdir: str) -> Callable[[], Any]:
+    """get_data читает ../data/operations.xlsx относительно текущей директории"""
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    os.makedirs(os.path.join(workdir, "work"), exist_ok=True)
+    operation.to_excel(os.path.join(workdir, "data", "operations.xlsx"), index=False)
+
+    def call() -> Any:
+        current = os.getcwd()
+        os.chdir(os.path.join(workdir, "work"))
+        try:
+            return get_data()
+        finally:
+            os.chdir(current)
+
+    return call
+
+
+def _setup_search(operation: pd.DataFrame, workdir: str) -> Callable[[], Any]:
+    records = operation.to_dict(orient="records")
+    return lambda: filter_transaction_by_search_str(records, "Магнит")
+
+
+def _setup_get_events_prepared(operation: pd.DataFrame, workdir: str) -> Callable[[], Any]:
+    prepared = prepare_operations(operation)
+    return lambda: get_events(prepared, BENCHMARK_DATE, "M", settings=BENCHMARK_SETTINGS)
+
+
+# Бенчмарки в порядке выполнения
+BENCHMARKS = [
+    Benchmark("get_data", _setup_get_data, max_rows=EXCEL_MAX_ROWS),
+    Benchmark("filter_transaction_by_search_str", _setup_search),
+    Benchmark("get_expenses", lambda operation, workdir: lambda: get_expenses(operation)),
+    Benchmark("get_income", lambda operation, workdir: lambda: get_income(operation)),
+    Benchmark(
+        "get_events",
+        lambda operation, workdir: lambda: get_events(operation, BENCHMARK_DATE, "M", settings=BENCHMARK_SETTINGS),
+    ),
+    Benchmark("get_events_prepared", _setup_get_events_prepared),
+    Benchmark(
+        "get_expenses_for_3_months_by_category",
+        lambda operation, workdir: lambda: get_expenses_for_3_months_by_category(
+            operation, "Супермаркеты", BENCHMARK_DATE
+        ),
+    ),
+]
+
+
+def parse_sizes(value: str) -> list[int]:
+    """
+    Разбирает список объёмов через запятую: 10k, 100k, 1m, 10m или числа.
+
+    Исключения:
+        ValueError: Если объём указан неверно
+    """
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    sizes = []
+    for item in value.split(","):
+        item = item.strip().lower()
+        try:
+            size = int(item[:-1]) * multipliers[item[-1]] if item[-1:] in multipliers else int(item)
+        except ValueError:
+            logger.critical("Ошибка: Неверный объём операций %s", item)
+            raise ValueError(f"Объём операций указан неверно: {item}")
+        if size < 1:
+            logger.critical("Ошибка: Неверный объём операций %s", item)
+            raise ValueError(f"Объём операций должен быть больше 0: {item}")
+        sizes.append(size)
+    return sizes
+
+
+def measure(call: Callable[[], Any], repeat: int, warmup: int = 1) -> list[float]:
+    """Возвращает время repeat вызовов в секундах после warmup вызовов без измерения"""
+    for _ in range(warmup):
+        call()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run_benchmarks(
+    sizes: list[int],
+    names: Optional[list[str]] = None,
+    repeat: int = 3,
+    warmup: int = 1,
+    seed: int = 0,
+    log: Callable[[str], Any] = print,
+) -> dict:
+    """
+    Выполняет бенчмарки на синтетических операциях каждого объёма.
+
+    Принимает:
+        sizes (list[int]): Объёмы операций
+        names (Optional[list[str]]): Имена бенчмарков. По умолчанию - все BENCHMARKS
+        repeat (int): Число измеряемых вызовов
+        warmup (int): Число вызовов до измерения
+        seed (int): Зерно генератора операций
+        log (Callable[[str], Any]): Функция вывода хода выполнения
+
+    Возвращает:
+        dict: {"created_at", "environment": {...}, "parameters": {...},
+               "results": [{"benchmark", "rows", "timings", "min_seconds", "median_seconds",
+                            "rows_per_second"}, ...],
+               "skipped": [{"benchmark", "rows", "reason"}, ...]}
+    """
+    benchmarks = [benchmark for benchmark in BENCHMARKS if names is None or benchmark.name in names]
+    unknown = set(names or []) - {benchmark.name for benchmark in BENCHMARKS}
+    if unknown:
+        logger.critical("Ошибка: Неизвестные бенчмарки %s", sorted(unknown))
+        raise ValueError(f"Неизвестные бенчмарки: {', '.join(sorted(unknown))}")
+
+    results: list[dict] = []
+    skipped: list[dict] = []
+    currency_data_url, marketstack_url = src.utils.currency_data_api_url, src.utils.marketstack_api_url
+    with StubMarketDataServer(seed=seed) as server, tempfile.TemporaryDirectory() as workdir:
+        set_api_base_urls(server.url, server.url)
+        try:
+            for rows in sizes:
+                operation = make_operations(rows, seed)
+                for benchmark in benchmarks:
+                    if benchmark.max_rows is not None and rows > benchmark.max_rows:
+                        skipped.append(
+                            {"benchmark": benchmark.name, "rows": rows, "reason": f"больше {benchmark.max_rows} строк"}
+                        )
+                        continue
+                    call = benchmark.setup(operation, workdir)
+                    timings = measure(call, repeat, warmup)
+                    best = min(timings)
+                    results.append(
+                        {
+                            "benchmark": benchmark.name,
+                            "rows": rows,
+                            "timings": timings,
+                            "min_seconds": best,
+                            "median_seconds": statistics.median(timings),
+                            "rows_per_second": rows / best if best > 0 else None,
+                        }
+                    )
+                    log(f"{benchmark.name:<40} {rows:>10} {best:>10.4f} с")
+                    del call
+                del operation
+        finally:
+            set_api_base_urls(currency_data_url, marketstack_url)
+
+    return {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "parameters": {"sizes": sizes, "repeat": repeat, "warmup": warmup, "seed": seed},
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """
+    Сравнивает минимальное время бенчмарков с базовыми результатами того же бенчмарка и объёма.
+
+    Минимальное из повторов время меньше всего зависит от фоновой нагрузки машины.
+
+    Возвращает:
+        list[dict]: [{"benchmark", "rows", "baseline_seconds", "current_seconds", "ratio", "status"}, ...],
+                    status: "regression" - медленнее более чем на threshold, "improved" - быстрее
+                    во столько же раз, "ok" - в пределах порога, "new" - нет в базовых результатах
+    """
+    baseline_seconds = {(item["benchmark"], item["rows"]): item["min_seconds"] for item in baseline["results"]}
+    comparison = []
+    for item in current["results"]:
+        base = baseline_seconds.get((item["benchmark"], item["rows"]))
+        if base is None or base <= 0:
+            ratio, status = None, "new"
+        else:
+            ratio = item["min_seconds"] / base
+            if ratio > 1 + threshold:
+                status = "regression"
+            elif ratio < 1 / (1 + threshold):
+                status = "improved"
+            else:
+                status = "ok"
+        comparison.append(
+            {
+                "benchmark": item["benchmark"],
+                "rows": item["rows"],
+                "baseline_seconds": base,
+                "current_seconds": item["min_seconds"],
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return comparison
+
+
+def format_comparison(comparison: list[dict]) -> str:
+    """Таблица сравнения с базовыми результатами для вывода в консоль"""
+    lines = [f"{'Бенчмарк':<40} {'Строк':>10} {'База, с':>10} {'Сейчас, с':>10} {'Отношение':>10}  Статус"]
+    for item in comparison:
+        base = "-" if item["baseline_seconds"] is None else f"{item['baseline_seconds']:.4f}"
+        ratio = "-" if item["ratio"] is None else f"{item['ratio']:.2f}"
+        lines.append(
+            f"{item['benchmark']:<40} {item['rows']:>10} {base:>10} {item['current_seconds']:>10.4f} "
+            f"{ratio:>10}  {item['status']}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Запускает бенчмарки из командной строки.
+
+    Возвращает:
+        int: Код завершения: 0 - регрессий нет, 1 - есть регрессии относительно --baseline
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарки публичных функций на синтетических операциях")
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help="Объёмы операций через запятую (10k, 100k, 1m, 10m). 10m требует порядка 16 ГБ памяти",
+    )
+    parser.add_argument(
+        "--benchmarks", default=None, help=f"Бенчмарки через запятую: {', '.join(b.name for b in BENCHMARKS)}"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Число измеряемых вызовов")
+    parser.add_argument("--warmup", type=int, default=1, help="Число вызовов до измерения")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора синтетических операций")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Файл результатов JSON. По умолчанию benchmarks/results/<дата и время>.json",
+    )
+    parser.add_argument("--baseline", default=None, help="Базовые результаты JSON для поиска регрессий")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="Допустимое замедление (0.2 - на 20%%)"
+    )
+    args = parser.parse_args(argv)
+
+    names = None if args.benchmarks is None else [name.strip() for name in args.benchmarks.split(",")]
+    current = run_benchmarks(parse_sizes(args.sizes), names, repeat=args.repeat, warmup=args.warmup, seed=args.seed)
+
+    output = args.output
+    if output is None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", f"{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    regressions = 0
+    if args.baseline is not None:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison = compare_results(current, baseline, args.threshold)
+        current["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "results": comparison}
+        print(format_comparison(comparison))
+        regressions = sum(item["status"] == "regression" for item in comparison)
+
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(dumps(current, pretty=True))
+    print(f"Результаты записаны в {output}")
+
+    if regressions:
+        print(f"Регрессий: {regressions}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
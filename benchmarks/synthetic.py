@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+# Колонки файла operations.xlsx в порядке файла
+COLUMNS = [
+    "Дата операции",
+    "Дата платежа",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Валюта операции",
+    "Сумма платежа",
+    "Валюта платежа",
+    "Кэшбэк",
+    "Категория",
+    "MCC",
+    "Описание",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "Сумма операции с округлением",
+]
+
+# Категории: доля операций, MCC, описания и знак суммы (-1 - расход, 1 - поступление).
+# Доли близки к распределению в data/operations.xlsx
+CATEGORIES = [
+    ("Супермаркеты", 0.34, 5411.0, ["Колхоз", "Магнит", "Пятёрочка", "Перекрёсток", "SPAR"], -1),
+    ("Фастфуд", 0.19, 5814.0, ["Mouse Tail", "Вкусно и точка", "Rostics", "Burger King"], -1),
+    ("Транспорт", 0.06, 4111.0, ["Метро Санкт-Петербург", "Яндекс Такси", "Ситидрайв"], -1),
+    ("Переводы", 0.05, None, ["Константин Л.", "Светлана Т.", "Иван С."], -1),
+    ("Ж/д билеты", 0.04, 4112.0, ["РЖД", "Туту.ру"], -1),
+    ("Различные товары", 0.03, 5399.0, ["Ozon.ru", "Wildberries"], -1),
+    ("Связь", 0.03, 4814.0, ["МТС", "Билайн", "Тинькофф Мобайл"], -1),
+    ("Пополнения", 0.03, None, ["Пополнение через Газпромбанк", "Перевод с карты", "Внесение наличных"], 1),
+    ("Аптеки", 0.02, 5912.0, ["Аптека Вита", "Ригла"], -1),
+    ("Рестораны", 0.02, 5812.0, ["Теремок", "Шоколадница"], -1),
+    ("Бонусы", 0.015, None, ["Кешбэк за обычные покупки"], 1),
+    ("Наличные", 0.015, 6011.0, ["Снятие в банкомате Сбербанк"], -1),
+    ("Дом и ремонт", 0.015, 5200.0, ["Леруа Мерлен", "OBI"], -1),
+    ("Топливо", 0.01, 5541.0, ["Лукойл", "Shell"], -1),
+    ("Одежда и обувь", 0.01, 5651.0, ["Uniqlo", "Спортмастер"], -1),
+    ("Другое", 0.01, 7999.0, ["Мосгортранс", "Ozon"], -1),
+]
+
+# Доля операций без категории и со статусом FAILED
+MISSING_CATEGORY_SHARE = 0.01
+FAILED_SHARE = 0.006
+
+# Период дат операций
+START_DATE = "2018-01-01"
+END_DATE = "2021-12-31"
+
+# Максимум различных моментов времени: строки дат берутся из пула, чтобы 10 млн строк
+# не требовали 10 млн вызовов strftime
+DATE_POOL_SIZE = 500_000
+
+
+def make_operations(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Генерирует операции в формате, который возвращает get_data (pd.read_excel файла operations.xlsx).
+
+    Даты - строки ДД.ММ.ГГГГ ЧЧ:ММ:СС от новых к старым, как в файле. Строковые значения - общие объекты
+    Python, поэтому 10 млн строк занимают порядка 1.5 ГБ.
+
+    Принимает:
+        rows (int): Число операций
+        seed (int): Зерно генератора: одинаковые rows и seed дают одинаковые операции
+
+    Возвращает:
+        pd.DataFrame: Операции с колонками COLUMNS
+    """
+    rng = np.random.default_rng(seed)
+
+    # Даты: пул различных моментов, номера моментов в пуле отсортированы от новых к старым
+    start = np.datetime64(START_DATE, "s")
+    span_seconds = int((np.datetime64(END_DATE, "s") - start).astype(np.int64)) + 86_399
+    pool_size = min(rows, DATE_POOL_SIZE)
+    moments = pd.DatetimeIndex(np.sort(start + rng.integers(0, span_seconds, pool_size))[::-1])
+    operation_dates = np.asarray(moments.strftime("%d.%m.%Y %H:%M:%S"), dtype=object)
+    payment_dates = np.asarray(moments.strftime("%d.%m.%Y"), dtype=object)
+    date_index = np.sort(rng.integers(0, pool_size, rows))
+
+    # Категории и описания
+    weights = np.array([category[1] for category in CATEGORIES])
+    category_codes = rng.choice(len(CATEGORIES), rows, p=weights / weights.sum())
+    category_names = np.array([category[0] for category in CATEGORIES] + [np.nan], dtype=object)
+    category_codes_with_missing = np.where(rng.random(rows) < MISSING_CATEGORY_SHARE, len(CATEGORIES), category_codes)
+
+    descriptions = np.empty(rows, dtype=object)
+    mcc = np.full(rows, np.nan)
+    sign = np.empty(rows)
+    for code, (_, _, category_mcc, category_descriptions, category_sign) in enumerate(CATEGORIES):
+        mask = category_codes == code
+        choices = np.array(category_descriptions, dtype=object)
+        descriptions[mask] = choices[rng.integers(0, len(choices), int(mask.sum()))]
+        mcc[mask] = np.nan if category_mcc is None else category_mcc
+        sign[mask] = category_sign
+
+    # Суммы: логнормальное распределение, копейки
+    amounts = np.round(rng.lognormal(5.5, 1.1, rows), 2)
+    operation_amounts = sign * amounts
+
+    cards = np.array(["*7197", "*4556", "*5091", np.nan], dtype=object)
+    statuses = np.array(["OK", "FAILED"], dtype=object)
+
+    frame = pd.DataFrame(
+        {
+            "Дата операции": operation_dates[date_index],
+            "Дата платежа": payment_dates[date_index],
+            "Номер карты": cards[rng.integers(0, len(cards), rows)],
+            "Статус": statuses[(rng.random(rows) < FAILED_SHARE).astype(np.int64)],
+            "Сумма операции": operation_amounts,
+            "Валюта операции": np.full(rows, "RUB", dtype=object),
+            "Сумма платежа": operation_amounts,
+            "Валюта платежа": np.full(rows, "RUB", dtype=object),
+            "Кэшбэк": np.where(rng.random(rows) < 0.05, np.round(amounts * 0.01, 0), np.nan),
+            "Категория": category_names[category_codes_with_missing],
+            "MCC": mcc,
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": (amounts // 100).astype(np.int64),
+            "Округление на инвесткопилку": np.zeros(rows, dtype=np.int64),
+            "Сумма операции с округлением": amounts,
+        },
+        columns=COLUMNS,
+    )
+    return frame
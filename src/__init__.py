@@ -0,0 +1,4 @@
+from src.logging_config import configure_logging
+
+# Единая настройка журнала пакета: уровень LOG_LEVEL (по умолчанию WARNING), запись через фоновый поток
+configure_logging()
@@ -0,0 +1,190 @@
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+import pandas as pd
+
+from src.data import PreparedOperations
+from src.reports import get_expenses_for_3_months_by_category_frame
+from src.services import find_transactions_by_search_str
+from src.views import get_events_dict
+
+if TYPE_CHECKING:
+    import pyarrow
+
+logger = logging.getLogger(__name__)
+
+# Форматы файлов: IPC stream (.arrow) и Parquet (.parquet)
+FILE_FORMATS = {"ipc": ".arrow", "parquet": ".parquet"}
+
+
+def _pyarrow() -> Any:
+    """Импортирует pyarrow при первом экспорте: зависимость необязательная"""
+    try:
+        import pyarrow
+    except ImportError:
+        logger.critical("Ошибка: Для экспорта в Arrow не установлен pyarrow")
+        raise ImportError("Для экспорта в Arrow установите пакет pyarrow")
+    return pyarrow
+
+
+def _events_schemas() -> dict[str, "pyarrow.Schema"]:
+    """Схемы таблиц разделов get_events: пустые разделы сохраняют колонки и типы"""
+    pa = _pyarrow()
+    amounts = pa.schema([("category", pa.string()), ("amount", pa.float64())])
+    return {
+        "totals": pa.schema([("expenses_total_amount", pa.int64()), ("income_total_amount", pa.int64())]),
+        "expenses": amounts,
+        "transfers_and_cash": amounts,
+        "income": amounts,
+        "currency_rates": pa.schema([("currency", pa.string()), ("rate", pa.float64())]),
+        "stock_prices": pa.schema([("stock", pa.string()), ("price", pa.float64())]),
+        "market_data_status": pa.schema(
+            [("section", pa.string()), ("status", pa.string()), ("updated_at", pa.string())]
+        ),
+    }
+
+
+def records_to_table(records: list[dict]) -> "pyarrow.Table":
+    """
+    Преобразует список словарей (записи транзакций) в таблицу Arrow.
+
+    Пропуски (NaN, None) становятся null, порядок колонок - порядок ключей первой записи.
+    """
+    pa = _pyarrow()
+    return pa.Table.from_pandas(pd.DataFrame.from_records(records), preserve_index=False)
+
+
+def events_to_tables(events: dict) -> dict[str, "pyarrow.Table"]:
+    """
+    Раскладывает результат get_events_dict по таблицам Arrow.
+
+    Возвращает:
+        dict[str, pyarrow.Table]: Таблицы totals, expenses, transfers_and_cash, income, currency_rates,
+                                  stock_prices и market_data_status
+    """
+    pa = _pyarrow()
+    schemas = _events_schemas()
+    rows = {
+        "totals": [
+            {
+                "expenses_total_amount": events["expenses"]["total_amount"],
+                "income_total_amount": events["income"]["total_amount"],
+            }
+        ],
+        "expenses": events["expenses"]["main"],
+        "transfers_and_cash": events["expenses"]["transfers_and_cash"],
+        "income": events["income"]["main"],
+        "currency_rates": events.get("currency_rates", []),
+        "stock_prices": events.get("stock_prices", []),
+        "market_data_status": [
+            {"section": section, "status": status["status"], "updated_at": status.get("updated_at")}
+            for section, status in events.get("market_data_status", {}).items()
+        ],
+    }
+    return {name: pa.Table.from_pylist(rows[name], schema=schema) for name, schema in schemas.items()}
+
+
+def transactions_table(operation: list[dict], search_str: str) -> "pyarrow.Table":
+    """
+    Возвращает транзакции, найденные filter_transaction_by_search_str, в виде таблицы Arrow без JSON.
+
+    Исключения:
+        ValueError, TypeError: Как у filter_transaction_by_search_str
+        ImportError: Если не установлен pyarrow
+    """
+    return records_to_table(find_transactions_by_search_str(operation, search_str))
+
+
+def report_table(operation: pd.DataFrame, category: str, date: Optional[str] = None) -> "pyarrow.Table":
+    """
+    Возвращает отчёт get_expenses_for_3_months_by_category в виде таблицы Arrow без JSON.
+
+    Исключения:
+        ValueError, TypeError: Как у get_expenses_for_3_months_by_category
+        ImportError: Если не установлен pyarrow
+    """
+    pa = _pyarrow()
+    frame = get_expenses_for_3_months_by_category_frame(operation, category, date)
+    # Категория из подготовленных операций - pd.Categorical: в файле достаточно строк
+    return pa.Table.from_pandas(frame.astype({"Категория": object}), preserve_index=False)
+
+
+def events_tables(
+    operation: Union[pd.DataFrame, PreparedOperations],
+    date_: str,
+    period: Optional[str] = "M",
+    timeout: Optional[float] = None,
+    settings: Optional[dict] = None,
+) -> dict[str, "pyarrow.Table"]:
+    """
+    Возвращает разделы get_events в виде таблиц Arrow без JSON (см. events_to_tables).
+
+    Исключения:
+        ValueError: Как у get_events
+        ImportError: Если не установлен pyarrow
+    """
+    _pyarrow()  # Проверяем зависимость до запросов к API
+    return events_to_tables(get_events_dict(operation, date_, period, timeout, settings))
+
+
+def write_table(table: "pyarrow.Table", path: str, file_format: str = "ipc") -> str:
+    """
+    Записывает таблицу в файл IPC stream или Parquet.
+
+    Файл IPC stream можно читать через memory map без копирования (read_table).
+
+    Принимает:
+        table (pyarrow.Table): Таблица
+        path (str): Путь к файлу
+        file_format (str): "ipc" или "parquet"
+
+    Возвращает:
+        str: Путь к записанному файлу
+
+    Исключения:
+        ValueError: Если формат файла неизвестен
+    """
+    if file_format not in FILE_FORMATS:
+        logger.critical("Ошибка: Неизвестный формат файла %s", file_format)
+        raise ValueError(f"Формат файла должен быть одним из: {', '.join(FILE_FORMATS)}")
+
+    pa = _pyarrow()
+    if file_format == "parquet":
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(table, path)
+    else:
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    logger.info("Записано %s строк в %s", table.num_rows, path)
+    return path
+
+
+def write_tables(tables: dict[str, "pyarrow.Table"], directory: str, file_format: str = "ipc") -> dict[str, str]:
+    """
+    Записывает таблицы (например, разделы events_tables) в файлы <directory>/<имя>.arrow или .parquet.
+
+    Возвращает:
+        dict[str, str]: Пути к файлам по именам таблиц
+    """
+    if file_format not in FILE_FORMATS:
+        logger.critical("Ошибка: Неизвестный формат файла %s", file_format)
+        raise ValueError(f"Формат файла должен быть одним из: {', '.join(FILE_FORMATS)}")
+
+    os.makedirs(directory, exist_ok=True)
+    return {
+        name: write_table(table, os.path.join(directory, f"{name}{FILE_FORMATS[file_format]}"), file_format)
+        for name, table in tables.items()
+    }
+
+
+def read_table(path: str) -> "pyarrow.Table":
+    """Читает таблицу из файла IPC stream (через memory map, без копирования) или Parquet"""
+    pa = _pyarrow()
+    if path.endswith(FILE_FORMATS["parquet"]):
+        import pyarrow.parquet
+
+        return pyarrow.parquet.read_table(path, memory_map=True)
+    # Буферы таблицы ссылаются на отображённый файл: он остаётся открытым, пока жива таблица
+    return pa.ipc.open_stream(pa.memory_map(path, "r")).read_all()
@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from src.lazy_imports import lazy_import, lazy_subclass
+
+requests = lazy_import("requests")
+
+logger = logging.getLogger(__name__)
+
+
+def _circuit_open_error() -> type:
+    """
+    CircuitOpenError(requests.exceptions.RequestException): запрос к провайдеру не выполнялся,
+    circuit breaker провайдера разомкнут. Класс создаётся при первом обращении, чтобы импорт модуля
+    не загружал requests
+    """
+    return lazy_subclass(
+        globals(),
+        "CircuitOpenError",
+        lambda: requests.exceptions.RequestException,
+        "Запрос к провайдеру не выполнялся: circuit breaker провайдера разомкнут",
+    )
+
+
+def __getattr__(name: str) -> Any:
+    if name == "CircuitOpenError":
+        return _circuit_open_error()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker для внешнего провайдера данных.
+
+    После failure_threshold ошибок подряд размыкается, и вызовы к провайдеру сразу отклоняются
+    с CircuitOpenError, не тратя время на заведомо неудачные запросы. Через reset_timeout секунд
+    пропускается один пробный запрос: при успехе breaker замыкается, при ошибке снова размыкается.
+
+    Принимает:
+        name (str): Имя провайдера для логов и сообщений об ошибках
+        failure_threshold (int): Число ошибок подряд, после которого breaker размыкается
+        reset_timeout (float): Время в секундах до пробного запроса после размыкания
+        clock (Callable[[], float]): Источник монотонного времени (подменяется в тестах)
+
+    Особенности:
+        - Потокобезопасен: один экземпляр разделяется всеми вызовами к провайдеру
+        - В полуоткрытом состоянии пропускается только один пробный запрос одновременно
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("Порог ошибок должен быть больше 0")
+
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние: closed, open или half_open"""
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> None:
+        """
+        Проверяет, можно ли выполнить запрос к провайдеру.
+
+        Исключения:
+            CircuitOpenError: Если breaker разомкнут или пробный запрос уже выполняется
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+
+        logger.warning("Запрос к %s пропущен: circuit breaker разомкнут", self.name)
+        raise _circuit_open_error()(f"Провайдер {self.name} временно недоступен")
+
+    def record_success(self) -> None:
+        """Фиксирует успешный запрос и замыкает breaker"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Фиксирует ошибку запроса. Размыкает breaker после порога ошибок или неудачного пробного запроса"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("Circuit breaker %s разомкнут после %s ошибок подряд", self.name, self._failures)
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+    def record_cancelled(self) -> None:
+        """Фиксирует отменённый запрос: результат неизвестен, но пробный запрос больше не выполняется"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self) -> None:
+        """Возвращает breaker в исходное замкнутое состояние"""
+        self.record_success()
@@ -0,0 +1,269 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, TextIO
+
+from src import metrics
+from src.env import load_env
+from src.profiling import PROFILE_MODES, profile_label, profiled, set_profile_mode
+from src.query_types import QUERY_TYPES
+from src.serialization import dumps, set_output_format
+
+logger = logging.getLogger(__name__)
+
+# src.server (pandas, requests и загрузка .env) импортируется при первом использовании, а не при импорте
+# модуля: --help и ошибки в аргументах не ждут загрузки зависимостей
+
+# Идентификатор запроса используется как имя файла результата
+_QUERY_ID_PATTERN = re.compile(r"^[\w.-]+$")
+
+
+def load_queries(path: str) -> list[dict]:
+    """
+    Читает файл запросов.
+
+    Форматы:
+        - .yaml / .yml: список запросов или по одному запросу в каждом документе (разделитель ---).
+          Требует пакет PyYAML
+        - .json: список запросов
+        - остальные (.jsonl, .ndjson): JSON-объект запроса в каждой строке, пустые строки и строки,
+          начинающиеся с #, пропускаются
+
+    Запрос - словарь с ключом "type" (events, search или report), параметрами типа из QUERY_TYPES
+    и необязательным "id" (по умолчанию query-<номер>).
+        {"id": "dec", "type": "events", "date": "2021-12-31", "period": "M"}
+        {"type": "search", "search": "Магнит"}
+        {"type": "report", "category": "Супермаркеты", "date": "2021-12-31"}
+
+    Возвращает:
+        list[dict]: Проверенные запросы с заполненным "id"
+
+    Исключения:
+        ValueError: Если файл или запрос имеет неверный формат
+        ImportError: Если для YAML-файла не установлен PyYAML
+    """
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".yaml", ".yml"):
+        queries = _parse_yaml_queries(path, content)
+    else:
+        try:
+            if extension == ".json":
+                queries = json.loads(content)
+            else:
+                queries = [
+                    json.loads(line)
+                    for line in content.splitlines()
+                    if line.strip() and not line.lstrip().startswith("#")
+                ]
+        except json.JSONDecodeError as e:
+            logger.critical("Ошибка: Не удалось разобрать файл запросов %s: %s", path, e)
+            raise ValueError(f"Файл запросов {path} имеет неверный формат")
+
+    if not isinstance(queries, list):
+        logger.critical("Ошибка: Запросы в файле %s переданы в типе %s", path, type(queries))
+        raise ValueError("Файл запросов должен содержать список запросов")
+    return _validate_queries(queries)
+
+
+def _parse_yaml_queries(path: str, content: str) -> list:
+    """Разбирает YAML-файл запросов: PyYAML импортируется только для YAML-файлов"""
+    try:
+        import yaml
+    except ImportError:
+        logger.critical("Ошибка: Для чтения YAML не установлен PyYAML")
+        raise ImportError("Для файла запросов в формате YAML установите пакет PyYAML")
+
+    try:
+        documents = list(yaml.safe_load_all(content))
+    except yaml.YAMLError as e:
+        logger.critical("Ошибка: Не удалось разобрать файл запросов %s: %s", path, e)
+        raise ValueError(f"Файл запросов {path} имеет неверный формат")
+
+    queries: list = []
+    for document in documents:
+        if document is not None:
+            queries.extend(document if isinstance(document, list) else [document])
+    return queries
+
+
+def _validate_queries(queries: list) -> list[dict]:
+    """Проверяет запросы и заполняет "id" до загрузки операций"""
+    validated = []
+    seen_ids = set()
+    for number, query in enumerate(queries, start=1):
+        if not isinstance(query, dict):
+            logger.critical("Ошибка: Запрос %s передан в типе %s", number, type(query))
+            raise ValueError(f"Запрос {number} должен быть словарём")
+
+        query_type = query.get("type")
+        if query_type not in QUERY_TYPES:
+            logger.critical("Ошибка: Неизвестный тип запроса %s в запросе %s", query_type, number)
+            raise ValueError(f"Тип запроса {number} должен быть одним из: {', '.join(QUERY_TYPES)}")
+
+        unknown = set(query) - {"id", "type", *QUERY_TYPES[query_type]}
+        if unknown:
+            logger.critical("Ошибка: Неизвестные параметры %s в запросе %s", sorted(unknown), number)
+            raise ValueError(f"Запрос {number} содержит неизвестные параметры: {', '.join(sorted(unknown))}")
+
+        query_id = str(query.get("id", f"query-{number}"))
+        if not _QUERY_ID_PATTERN.match(query_id) or query_id in seen_ids:
+            logger.critical("Ошибка: Неверный или повторяющийся id %s в запросе %s", query_id, number)
+            raise ValueError(f"id запроса {number} должен быть уникальным и состоять из букв, цифр, '_', '.' и '-'")
+        seen_ids.add(query_id)
+
+        # Даты из YAML (2021-12-31 без кавычек) приходят как date, а функции ожидают строки
+        validated.append(
+            {key: value if value is None else str(value) for key, value in {**query, "id": query_id}.items()}
+        )
+    return validated
+
+
+def run_queries(snapshot: Any, queries: list[dict], jobs: int = 1) -> list[dict]:
+    """
+    Выполняет запросы к загруженным один раз операциям.
+
+    Принимает:
+        snapshot (Any): DatasetSnapshot или SharedOperations
+        queries (list[dict]): Запросы из load_queries
+        jobs (int): Число потоков для параллельного выполнения
+
+    Возвращает:
+        list[dict]: Результаты в порядке запросов:
+                    {"id", "type", "status": "ok", "result": ...} или {"id", "type", "status": "error", "error": ...}
+
+    Особенности:
+        - Ошибка в параметрах одного запроса не прерывает остальные
+    """
+    if not isinstance(jobs, int) or jobs < 1:
+        logger.critical("Ошибка: Неверное число потоков %s", jobs)
+        raise ValueError("Число потоков должно быть целым числом больше 0")
+
+    from src.server import run_query_dict
+
+    def run(query: dict) -> dict:
+        params = {key: value for key, value in query.items() if key not in ("id", "type")}
+        try:
+            # Профиль запроса (--profile) подписан id, типом и параметрами запроса
+            with profiled(profile_label(query["id"], {"type": query["type"], **params})):
+                # Результат сериализуется один раз, при записи (write_ndjson, write_result_files)
+                result = run_query_dict(snapshot, query["type"], params)
+        except (ValueError, TypeError) as e:
+            logger.error("Запрос %s не выполнен: %s", query['id'], e)
+            return {"id": query["id"], "type": query["type"], "status": "error", "error": str(e)}
+        return {"id": query["id"], "type": query["type"], "status": "ok", "result": result}
+
+    if jobs == 1:
+        return [run(query) for query in queries]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run, queries))
+
+
+def write_ndjson(results: list[dict], stream: TextIO) -> None:
+    """Записывает результаты в поток по одному JSON-объекту в строке"""
+    for result in results:
+        stream.write(dumps(result, pretty=False) + "\n")
+    stream.flush()
+
+
+def write_result_files(results: list[dict], output_dir: str) -> list[str]:
+    """
+    Записывает результат каждого запроса в файл <output_dir>/<id>.json.
+
+    Для успешного запроса файл содержит результат функции, для ошибки - {"message": ...}.
+
+    Возвращает:
+        list[str]: Пути к записанным файлам в порядке запросов
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for result in results:
+        body = result["result"] if result["status"] == "ok" else {"message": result["error"]}
+        path = os.path.join(output_dir, f"{result['id']}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(dumps(body))
+        paths.append(path)
+    return paths
+
+
+def write_metrics(path: str) -> str:
+    """Записывает накопленные метрики в файл: .prom - текст Prometheus, иначе JSON. Возвращает путь"""
+    body = metrics.metrics_prometheus() if path.endswith(".prom") else metrics.metrics_json()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(body)
+    return path
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    Выполняет запросы из файла без диалога: python -m src.cli queries.jsonl --jobs 4
+
+    Возвращает:
+        int: Код завершения: 0 - все запросы выполнены, 1 - есть ошибки в запросах,
+             2 - неверные аргументы или файл запросов (argparse)
+    """
+    parser = argparse.ArgumentParser(description="Пакетное выполнение запросов к банковским операциям")
+    parser.add_argument("queries", help="Файл запросов (.jsonl, .json, .yaml)")
+    parser.add_argument(
+        "--data",
+        default=None,
+        help="Путь к файлу операций (.xlsx). По умолчанию OPERATIONS_PATH или data/operations.xlsx",
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="Число запросов, выполняемых параллельно")
+    parser.add_argument(
+        "--output-dir", default=None, help="Директория для файлов <id>.json. По умолчанию - NDJSON в stdout"
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="Компактный JSON в файлах результатов (orjson, если установлен)"
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="Файл для времени этапов и счётчиков: .prom - формат Prometheus, иначе JSON",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Профиль каждого запроса: cpu - cProfile (.prof), memory - tracemalloc (.collapsed)",
+    )
+    parser.add_argument("--profile-dir", default=None, help="Директория файлов профилей. По умолчанию profiles")
+    args = parser.parse_args(argv)
+    # .env загружается после разбора аргументов (--help его не читает), до настроек журнала и вывода
+    load_env()
+
+    if args.compact:
+        set_output_format("compact")
+    if args.metrics is not None:
+        metrics.set_metrics_enabled(True)
+    if args.profile is not None:
+        set_profile_mode(args.profile, args.profile_dir)
+
+    # Запросы проверяются до загрузки операций и src.server: ошибка в файле запросов не ждёт чтения Excel
+    try:
+        queries = load_queries(args.queries)
+    except (OSError, ValueError, ImportError) as e:
+        parser.error(f"не удалось прочитать запросы из {args.queries}: {e}")
+
+    from src.server import DEFAULT_OPERATIONS_PATH, OperationsDataset
+
+    snapshot = OperationsDataset(args.data or DEFAULT_OPERATIONS_PATH).get()
+    results = run_queries(snapshot, queries, jobs=args.jobs)
+
+    if args.output_dir is None:
+        write_ndjson(results, sys.stdout)
+    else:
+        write_result_files(results, args.output_dir)
+    if args.metrics is not None:
+        write_metrics(args.metrics)
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import datetime
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src import utils
+
+logger = logging.getLogger(__name__)
+
+RUB = "RUB"
+
+# Колонки сумм и колонки валют, в которых они указаны
+AMOUNT_CURRENCY_COLUMNS = {
+    "Сумма операции": "Валюта операции",
+    "Сумма платежа": "Валюта платежа",
+    "Сумма операции с округлением": "Валюта платежа",
+}
+
+
+def load_currency_rate_history(
+    currency: str, start: datetime.date, end: datetime.date, cache_dir: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Возвращает дневные курсы валюты к RUB за период, запрашивая у API только даты, которых нет в кэше.
+
+    Принимает:
+        currency (str): Код валюты (например, "USD")
+        start (datetime.date): Начало периода
+        end (datetime.date): Конец периода
+        cache_dir (Optional[str]): Директория кэша. По умолчанию utils.market_data_cache_dir
+
+    Возвращает:
+        pd.DataFrame: Колонки 'date' (datetime64), 'currency', 'rate', отсортированные по дате
+
+    Особенности:
+        - Кэш хранится в файле currency_rates_<валюта>.csv и дополняется только недостающими краями периода
+        - Период запрашивается кусками по utils.CURRENCY_TIMEFRAME_MAX_DAYS дней (ограничение API)
+        - Даты позже сегодняшней не запрашиваются
+    """
+    cache_dir = cache_dir or utils.market_data_cache_dir
+    path = os.path.join(cache_dir, f"currency_rates_{currency}.csv")
+    end = min(end, datetime.date.today())
+
+    if os.path.exists(path):
+        cached = pd.read_csv(path, parse_dates=["date"])
+    else:
+        cached = pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "rate": pd.Series(dtype=float)})
+
+    # Недостающие края периода относительно уже сохранённого диапазона
+    if cached.empty:
+        missing = [(start, end)]
+    else:
+        cached_start, cached_end = cached["date"].min().date(), cached["date"].max().date()
+        missing = []
+        if start < cached_start:
+            missing.append((start, cached_start - datetime.timedelta(days=1)))
+        if end > cached_end:
+            missing.append((cached_end + datetime.timedelta(days=1), end))
+
+    fetched = []
+    for missing_start, missing_end in missing:
+        chunk_start = missing_start
+        while chunk_start <= missing_end:
+            chunk_end = min(
+                missing_end, chunk_start + datetime.timedelta(days=utils.CURRENCY_TIMEFRAME_MAX_DAYS - 1)
+            )
+            logger.info("Запрос истории курса %s за %s - %s", currency, chunk_start, chunk_end)
+            fetched.extend(
+                utils.get_currency_rate_history(currency, chunk_start.isoformat(), chunk_end.isoformat())
+            )
+            chunk_start = chunk_end + datetime.timedelta(days=1)
+
+    if fetched:
+        fetched_frame = pd.DataFrame(fetched)
+        fetched_frame["date"] = pd.to_datetime(fetched_frame["date"])
+        cached = (
+            pd.concat([cached, fetched_frame], ignore_index=True)
+            .drop_duplicates(subset="date", keep="last")
+            .sort_values("date", ignore_index=True)
+        )
+        # Запись через временный файл, чтобы параллельные процессы не прочитали файл наполовину
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        cached[["date", "rate"]].to_csv(tmp_path, index=False, date_format="%Y-%m-%d")
+        os.replace(tmp_path, path)
+
+    in_period = cached.loc[(cached["date"] >= pd.Timestamp(start)) & (cached["date"] <= pd.Timestamp(end))]
+    return in_period.assign(currency=currency)[["date", "currency", "rate"]].reset_index(drop=True)
+
+
+def convert_operations_to_rub(operation: pd.DataFrame, cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Пересчитывает суммы операций в иностранной валюте в рубли по курсу на дату операции.
+
+    Для каждой валюты, встречающейся в 'Валюта операции' и 'Валюта платежа', история курсов
+    запрашивается одним запросом timeframe на весь диапазон дат операций в этой валюте (с локальным кэшем),
+    а пересчёт выполняется векторно через pd.merge_asof. Число запросов к API зависит от числа валют,
+    а не от числа операций.
+
+    Принимает:
+        operation (pd.DataFrame): DataFrame с транзакциями, должен содержать колонку 'Дата операции'
+        cache_dir (Optional[str]): Директория кэша курсов. По умолчанию utils.market_data_cache_dir
+
+    Возвращает:
+        pd.DataFrame: Копия операций, в которой 'Сумма операции', 'Сумма платежа' и
+                      'Сумма операции с округлением' пересчитаны в рубли, а валюты заменены на RUB
+
+    Исключения:
+        ValueError: Если не переданы транзакции
+        TypeError: Если транзакции переданы не в виде pandas DataFrame
+
+    Особенности:
+        - Используется курс на день операции (время операции не учитывается), а если его нет -
+          последний известный до этого дня
+        - Операции без даты не пересчитываются
+        - Переданный DataFrame не изменяется
+    """
+    if operation is None:
+        logger.critical("Ошибка: Не переданы транзакции")
+        raise ValueError("Транзакции не переданы")
+    elif not isinstance(operation, pd.DataFrame):
+        logger.critical("Ошибка: Транзакции переданы в типе %s", type(operation))
+        raise TypeError("Транзакции должны быть переданы в виде pandas DataFrame")
+
+    result = operation.copy()
+    dates = result["Дата операции"]
+    if not pd.api.types.is_datetime64_dtype(dates):
+        dates = pd.to_datetime(dates, dayfirst=True)
+    days = dates.dt.normalize()
+
+    currency_columns = sorted({column for column in AMOUNT_CURRENCY_COLUMNS.values() if column in result.columns})
+
+    # Уникальные пары (валюта, дата) во всех колонках валют
+    pairs = pd.concat(
+        [pd.DataFrame({"currency": result[column], "date": days}) for column in currency_columns], ignore_index=True
+    ).dropna()
+    pairs = pairs.loc[pairs["currency"] != RUB].drop_duplicates()
+    if pairs.empty:
+        return result
+
+    # Одна история курсов на валюту за весь её диапазон дат
+    ranges = pairs.groupby("currency")["date"].agg(["min", "max"])
+    rates = pd.concat(
+        [
+            load_currency_rate_history(currency, row["min"].date(), row["max"].date(), cache_dir)
+            for currency, row in ranges.iterrows()
+        ],
+        ignore_index=True,
+    ).sort_values("date", ignore_index=True)
+
+    converted_rows = {}
+    for amount_column, currency_column in AMOUNT_CURRENCY_COLUMNS.items():
+        if amount_column not in result.columns or currency_column not in result.columns:
+            continue
+
+        mask = (result[currency_column] != RUB) & result[currency_column].notna() & dates.notna()
+        if not mask.any():
+            continue
+
+        positions = np.flatnonzero(mask.to_numpy())
+        left = pd.DataFrame(
+            {
+                "position": positions,
+                "date": days.to_numpy()[positions],
+                "currency": result[currency_column].to_numpy()[positions],
+            }
+        ).sort_values("date")
+        merged = pd.merge_asof(left, rates, on="date", by="currency", direction="backward")
+
+        # Операции в валюте, курс которой не получен, остаются без пересчёта
+        not_found = merged["rate"].isna()
+        if not_found.any():
+            logger.warning("Курс не найден для валют: %s", sorted(merged.loc[not_found, 'currency'].unique()))
+            merged = merged.loc[~not_found]
+
+        converted = merged["position"].to_numpy()
+        amounts = result[amount_column].to_numpy(dtype=float, copy=True)
+        amounts[converted] = (amounts[converted] * merged["rate"].to_numpy()).round(2)
+        result[amount_column] = amounts
+        converted_rows[currency_column] = converted
+
+    # Валюты меняются после пересчёта всех сумм: 'Валюта платежа' используется двумя колонками сумм
+    for currency_column, positions in converted_rows.items():
+        values = result[currency_column].to_numpy(copy=True)
+        values[positions] = RUB
+        result[currency_column] = values
+
+    return result
@@ -1,6 +1,23 @@
-import pandas as pd
+from __future__ import annotations
 
+import datetime
+import logging
+from typing import TYPE_CHECKING, Optional
 
+from src.lazy_imports import lazy_import
+from src.metrics import record_rows, span, timed
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+
+@timed("data.get_data")
 def get_data() -> pd.DataFrame:
     """
     Загружает банковские операции из Excel-файла в DataFrame.
@@ -19,8 +36,130 @@ def get_data() -> pd.DataFrame:
     try:
         # Пытаемся загрузить данные из Excel-файла
         # Путь к файлу: ../data/operations.xlsx (на уровень выше в папке data)
-        return pd.read_excel("../data/operations.xlsx")
+        frame = pd.read_excel("../data/operations.xlsx")
 
     except FileNotFoundError:
         # Обработка случая, когда файл не найден
         raise FileNotFoundError("Файл не найден")
+
+    record_rows("data.get_data", len(frame))
+    return frame
+
+
+# Колонки с номерами календарных периодов в подготовленных операциях
+PERIOD_COLUMNS = {"W": "week_id", "M": "month_id", "Y": "year_id"}
+
+
+class PreparedOperations:
+    """
+    Операции, отсортированные по дате, с номерами недели, месяца и года и границами каждого периода.
+
+    Выборка операций за неделю, месяц или год - поиск границ периода в словаре и срез подряд идущих строк,
+    без прохода по всем операциям. Создаётся функцией prepare_operations.
+
+    Атрибуты:
+        frame (pd.DataFrame): Операции, отсортированные по 'Дата операции' (datetime), с колонками
+                              week_id, month_id и year_id - номерами недели (с понедельника), месяца и года
+                              от 1970 года
+        dates (np.ndarray): Даты операций в порядке frame (datetime64[ns]), операции без даты - в конце
+    """
+
+    def __init__(self, frame: pd.DataFrame, offsets: dict[str, dict[int, tuple[int, int]]]) -> None:
+        self.frame = frame
+        self.dates = frame["Дата операции"].to_numpy()
+        self._offsets = offsets
+        # Число операций с датой: операции без даты не попадают ни в один период
+        self._dated = int(np.count_nonzero(~np.isnat(self.dates)))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def period_slice(self, end_date: datetime.datetime, period: Optional[str] = "M") -> pd.DataFrame:
+        """
+        Возвращает операции от начала периода, на который приходится end_date, до end_date включительно.
+
+        Принимает:
+            end_date (datetime.datetime): Конец выборки
+            period (Optional[str]): "W", "M", "Y" или "ALL" (все операции до end_date)
+
+        Исключение:
+            ValueError: Если период указан неверно
+        """
+        end = np.datetime64(end_date, "ns")
+        if period == "ALL":
+            return self.frame.iloc[: int(np.searchsorted(self.dates[: self._dated], end, side="right"))]
+        if period not in PERIOD_COLUMNS:
+            logger.critical("Ошибка: Неверный период %s", period)
+            raise ValueError("Период указан неверно")
+
+        bounds = self._offsets[period].get(int(_period_ids(np.array([end]), period)[0]))
+        if bounds is None:
+            return self.frame.iloc[:0]
+
+        start, stop = bounds
+        # Внутри периода отсекаются операции позже end_date
+        stop = start + int(np.searchsorted(self.dates[start:stop], end, side="right"))
+        return self.frame.iloc[start:stop]
+
+
+def _period_ids(dates: np.ndarray, period: str) -> np.ndarray:
+    """Номера недель (с понедельника), месяцев или лет от 1970 года для массива datetime64"""
+    if period == "W":
+        # 1970-01-01 - четверг, сдвиг на 3 дня выравнивает недели по понедельникам
+        return (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+    if period == "M":
+        return dates.astype("datetime64[M]").astype(np.int64)
+    return dates.astype("datetime64[Y]").astype(np.int64)
+
+
+@timed("data.prepare_operations")
+def prepare_operations(operation: pd.DataFrame) -> PreparedOperations:
+    """
+    Подготавливает операции к многократной выборке по периодам.
+
+    Принимает:
+        operation (pd.DataFrame): DataFrame с транзакциями, должен содержать колонку 'Дата операции'
+                                  (datetime или строки в формате ДД.ММ.ГГГГ ЧЧ:ММ:СС)
+
+    Возвращает:
+        PreparedOperations: Копия операций, отсортированная по дате, с номерами периодов и их границами
+
+    Исключения:
+        ValueError: Если не переданы транзакции
+        TypeError: Если транзакции переданы не в виде pandas DataFrame
+
+    Особенности:
+        - Сортировка устойчивая: операции с одинаковой датой сохраняют исходный порядок
+        - Переданный DataFrame не изменяется
+    """
+    if operation is None:
+        logger.critical("Ошибка: Не переданы транзакции")
+        raise ValueError("Транзакции не переданы")
+    elif not isinstance(operation, pd.DataFrame):
+        logger.critical("Ошибка: Транзакции переданы в типе %s", type(operation))
+        raise TypeError("Транзакции должны быть переданы в виде pandas DataFrame")
+
+    record_rows("data.prepare_operations", len(operation))
+    frame = operation.copy()
+    if not pd.api.types.is_datetime64_dtype(frame["Дата операции"]):
+        with span("data.convert_dates"):
+            frame["Дата операции"] = pd.to_datetime(frame["Дата операции"], dayfirst=True)
+    with span("data.sort"):
+        frame = frame.sort_values("Дата операции", kind="stable", na_position="last", ignore_index=True)
+
+    dates = frame["Дата операции"].to_numpy()
+    dated = int(np.count_nonzero(~np.isnat(dates)))
+
+    offsets: dict[str, dict[int, tuple[int, int]]] = {}
+    for period, column in PERIOD_COLUMNS.items():
+        ids = _period_ids(dates[:dated], period)
+        # Номера периодов у отсортированных операций не убывают: границы - места смены номера
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(ids)) + 1]) if dated else np.array([], dtype=np.int64)
+        stops = np.append(starts[1:], dated)
+        offsets[period] = {int(ids[start]): (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+        column_values = np.full(len(frame), -1, dtype=np.int64)
+        column_values[:dated] = ids
+        frame[column] = column_values
+
+    return PreparedOperations(frame, offsets)
@@ -0,0 +1,40 @@
+import threading
+from typing import Callable
+
+# Переменные из .env загружаются в окружение процесса один раз, при первом обращении к настройкам
+_loaded = False
+_lock = threading.Lock()
+
+# Функции, которые перечитывают настройки из окружения после загрузки .env (см. on_env_loaded)
+_callbacks: list[Callable[[], None]] = []
+
+
+def load_env() -> None:
+    """Загружает переменные из файла .env в окружение процесса. Повторные вызовы ничего не делают"""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        # python-dotenv нужен только при первом обращении к настройкам, а не при импорте пакета
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _loaded = True
+        callbacks = list(_callbacks)
+    for callback in callbacks:
+        callback()
+
+
+def on_env_loaded(callback: Callable[[], None]) -> None:
+    """
+    Регистрирует функцию, которая вызывается после загрузки .env (сразу, если .env уже загружен).
+
+    Нужна настройкам, которые применяются при импорте пакета, до загрузки .env (например, уровень журнала)
+    """
+    with _lock:
+        if not _loaded:
+            _callbacks.append(callback)
+            return
+    callback()
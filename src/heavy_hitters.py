@@ -0,0 +1,234 @@
+import logging
+from typing import Callable, Iterable, Optional, Union
+
+import pandas as pd
+
+from src.utils import CASH_AND_TRANSFERS_CATEGORIES, EXPENSES_TOP_N
+
+logger = logging.getLogger(__name__)
+
+# Источник операций по частям: DataFrame, список частей или функция, возвращающая новый итератор частей
+# (например, lambda: pd.read_csv(path, chunksize=100_000)). Для точного второго прохода части читаются дважды
+OperationChunks = Union[pd.DataFrame, Iterable[pd.DataFrame], Callable[[], Iterable[pd.DataFrame]]]
+
+
+class SpaceSaving:
+    """
+    Взвешенный Space-Saving: приближённые суммы для ключей с наибольшими суммами в ограниченной памяти.
+
+    Хранит не больше capacity ключей. Оценка суммы ключа не меньше истинной суммы и превышает её
+    не больше, чем на error ключа. Ключ, которого нет в сводке, имеет сумму не больше min_estimate,
+    поэтому любой ключ с суммой больше min_estimate гарантированно есть в сводке.
+
+    Принимает:
+        capacity (int): Максимальное число хранимых ключей
+
+    Особенности:
+        - Часть данных сначала агрегируется по ключам (groupby), затем объединяется со сводкой
+          как сводка без ошибок (mergeable summaries), поэтому обновление векторное
+        - Веса должны быть неотрицательными
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if not isinstance(capacity, int) or capacity < 1:
+            logger.critical("Ошибка: Неверный размер сводки %s", capacity)
+            raise ValueError("Размер сводки должен быть целым числом больше 0")
+
+        self.capacity = capacity
+        self.total = 0.0
+        self._estimates = pd.Series(dtype=float)
+        self._errors = pd.Series(dtype=float)
+
+    def __len__(self) -> int:
+        return len(self._estimates)
+
+    @property
+    def min_estimate(self) -> float:
+        """Верхняя граница суммы любого ключа, которого нет в сводке"""
+        if len(self._estimates) < self.capacity:
+            return 0.0
+        return float(self._estimates.min())
+
+    def update(self, keys: pd.Series, weights: pd.Series) -> None:
+        """Добавляет веса ключей из очередной части данных (пустые ключи пропускаются)"""
+        chunk = weights.groupby(keys.to_numpy(), sort=False).sum()
+        if chunk.empty:
+            return
+
+        floor = self.min_estimate
+        all_keys = self._estimates.index.union(chunk.index, sort=False)
+        # Ключ, которого не было в сводке, мог накопить до floor до вытеснения: это его ошибка
+        estimates = self._estimates.reindex(all_keys, fill_value=floor) + chunk.reindex(all_keys, fill_value=0.0)
+        errors = self._errors.reindex(all_keys, fill_value=floor)
+
+        kept = estimates.nlargest(self.capacity, keep="first").index
+        self._estimates = estimates.loc[kept]
+        self._errors = errors.loc[kept]
+        self.total += float(chunk.sum())
+
+    def top(self, n: Optional[int] = None) -> list[tuple]:
+        """Возвращает до n ключей с наибольшими оценками: [(ключ, оценка, ошибка), ...] по убыванию оценки"""
+        estimates = self._estimates.sort_values(ascending=False, kind="stable")
+        if n is not None:
+            estimates = estimates.iloc[:n]
+        return [(key, float(value), float(self._errors[key])) for key, value in estimates.items()]
+
+    def candidates(self) -> list:
+        """Возвращает все ключи сводки"""
+        return list(self._estimates.index)
+
+
+class TopExpenses:
+    """
+    Потоковый поиск категорий и мест трат ('Описание') с наибольшими расходами.
+
+    Операции передаются частями в update. Память ограничена capacity ключами на категории и столько же
+    на места, независимо от объёма данных и числа уникальных описаний.
+
+    Принимает:
+        top_n (int): Число категорий и мест в результате (по умолчанию 7, как в get_expenses)
+        capacity (Optional[int]): Размер сводок. По умолчанию max(20 * top_n, 200)
+
+    Особенности:
+        - Расходы - операции с отрицательной 'Сумма операции', сумма берётся из 'Сумма операции с округлением'
+        - Категории 'Наличные' и 'Переводы' в топ категорий не входят (как в get_expenses), но их операции
+          учитываются в топе мест
+        - top() возвращает оценки после одного прохода, exact_top() - точные суммы кандидатов
+          после второго прохода по тем же частям
+    """
+
+    def __init__(self, top_n: int = EXPENSES_TOP_N, capacity: Optional[int] = None) -> None:
+        if not isinstance(top_n, int) or top_n < 1:
+            logger.critical("Ошибка: Неверный размер топа %s", top_n)
+            raise ValueError("Размер топа должен быть целым числом больше 0")
+
+        self.top_n = top_n
+        capacity = capacity if capacity is not None else max(20 * top_n, 200)
+        if capacity < top_n:
+            logger.critical("Ошибка: Размер сводки %s меньше размера топа %s", capacity, top_n)
+            raise ValueError("Размер сводки не может быть меньше размера топа")
+
+        self.categories = SpaceSaving(capacity)
+        self.merchants = SpaceSaving(capacity)
+
+    @staticmethod
+    def _expenses(chunk: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+        """Возвращает операции расходов части и маску операций, учитываемых в топе категорий"""
+        if not isinstance(chunk, pd.DataFrame):
+            logger.critical("Ошибка: Часть операций передана в типе %s", type(chunk))
+            raise TypeError("Операции должны быть переданы в виде pandas DataFrame")
+
+        expenses = chunk.loc[chunk["Сумма операции"] < 0]
+        return expenses, ~expenses["Категория"].isin(CASH_AND_TRANSFERS_CATEGORIES)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Учитывает очередную часть операций"""
+        expenses, in_categories = self._expenses(chunk)
+        amount = expenses["Сумма операции с округлением"]
+        self.categories.update(expenses["Категория"][in_categories], amount[in_categories])
+        self.merchants.update(expenses["Описание"], amount)
+
+    def _result(self, categories: list[tuple], merchants: list[tuple]) -> dict:
+        return {
+            "categories": [{"category": key, "amount": float(round(value))} for key, value, *_ in categories],
+            "merchants": [{"merchant": key, "amount": float(round(value))} for key, value, *_ in merchants],
+        }
+
+    def top(self) -> dict:
+        """
+        Возвращает оценки топа после одного прохода.
+
+        Возвращает:
+            dict: {"categories": [{"category", "amount"}, ...], "merchants": [{"merchant", "amount"}, ...]},
+                  суммы - верхние оценки
+        """
+        return self._result(self.categories.top(self.top_n), self.merchants.top(self.top_n))
+
+    def exact_top(self, chunks: OperationChunks) -> dict:
+        """
+        Считает точные суммы кандидатов вторым проходом по тем же операциям и возвращает топ.
+
+        Результат совпадает с полным groupby, если сумма top_n-го ключа больше min_estimate сводки
+        (иначе ключ мог не попасть в кандидаты; при размере сводки по умолчанию это возможно только при
+        очень равномерном распределении трат).
+
+        Возвращает:
+            dict: В формате top(), суммы - точные
+
+        Исключения:
+            ValueError: Если части переданы одноразовым итератором, который уже прочитан первым проходом
+        """
+        if _is_one_shot(chunks):
+            logger.critical("Ошибка: Для второго прохода части операций переданы одноразовым итератором")
+            raise ValueError(
+                "Для точных сумм нужен повторно читаемый источник: DataFrame, список частей или функция, "
+                "возвращающая новый итератор частей"
+            )
+
+        category_candidates = pd.Index(self.categories.candidates())
+        merchant_candidates = pd.Index(self.merchants.candidates())
+        category_sums: pd.Series = pd.Series(0.0, index=category_candidates)
+        merchant_sums: pd.Series = pd.Series(0.0, index=merchant_candidates)
+
+        for chunk in _iter_chunks(chunks):
+            expenses, in_categories = self._expenses(chunk)
+            amount = expenses["Сумма операции с округлением"]
+            category = expenses["Категория"]
+            merchant = expenses["Описание"]
+
+            category_mask = in_categories & category.isin(category_candidates)
+            category_sums = category_sums.add(
+                amount[category_mask].groupby(category[category_mask].to_numpy()).sum(), fill_value=0.0
+            )
+            merchant_mask = merchant.isin(merchant_candidates)
+            merchant_sums = merchant_sums.add(
+                amount[merchant_mask].groupby(merchant[merchant_mask].to_numpy()).sum(), fill_value=0.0
+            )
+
+        def top(sums: pd.Series) -> list[tuple]:
+            return list(sums.sort_values(ascending=False, kind="stable").iloc[: self.top_n].items())
+
+        return self._result(top(category_sums), top(merchant_sums))
+
+
+def _is_one_shot(chunks: OperationChunks) -> bool:
+    """Одноразовый итератор (генератор, итератор read_csv и т.п.): второй проход по нему пуст"""
+    return not isinstance(chunks, pd.DataFrame) and not callable(chunks) and iter(chunks) is chunks
+
+
+def _iter_chunks(chunks: OperationChunks) -> Iterable[pd.DataFrame]:
+    if isinstance(chunks, pd.DataFrame):
+        return [chunks]
+    if callable(chunks):
+        return chunks()
+    return chunks
+
+
+def top_expenses(
+    chunks: OperationChunks, top_n: int = EXPENSES_TOP_N, capacity: Optional[int] = None, exact: bool = True
+) -> dict:
+    """
+    Возвращает категории и места трат с наибольшими расходами, читая операции частями.
+
+    Принимает:
+        chunks (OperationChunks): DataFrame, список частей или функция, возвращающая итератор частей
+        top_n (int): Число категорий и мест в результате
+        capacity (Optional[int]): Размер сводок Space-Saving (см. TopExpenses)
+        exact (bool): Уточнить суммы кандидатов вторым проходом. Для одноразового итератора частей
+                      второй проход невозможен, и возвращаются приближённые суммы, как при exact=False
+
+    Возвращает:
+        dict: {"categories": [{"category", "amount"}, ...], "merchants": [{"merchant", "amount"}, ...]}
+
+    Исключения:
+        ValueError: Если top_n или capacity указаны неверно
+        TypeError: Если часть операций передана не в виде pandas DataFrame
+    """
+    aggregator = TopExpenses(top_n, capacity)
+    for chunk in _iter_chunks(chunks):
+        aggregator.update(chunk)
+
+    if exact and _is_one_shot(chunks):
+        logger.warning("Части операций переданы одноразовым итератором, суммы топа приближённые")
+        exact = False
+    return aggregator.exact_top(chunks) if exact else aggregator.top()
@@ -0,0 +1,64 @@
+import importlib
+import sys
+import threading
+from types import ModuleType
+from typing import Any, Callable, Optional
+
+
+class LazyModule:
+    """
+    Модуль, который импортируется при первом обращении к его атрибуту.
+
+    Тяжёлые зависимости (pandas, numpy, requests) не загружаются при импорте модулей пакета,
+    а только когда функция пакета ими воспользуется: python -m src.cli --help и import src.views
+    их не загружают.
+
+    Принимает:
+        name (str): Имя модуля, например "pandas"
+
+    Особенности:
+        - Потокобезопасен: повторный импорт из нескольких потоков ждёт блокировку импорта Python
+    """
+
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attribute)
+
+    def __repr__(self) -> str:
+        return f"<LazyModule {self._name!r}>"
+
+
+def lazy_import(name: str) -> Any:
+    """Возвращает модуль, если он уже импортирован, иначе LazyModule, который импортирует его при обращении"""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+_class_lock = threading.Lock()
+
+
+def lazy_subclass(namespace: dict, name: str, base: Callable[[], type], doc: str) -> type:
+    """
+    Возвращает класс name, наследующий base(), и создаёт его в namespace модуля при первом вызове.
+
+    Используется для исключений, наследующих исключения requests: модуль объявляет такой класс,
+    не загружая requests при импорте. Созданный класс сохраняется в namespace, поэтому
+    все вызовы возвращают один и тот же класс.
+    """
+    cls = namespace.get(name)
+    if cls is not None:
+        return cls
+    with _class_lock:
+        cls = namespace.get(name)
+        if cls is None:
+            cls = type(name, (base(),), {"__doc__": doc, "__module__": namespace["__name__"]})
+            namespace[name] = cls
+        return cls
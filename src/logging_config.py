@@ -0,0 +1,176 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Optional, TextIO, Union
+
+from src.env import on_env_loaded
+
+# Формат сообщений журнала (общий для всех модулей пакета)
+LOG_FORMAT = "%(asctime)s %(filename)s %(funcName)s %(levelname)s: %(message)s"
+
+# Логгер пакета: логгеры модулей (logging.getLogger(__name__)) передают ему записи
+PACKAGE_LOGGER = "src"
+
+# Уровень журнала по умолчанию. Переопределяется переменной окружения LOG_LEVEL или set_log_level
+DEFAULT_LOG_LEVEL = "WARNING"
+
+# True, если уровень журнала взят из LOG_LEVEL: после загрузки .env он перечитывается (см. _apply_env_level)
+_level_from_env = False
+
+logger = logging.getLogger(__name__)
+
+
+class _StderrHandler(logging.StreamHandler):
+    """Пишет в текущий sys.stderr: поток может быть подменён после настройки журнала (например, pytest)"""
+
+    def __init__(self) -> None:
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self) -> TextIO:  # type: ignore[override]
+        return sys.stderr
+
+
+class _BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который при первой записи запускает QueueListener с обработчиком вывода.
+
+    Поток, вызвавший логгер, только кладёт запись в очередь: форматирование времени и запись в поток
+    вывода выполняет фоновый поток QueueListener. Пока в журнал ничего не записано, поток не создаётся.
+    """
+
+    def __init__(self, target: logging.Handler) -> None:
+        super().__init__(queue.SimpleQueue())
+        self.target = target
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._listener_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._listener is None:
+            self._start_listener()
+        super().emit(record)
+
+    def _start_listener(self) -> None:
+        with self._listener_lock:
+            if self._listener is None:
+                listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+                listener.start()
+                self._listener = listener
+
+    def flush(self) -> None:
+        """Дожидается записи всех сообщений из очереди и останавливает фоновый поток"""
+        with self._listener_lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener = None
+        self.target.flush()
+
+    def reset_after_fork(self) -> None:
+        """В дочернем процессе фонового потока нет: очередь и поток создаются заново при первой записи"""
+        self.queue = queue.SimpleQueue()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+
+# Обработчик логгера пакета, установленный configure_logging
+_handler: Optional[_BackgroundQueueHandler] = None
+
+
+def _level_from_name(level: Union[int, str]) -> Optional[int]:
+    """Возвращает числовой уровень logging или None, если уровень неизвестен"""
+    if isinstance(level, int) and not isinstance(level, bool):
+        return level
+    if isinstance(level, str):
+        return logging.getLevelNamesMapping().get(level.upper())
+    return None
+
+
+def set_log_level(level: Union[int, str]) -> None:
+    """
+    Устанавливает уровень журнала пакета.
+
+    Принимает:
+        level (Union[int, str]): Уровень logging (например, logging.INFO) или его имя ("INFO")
+
+    Исключения:
+        ValueError: Если уровень неизвестен
+    """
+    global _level_from_env
+    level_number = _level_from_name(level)
+    if level_number is None:
+        logger.critical("Ошибка: Неизвестный уровень журнала %s", level)
+        raise ValueError("Уровень журнала должен быть числом или одним из: DEBUG, INFO, WARNING, ERROR, CRITICAL")
+    logging.getLogger(PACKAGE_LOGGER).setLevel(level_number)
+    _level_from_env = False
+
+
+def _set_env_level() -> None:
+    """Устанавливает уровень из переменной окружения LOG_LEVEL (DEFAULT_LOG_LEVEL, если он не задан или неизвестен)"""
+    global _level_from_env
+    level = os.getenv("LOG_LEVEL", DEFAULT_LOG_LEVEL)
+    if _level_from_name(level) is None:
+        logger.warning("Неизвестный уровень LOG_LEVEL=%s, используется %s", level, DEFAULT_LOG_LEVEL)
+        level = DEFAULT_LOG_LEVEL
+    set_log_level(level)
+    _level_from_env = True
+
+
+def _apply_env_level() -> None:
+    """Перечитывает LOG_LEVEL после загрузки .env, если уровень не задан явно"""
+    if _level_from_env:
+        _set_env_level()
+
+
+def configure_logging(level: Optional[Union[int, str]] = None, stream: Optional[TextIO] = None) -> None:
+    """
+    Настраивает журнал пакета: один неблокирующий обработчик на логгере "src".
+
+    Вызывается при импорте пакета (src/__init__.py), повторный вызов заменяет обработчик.
+
+    Принимает:
+        level (Optional[Union[int, str]]): Уровень журнала. По умолчанию LOG_LEVEL или WARNING
+        stream (Optional[TextIO]): Поток вывода. По умолчанию sys.stderr
+
+    Особенности:
+        - Пакет импортируется до загрузки .env (src.env): уровень из LOG_LEVEL в .env применяется после его
+          загрузки, при первом обращении к настройкам или при запуске src.cli, src.server и src.main
+        - Сообщения ниже уровня отбрасываются логгером до форматирования (аргументы %-стиля не подставляются)
+        - Запись в поток выполняет фоновый поток QueueListener, при выходе из процесса очередь дописывается
+        - Записи передаются и родительским логгерам (например, обработчику pytest caplog)
+    """
+    global _handler
+
+    package_logger = logging.getLogger(PACKAGE_LOGGER)
+    if level is None:
+        _set_env_level()
+    else:
+        set_log_level(level)
+
+    if _handler is not None:
+        package_logger.removeHandler(_handler)
+        _handler.flush()
+
+    target = logging.StreamHandler(stream) if stream is not None else _StderrHandler()
+    target.setFormatter(logging.Formatter(LOG_FORMAT))
+    _handler = _BackgroundQueueHandler(target)
+    package_logger.addHandler(_handler)
+
+
+def flush_logging() -> None:
+    """Дописывает сообщения из очереди в поток вывода"""
+    if _handler is not None:
+        _handler.flush()
+
+
+def _reset_after_fork() -> None:
+    if _handler is not None:
+        _handler.reset_after_fork()
+
+
+atexit.register(flush_logging)
+on_env_loaded(_apply_env_level)
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,6 +1,8 @@
 import pandas as pd
 
 from src.data import get_data
+from src.env import load_env
+from src.profiling import profile_label, profiled
 from src.reports import get_expenses_for_3_months_by_category
 from src.services import filter_transaction_by_search_str
 from src.views import get_events
@@ -12,8 +14,14 @@ def main() -> None:
     2. Запрашивает у пользователя параметры для выборки данных
     3. Выводит результаты работы всех функций программы
 
+    Если задана переменная окружения PROFILE_MODE (cpu или memory), каждый вызов профилируется
+    (см. src.profiling), профили записываются в PROFILE_DIR.
+
     Функция не принимает аргументов и не возвращает значений (None)
     """
+    # Переменные из .env (LOG_LEVEL, PROFILE_MODE и т.п.) применяются до первого вызова
+    load_env()
+
     # Получаем DataFrame с операциями из функции get_data()
     operations: pd.DataFrame = get_data()
 
@@ -28,15 +36,19 @@ def main() -> None:
     ALL - все данные до указанной даты"""
     )
     # Выводим результат функции get_events с пользовательскими параметрами
-    print(get_events(operations, get_events_date_arg, get_events_period_arg))
+    with profiled(profile_label("events", {"date": get_events_date_arg, "period": get_events_period_arg})):
+        events = get_events(operations, get_events_date_arg, get_events_period_arg)
+    print(events)
 
     # Запрашиваем категорию для фильтрации транзакций
     filter_transaction_search_str_arg = input("Укажите категорию по которой отфильтровать транзакции")
     # Преобразуем DataFrame в список словарей и фильтруем по категории
-    print(filter_transaction_by_search_str(
-        operations.to_dict(orient="records"),
-        filter_transaction_search_str_arg
-    ))
+    with profiled(profile_label("search", {"search": filter_transaction_search_str_arg})):
+        found = filter_transaction_by_search_str(
+            operations.to_dict(orient="records"),
+            filter_transaction_search_str_arg
+        )
+    print(found)
 
     # Запрашиваем категорию для формирования отчета по расходам
     get_expenses_category_arg = input("Укажите категорию по которой будет сформирован отчёт")
@@ -46,7 +58,10 @@ def main() -> None:
     Если дата не указана, отчёт сформируется за сегодня"""
     )
     # Выводим отчет по расходам за 3 месяца для указанной категории
-    print(get_expenses_for_3_months_by_category(operations, get_expenses_category_arg, get_expenses_date_arg))
+    report_params = {"category": get_expenses_category_arg, "date": get_expenses_date_arg}
+    with profiled(profile_label("report", report_params)):
+        report = get_expenses_for_3_months_by_category(operations, get_expenses_category_arg, get_expenses_date_arg)
+    print(report)
 
     return None
 
@@ -0,0 +1,146 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: файл кэша записывается без межпроцессной блокировки
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    """Значение раздела рыночных данных и время его получения (Unix time)"""
+
+    value: Any
+    updated_at: float
+
+
+class MarketDataCache:
+    """
+    Потокобезопасный кэш последних успешно полученных рыночных данных.
+
+    Ключ записи - раздел ("currency_rates", "stock_prices") и список запрошенных валют или тикеров.
+    Используется как источник устаревших (stale) данных, когда провайдер не ответил вовремя,
+    и как источник свежих данных, заранее загруженных src.prefetch.
+
+    Принимает:
+        path (Optional[str]): JSON-файл для хранения кэша между процессами. Если не задан, кэш только в памяти
+        check_interval (float): Минимальный интервал между проверками файла в get, в секундах
+        clock (Callable[[], float]): Источник монотонного времени (используется в тестах)
+
+    Особенности:
+        - get не чаще раза в check_interval секунд проверяет mtime и размер файла и перечитывает его,
+          только если файл изменил другой процесс. В остальное время записи отдаются из памяти
+        - put перечитывает файл и перезаписывает его атомарно под блокировкой файла <path>.lock,
+          поэтому записи параллельных процессов не теряются
+        - Если файл повреждён или недоступен, используются записи в памяти
+    """
+
+    def __init__(
+        self, path: Optional[str] = None, check_interval: float = 1.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[tuple, CacheEntry] = {}
+        self._file_signature: Optional[tuple[int, int]] = None
+        self._checked_at: Optional[float] = None
+
+    @staticmethod
+    def _key(section: str, params: list) -> tuple:
+        return section, tuple(params)
+
+    def put(self, section: str, params: list, value: Any) -> None:
+        """Сохраняет значение раздела для указанных валют или тикеров"""
+        with self._lock:
+            if self.path is None:
+                self._entries[self._key(section, params)] = CacheEntry(value, time.time())
+                return
+            with self._file_lock():
+                # Перед записью файл перечитывается всегда: в нём могут быть записи других процессов
+                self._reload_if_changed()
+                self._entries[self._key(section, params)] = CacheEntry(value, time.time())
+                self._save()
+
+    def get(self, section: str, params: list) -> Optional[CacheEntry]:
+        """Возвращает сохранённую запись или None, если данных нет"""
+        with self._lock:
+            checked_at = self._checked_at
+            if checked_at is None or self._clock() - checked_at >= self.check_interval:
+                self._reload_if_changed()
+            return self._entries.get(self._key(section, params))
+
+    def get_fresh(self, section: str, params: list, max_age: float) -> Optional[CacheEntry]:
+        """Возвращает запись, если она получена не раньше, чем max_age секунд назад, иначе None"""
+        entry = self.get(section, params)
+        if entry is None or time.time() - entry.updated_at > max_age:
+            return None
+        return entry
+
+    def clear(self) -> None:
+        """Удаляет все записи"""
+        with self._lock:
+            self._entries.clear()
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Блокирует файл кэша для других процессов на время чтения и записи"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reload_if_changed(self) -> None:
+        """Перечитывает файл кэша, если он изменился с последнего чтения или записи"""
+        if self.path is None:
+            return
+        self._checked_at = self._clock()
+
+        try:
+            stat = os.stat(self.path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._file_signature:
+                return
+            with open(self.path, encoding="utf-8") as f:
+                records = json.load(f)
+            entries = {
+                self._key(record["section"], record["params"]): CacheEntry(record["value"], record["updated_at"])
+                for record in records
+            }
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning("Кэш рыночных данных %s не перечитан, используются записи в памяти: %s", self.path, e)
+            return
+
+        for key, entry in entries.items():
+            current = self._entries.get(key)
+            # Более новая запись в памяти не заменяется записью из файла
+            if current is None or current.updated_at < entry.updated_at:
+                self._entries[key] = entry
+        self._file_signature = signature
+
+    def _save(self) -> None:
+        """Записывает кэш в файл через временный файл, чтобы другие процессы не прочитали его наполовину"""
+        records = [
+            {"section": section, "params": list(params), "value": entry.value, "updated_at": entry.updated_at}
+            for (section, params), entry in self._entries.items()
+        ]
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        stat = os.stat(self.path)
+        self._file_signature = (stat.st_mtime_ns, stat.st_size)
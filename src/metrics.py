@@ -0,0 +1,269 @@
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+from src.env import load_env
+
+logger = logging.getLogger(__name__)
+
+# Сбор метрик включается переменной окружения METRICS_ENABLED=1 (в том числе в .env) или set_metrics_enabled(True).
+# Переменная читается при первом обращении к метрикам (см. _load_settings), после загрузки .env.
+# Пока сбор выключен, span и timed не измеряют время, а счётчики не меняются
+enabled: bool = False
+_settings_loaded = False
+_settings_lock = threading.Lock()
+
+# Префикс имён метрик в формате Prometheus
+METRICS_PREFIX = "banking_operations"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _load_settings() -> None:
+    """Загружает .env и читает METRICS_ENABLED. Выполняется один раз, при первом обращении к метрикам"""
+    global enabled, _settings_loaded
+    load_env()
+    with _settings_lock:
+        if not _settings_loaded:
+            enabled = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+            _settings_loaded = True
+
+
+def set_metrics_enabled(value: bool) -> None:
+    """Включает или выключает сбор метрик. Значение METRICS_ENABLED из окружения больше не используется"""
+    global enabled, _settings_loaded
+    with _settings_lock:
+        enabled = bool(value)
+        _settings_loaded = True
+
+
+class MetricsRegistry:
+    """
+    Метрики процесса: время этапов (span) и счётчики (число строк, попадания в кэш).
+
+    Время этапа хранится как число вызовов, суммарное и максимальное время в секундах.
+    Метки метрики - кортеж пар (имя, значение), отсортированный по имени.
+
+    Особенности:
+        - Потокобезопасен: этапы из потоков сервиса и пула рыночных данных пишут в один реестр
+        - В сервисе с несколькими процессами (--workers) у каждого процесса свой реестр
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._spans: dict[tuple[str, tuple], list[float]] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+
+    def observe(self, name: str, seconds: float, labels: tuple = ()) -> None:
+        """Учитывает один вызов этапа name длительностью seconds"""
+        with self._lock:
+            stats = self._spans.get((name, labels))
+            if stats is None:
+                self._spans[(name, labels)] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def inc(self, name: str, value: float = 1, labels: tuple = ()) -> None:
+        """Увеличивает счётчик name на value"""
+        with self._lock:
+            self._counters[(name, labels)] = self._counters.get((name, labels), 0) + value
+
+    def reset(self) -> None:
+        """Удаляет все накопленные метрики"""
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Возвращает накопленные метрики в виде словаря.
+
+        Возвращает:
+            dict: {
+                "spans": [{"name", "labels", "count", "total_seconds", "max_seconds"}, ...],
+                "counters": [{"name", "labels", "value"}, ...],
+                "cache_hit_ratio": {кэш: доля попаданий, ...}
+            }
+        """
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+
+        hits: dict[str, list[float]] = {}
+        for (name, labels), value in counters:
+            if name == "cache_requests":
+                label_values = dict(labels)
+                cache = hits.setdefault(label_values["cache"], [0, 0])
+                cache[0 if label_values["result"] == "hit" else 1] += value
+
+        return {
+            "spans": [
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": int(count),
+                    "total_seconds": total,
+                    "max_seconds": longest,
+                }
+                for (name, labels), (count, total, longest) in spans
+            ],
+            "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in counters],
+            "cache_hit_ratio": {cache: hit / (hit + miss) for cache, (hit, miss) in hits.items()},
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        Возвращает метрики в текстовом формате Prometheus (exposition format 0.0.4).
+
+        Этапы - summary {prefix}_span_seconds (_count, _sum) и gauge {prefix}_span_max_seconds с меткой span,
+        счётчики - counter {prefix}_{имя}_total.
+        """
+        snapshot = self.snapshot()
+        lines: list[str] = []
+
+        span_metric = f"{METRICS_PREFIX}_span_seconds"
+        max_metric = f"{METRICS_PREFIX}_span_max_seconds"
+        if snapshot["spans"]:
+            lines += [f"# HELP {span_metric} Время этапов обработки в секундах", f"# TYPE {span_metric} summary"]
+            for span_ in snapshot["spans"]:
+                labels = _prometheus_labels({"span": span_["name"], **span_["labels"]})
+                lines.append(f"{span_metric}_count{labels} {span_['count']}")
+                lines.append(f"{span_metric}_sum{labels} {span_['total_seconds']!r}")
+            lines += [f"# HELP {max_metric} Максимальное время этапа в секундах", f"# TYPE {max_metric} gauge"]
+            for span_ in snapshot["spans"]:
+                labels = _prometheus_labels({"span": span_["name"], **span_["labels"]})
+                lines.append(f"{max_metric}{labels} {span_['max_seconds']!r}")
+
+        described: set[str] = set()
+        for counter in snapshot["counters"]:
+            metric = f"{METRICS_PREFIX}_{counter['name']}_total"
+            if metric not in described:
+                described.add(metric)
+                lines += [f"# HELP {metric} Счётчик {counter['name']}", f"# TYPE {metric} counter"]
+            lines.append(f"{metric}{_prometheus_labels(counter['labels'])} {counter['value']!r}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _prometheus_labels(labels: dict) -> str:
+    """Метки в формате Prometheus: {name="value",...}, кавычки и обратная косая черта экранируются"""
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+# Реестр метрик процесса
+registry = MetricsRegistry()
+
+
+class _Span:
+    """Измеряет время блока with и записывает его в реестр"""
+
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: tuple) -> None:
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        registry.observe(self.name, time.perf_counter() - self.started, self.labels)
+
+
+class _DisabledSpan:
+    """Пустой span, пока сбор метрик выключен: один общий объект, без измерения времени"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_DisabledSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_DISABLED_SPAN = _DisabledSpan()
+
+
+def span(name: str, /, **labels: Any) -> Any:
+    """
+    Контекстный менеджер, который записывает время блока with как этап name.
+
+    Пример:
+        with span("views.select_period", period=period):
+            ...
+    """
+    if not _settings_loaded:
+        _load_settings()
+    if not enabled:
+        return _DISABLED_SPAN
+    return _Span(name, tuple(sorted(labels.items())))
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Декоратор: записывает время каждого вызова функции как этап name"""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _settings_loaded:
+                _load_settings()
+            if not enabled:
+                return func(*args, **kwargs)
+            with _Span(name, ()):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def record_rows(stage: str, rows: int) -> None:
+    """Учитывает число строк, обработанных этапом stage (счётчик rows)"""
+    if not _settings_loaded:
+        _load_settings()
+    if enabled:
+        registry.inc("rows", rows, (("stage", stage),))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Учитывает обращение к кэшу cache: попадание или промах (счётчик cache_requests)"""
+    if not _settings_loaded:
+        _load_settings()
+    if enabled:
+        registry.inc("cache_requests", 1, (("cache", cache), ("result", "hit" if hit else "miss")))
+
+
+def get_metrics() -> dict:
+    """Возвращает накопленные метрики процесса (см. MetricsRegistry.snapshot)"""
+    return registry.snapshot()
+
+
+def metrics_json(pretty: Optional[bool] = None) -> str:
+    """Возвращает накопленные метрики в виде JSON-строки"""
+    # src.serialization сам измеряет время сериализации, поэтому импортируется при вызове
+    from src.serialization import dumps
+
+    return dumps(registry.snapshot(), pretty=pretty)
+
+
+def metrics_prometheus() -> str:
+    """Возвращает накопленные метрики в текстовом формате Prometheus"""
+    return registry.to_prometheus()
+
+
+def reset_metrics() -> None:
+    """Удаляет накопленные метрики процесса"""
+    registry.reset()
@@ -0,0 +1,164 @@
+import argparse
+import json
+import logging
+import random
+import threading
+from typing import Optional
+
+import requests
+
+from src import utils
+from src.rate_limiter import batch_priority
+from src.settings import SettingsLoader
+
+logger = logging.getLogger(__name__)
+
+# Интервал обновления, если срок свежести кэша (utils.market_data_max_age) не задан
+DEFAULT_INTERVAL = 300.0
+
+# Ошибки провайдера, после которых обновление раздела повторяется в следующем цикле
+_PREFETCH_ERRORS = (requests.exceptions.RequestException, ValueError, TypeError)
+
+
+class MarketDataPrefetcher:
+    """
+    Фоновое обновление кэша курсов валют и цен акций из user_settings.json.
+
+    Разделы обновляются заранее, до того как запись в кэше перестанет считаться свежей,
+    поэтому get_events берёт данные из кэша и не ждёт ответа провайдеров.
+
+    Принимает:
+        settings_path (Optional[str]): Путь к user_settings.json. По умолчанию USER_SETTINGS_PATH
+                                       или user_settings.json в корне проекта (см. default_settings_path)
+        interval (Optional[float]): Интервал обновления в секундах. По умолчанию доля (1 - lead)
+                                    от utils.market_data_max_age или DEFAULT_INTERVAL
+        lead (float): Доля срока свежести, за которую обновление выполняется до его истечения
+        jitter (float): Случайное сокращение интервала (доля), чтобы процессы не обращались к API одновременно
+        retry_delay (float): Пауза перед повтором после ошибки провайдера в секундах
+
+    Особенности:
+        - Запросы выполняются с пакетным приоритетом: часть квоты остаётся интерактивным вызовам
+        - При исчерпанной квоте или разомкнутом circuit breaker обновление откладывается до следующего цикла
+        - Работает в отдельном потоке (start/stop) или процессе: python -m src.prefetch
+    """
+
+    def __init__(
+        self,
+        settings_path: Optional[str] = None,
+        interval: Optional[float] = None,
+        lead: float = 0.2,
+        jitter: float = 0.1,
+        retry_delay: float = 60.0,
+    ) -> None:
+        if not 0 <= lead < 1 or not 0 <= jitter < 1:
+            raise ValueError("Доли lead и jitter должны быть в диапазоне от 0 до 1")
+
+        self._settings_loader = SettingsLoader(settings_path, check_interval=0)
+        self._interval = interval
+        self.lead = lead
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def settings_path(self) -> Optional[str]:
+        """Путь к user_settings.json (None до первого чтения настроек по пути по умолчанию)"""
+        return self._settings_loader.path
+
+    @property
+    def interval(self) -> float:
+        """Интервал обновления в секундах без учёта jitter"""
+        if self._interval is not None:
+            return self._interval
+        if utils.market_data_max_age is not None:
+            return utils.market_data_max_age * (1 - self.lead)
+        return DEFAULT_INTERVAL
+
+    def refresh_once(self) -> dict[str, bool]:
+        """
+        Обновляет курсы валют и цены акций в кэше.
+
+        Возвращает:
+            dict[str, bool]: Успешность обновления по разделам
+        """
+        settings = self._settings_loader.get()
+
+        sections = {
+            "currency_rates": (utils.get_currency_rates, settings.get("user_currencies", [])),
+            "stock_prices": (utils.get_stock_prices, settings.get("user_stocks", [])),
+        }
+
+        results = {}
+        with batch_priority():
+            for section, (fetch, params) in sections.items():
+                if not params:
+                    continue
+                try:
+                    fetch(params)  # Результат сохраняется в utils.market_data_cache
+                except _PREFETCH_ERRORS as e:
+                    logger.warning("Раздел %s не обновлён: %s", section, e)
+                    results[section] = False
+                else:
+                    logger.info("Раздел %s обновлён", section)
+                    results[section] = True
+        return results
+
+    def next_delay(self, succeeded: bool) -> float:
+        """Пауза до следующего обновления: интервал или пауза повтора, сокращённые на случайную долю jitter"""
+        delay = self.interval if succeeded else min(self.retry_delay, self.interval)
+        return delay * random.uniform(1 - self.jitter, 1)
+
+    def run_forever(self) -> None:
+        """Обновляет кэш в цикле до вызова stop()"""
+        while not self._stop.is_set():
+            try:
+                succeeded = all(self.refresh_once().values())
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error("Не удалось прочитать настройки %s: %s", self.settings_path, e)
+                succeeded = False
+            self._stop.wait(self.next_delay(succeeded))
+
+    def start(self) -> None:
+        """Запускает обновление в фоновом потоке"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="market-data-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Останавливает фоновый поток"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Запускает обновление кэша отдельным процессом: python -m src.prefetch"""
+    parser = argparse.ArgumentParser(description="Фоновое обновление кэша курсов валют и цен акций")
+    parser.add_argument(
+        "--settings",
+        default=None,
+        help="Путь к user_settings.json. По умолчанию USER_SETTINGS_PATH или файл в корне проекта",
+    )
+    parser.add_argument("--interval", type=float, default=None, help="Интервал обновления в секундах")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Случайное сокращение интервала (0..1)")
+    parser.add_argument("--once", action="store_true", help="Обновить кэш один раз и завершиться")
+    args = parser.parse_args(argv)
+
+    if utils.market_data_cache.path is None:
+        logger.warning("MARKET_DATA_CACHE_FILE не задан: обновлённый кэш не будет доступен другим процессам")
+
+    prefetcher = MarketDataPrefetcher(args.settings, interval=args.interval, jitter=args.jitter)
+    if args.once:
+        prefetcher.refresh_once()
+        return
+
+    try:
+        prefetcher.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import tracemalloc
+from typing import Iterator, Optional, TextIO
+
+from src.env import load_env
+
+logger = logging.getLogger(__name__)
+
+# Режимы профилирования: "cpu" - cProfile (файл .prof), "memory" - tracemalloc (файл .collapsed)
+PROFILE_MODES = ("cpu", "memory")
+
+# Число функций и мест выделения памяти в сводке
+PROFILE_TOP = 20
+
+# Глубина стека, который tracemalloc сохраняет для каждого выделения памяти
+MEMORY_FRAMES = 25
+
+# Режим профилирования по умолчанию. Переопределяется переменной окружения PROFILE_MODE (в том числе в .env)
+# или set_profile_mode. None - профилирование выключено
+profile_mode: Optional[str] = None
+
+# Директория файлов профилей. Переопределяется переменной окружения PROFILE_DIR или set_profile_mode
+profile_dir: str = "profiles"
+
+# Переменные окружения читаются при первом профилируемом блоке (см. _load_settings), после загрузки .env
+_settings_loaded = False
+_settings_lock = threading.Lock()
+
+# Профилировщик и tracemalloc - общие для процесса (с Python 3.12 cProfile активен только один):
+# профилируемые блоки выполняются по одному
+_profile_lock = threading.RLock()
+# Выбор имени файла профиля и его создание - под одной блокировкой, чтобы потоки не заняли одно имя
+_path_lock = threading.Lock()
+
+
+def _load_settings() -> None:
+    """Загружает .env и читает PROFILE_MODE и PROFILE_DIR. Выполняется один раз"""
+    global profile_mode, profile_dir, _settings_loaded
+    if _settings_loaded:
+        return
+    load_env()
+    with _settings_lock:
+        if _settings_loaded:
+            return
+        profile_mode = os.getenv("PROFILE_MODE") or None
+        if profile_mode is not None and profile_mode not in PROFILE_MODES:
+            logger.warning("Неизвестный режим PROFILE_MODE=%s, профилирование выключено", profile_mode)
+            profile_mode = None
+        profile_dir = os.getenv("PROFILE_DIR", "profiles")
+        _settings_loaded = True
+
+
+def set_profile_mode(mode: Optional[str], output_dir: Optional[str] = None) -> None:
+    """
+    Включает профилирование блоков profiled в режиме mode или выключает его (None).
+
+    Принимает:
+        mode (Optional[str]): "cpu", "memory" или None
+        output_dir (Optional[str]): Директория файлов профилей. По умолчанию - прежняя
+
+    Исключения:
+        ValueError: Если режим неизвестен
+    """
+    global profile_mode, profile_dir
+    _validate_mode(mode)
+    _load_settings()
+    profile_mode = mode
+    if output_dir is not None:
+        profile_dir = output_dir
+
+
+def _validate_mode(mode: Optional[str]) -> None:
+    if mode is not None and mode not in PROFILE_MODES:
+        logger.critical("Ошибка: Неизвестный режим профилирования %s", mode)
+        raise ValueError(f"Режим профилирования должен быть одним из: {', '.join(PROFILE_MODES)}")
+
+
+def profile_label(name: str, params: Optional[dict] = None) -> str:
+    """
+    Возвращает метку профиля из имени запроса и его параметров для имени файла.
+
+    Пример:
+        profile_label("events", {"date": "2021-12-31", "period": "M"}) -> "events_date=2021-12-31_period=M"
+    """
+    parts = [name] + [f"{key}={value}" for key, value in (params or {}).items() if value is not None]
+    # В имени файла остаются буквы, цифры, '_', '.', '=' и '-'
+    return re.sub(r"[^\w.=-]+", "-", "_".join(parts)).strip("-")[:150] or "profile"
+
+
+def _create_output_file(output_dir: str, label: str, suffix: str) -> str:
+    """Создаёт пустой файл <label><suffix> в output_dir, при совпадении имён добавляет номер"""
+    os.makedirs(output_dir, exist_ok=True)
+    with _path_lock:
+        number = 1
+        path = os.path.join(output_dir, f"{label}{suffix}")
+        while os.path.exists(path):
+            number += 1
+            path = os.path.join(output_dir, f"{label}-{number}{suffix}")
+        open(path, "wb").close()
+    return path
+
+
+class Profile:
+    """
+    Результат профилирования блока profiled. Атрибуты заполняются при выходе из блока.
+
+    Атрибуты:
+        label (str): Метка профиля
+        mode (str): "cpu" или "memory"
+        path (Optional[str]): Путь к файлу профиля (.prof или .collapsed)
+        summary (str): Сводка: функции с наибольшим накопленным временем или места выделения памяти
+    """
+
+    def __init__(self, label: str, mode: str) -> None:
+        self.label = label
+        self.mode = mode
+        self.path: Optional[str] = None
+        self.summary = ""
+
+
+@contextlib.contextmanager
+def profiled(
+    label: str,
+    mode: Optional[str] = None,
+    output_dir: Optional[str] = None,
+    top: int = PROFILE_TOP,
+    stream: Optional[TextIO] = None,
+) -> Iterator[Optional[Profile]]:
+    """
+    Профилирует блок with: записывает профиль в файл и выводит сводку.
+
+    Принимает:
+        label (str): Метка профиля - имя файла без расширения (см. profile_label)
+        mode (Optional[str]): "cpu", "memory" или None. По умолчанию - profile_mode
+        output_dir (Optional[str]): Директория файлов профилей. По умолчанию - profile_dir
+        top (int): Число строк сводки
+        stream (Optional[TextIO]): Поток для сводки. По умолчанию sys.stderr
+
+    Возвращает:
+        Iterator[Optional[Profile]]: Результат профилирования или None, если профилирование выключено
+
+    Исключения:
+        ValueError: Если режим неизвестен
+
+    Особенности:
+        - "cpu": cProfile текущего потока, файл <label>.prof (pstats, snakeviz), сводка - функции
+          с наибольшим накопленным временем
+        - "memory": tracemalloc, файл <label>.collapsed (стеки выделений в формате flamegraph.pl: кадры
+          через ';' и размер в байтах), сводка - пиковый объём и строки с наибольшим объёмом памяти,
+          оставшейся выделенной к концу блока
+        - Профилируемые блоки разных потоков выполняются по одному
+    """
+    _load_settings()
+    mode = profile_mode if mode is None else mode
+    _validate_mode(mode)
+    if mode is None:
+        yield None
+        return
+
+    result = Profile(label, mode)
+    output_dir = profile_dir if output_dir is None else output_dir
+    profiler: Optional[cProfile.Profile] = None
+    snapshot: Optional[tracemalloc.Snapshot] = None
+    peak = 0
+    # Профиль записывается и тогда, когда блок завершился исключением
+    try:
+        with _profile_lock:
+            if mode == "cpu":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield result
+                finally:
+                    profiler.disable()
+            else:
+                started = not tracemalloc.is_tracing()
+                if started:
+                    tracemalloc.start(MEMORY_FRAMES)
+                tracemalloc.clear_traces()
+                tracemalloc.reset_peak()
+                try:
+                    yield result
+                finally:
+                    snapshot = tracemalloc.take_snapshot()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    if started:
+                        tracemalloc.stop()
+    finally:
+        if profiler is not None:
+            result.path = _create_output_file(output_dir, label, ".prof")
+            profiler.dump_stats(result.path)
+            result.summary = _cpu_summary(profiler, top)
+        elif snapshot is not None:
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            result.path = _create_output_file(output_dir, label, ".collapsed")
+            _write_collapsed_stacks(snapshot, result.path)
+            result.summary = _memory_summary(snapshot, peak, top)
+
+        if result.path is not None:
+            stream = sys.stderr if stream is None else stream
+            stream.write(f"Профиль {label} ({mode}): {result.path}\n{result.summary}\n")
+            stream.flush()
+
+
+def _cpu_summary(profiler: cProfile.Profile, top: int) -> str:
+    """Функции с наибольшим накопленным временем в формате pstats"""
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).strip_dirs().sort_stats("cumulative").print_stats(top)
+    return buffer.getvalue().strip("\n")
+
+
+def _write_collapsed_stacks(snapshot: tracemalloc.Snapshot, path: str) -> None:
+    """Записывает стеки выделений памяти в формате collapsed stacks: 'кадр;кадр;... байты' в строке"""
+    with open(path, "w", encoding="utf-8") as f:
+        for stat in snapshot.statistics("traceback"):
+            # Кадры tracemalloc идут от внешнего вызова к месту выделения, как и в collapsed stacks
+            frames = ";".join(f"{frame.filename}:{frame.lineno}".replace(";", "_") for frame in stat.traceback)
+            f.write(f"{frames} {stat.size}\n")
+
+
+def _memory_summary(snapshot: tracemalloc.Snapshot, peak: int, top: int) -> str:
+    """Пиковый объём памяти и строки кода с наибольшим объёмом оставшейся выделенной памяти"""
+    stats = snapshot.statistics("lineno")
+    lines = [f"Пик: {peak / 1024:.1f} KiB, выделено к концу: {sum(stat.size for stat in stats) / 1024:.1f} KiB"]
+    for number, stat in enumerate(stats[:top], start=1):
+        frame = stat.traceback[0]
+        lines.append(f"{number}. {frame.filename}:{frame.lineno}: {stat.size / 1024:.1f} KiB, блоков: {stat.count}")
+    return "\n".join(lines)
@@ -0,0 +1,7 @@
+# Типы запросов сервиса (src.server) и пакетного запуска (src.cli) и параметры, которые они принимают.
+# Модуль без зависимостей: src.cli проверяет запросы до загрузки pandas и операций
+QUERY_TYPES = {
+    "events": ("date", "period"),
+    "search": ("search",),
+    "report": ("category", "date"),
+}
@@ -0,0 +1,323 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+from src.lazy_imports import lazy_import, lazy_subclass
+
+requests = lazy_import("requests")
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты запросов: интерактивные (get_events и т.п.) и фоновые пакетные задачи
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("market_data_priority", default=INTERACTIVE)
+
+# Файл SQLite по умолчанию, через который процессы на одной машине делят квоту
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "analysis_banking_operation_rate_limit.sqlite3")
+
+
+def _rate_limit_exceeded() -> type:
+    """
+    RateLimitExceeded(requests.exceptions.RequestException): квота запросов к провайдеру не освободится
+    за допустимое время ожидания. Класс создаётся при первом обращении, чтобы импорт модуля не загружал requests
+    """
+    return lazy_subclass(
+        globals(),
+        "RateLimitExceeded",
+        lambda: requests.exceptions.RequestException,
+        "Квота запросов к провайдеру не освободится за допустимое время ожидания",
+    )
+
+
+def __getattr__(name: str) -> Any:
+    if name == "RateLimitExceeded":
+        return _rate_limit_exceeded()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@contextlib.contextmanager
+def batch_priority() -> Iterator[None]:
+    """Контекст, в котором запросы к провайдерам выполняются с пакетным (низким) приоритетом"""
+    token = _priority.set(BATCH)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    """Возвращает приоритет запросов в текущем контексте"""
+    return _priority.get()
+
+
+class SharedTokenBucket:
+    """
+    Token bucket, общий для всех процессов машины: состояние хранится в SQLite, а изменения
+    выполняются в транзакции BEGIN IMMEDIATE, то есть под файловой блокировкой базы.
+
+    Принимает:
+        name (str): Имя квоты (обычно имя провайдера)
+        rate (float): Скорость пополнения в запросах в секунду
+        capacity (float): Ёмкость - сколько запросов можно выполнить подряд
+        db_path (str): Путь к файлу SQLite
+        batch_reserve (float): Доля ёмкости, которую пакетные запросы оставляют интерактивным
+
+    Особенности:
+        - Пакетный запрос получает токен, только если после него в ведре останется резерв,
+          поэтому интерактивные запросы не ждут, пока пакетная задача выберет всю квоту
+    """
+
+    def __init__(
+        self, name: str, rate: float, capacity: float, db_path: str = DEFAULT_DB_PATH, batch_reserve: float = 0.2
+    ) -> None:
+        if rate <= 0 or capacity < 1:
+            logger.critical("Ошибка: Неверная квота %s: скорость %s, ёмкость %s", name, rate, capacity)
+            raise ValueError("Скорость квоты должна быть больше 0, а ёмкость - не меньше 1")
+
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.db_path = db_path
+        self.reserve = capacity * batch_reserve
+        self._local = threading.local()
+
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (name, capacity, time.time()),
+            )
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Открывает транзакцию с эксклюзивной блокировкой записи на базу квот"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def try_acquire(self, priority: Optional[str] = None) -> float:
+        """
+        Пытается взять токен.
+
+        Возвращает:
+            float: 0, если токен получен, иначе примерное время в секундах до появления токена
+        """
+        required = 1.0 if (priority or current_priority()) == INTERACTIVE else 1.0 + self.reserve
+
+        with self._transaction() as connection:
+            tokens, updated = connection.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+            now = time.time()
+            tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+
+            if tokens >= required:
+                connection.execute(
+                    "UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens - 1, now, self.name)
+                )
+                return 0.0
+
+            connection.execute("UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens, now, self.name))
+            return (required - tokens) / self.rate
+
+    def acquire(self, priority: Optional[str] = None, max_wait: Optional[float] = None) -> None:
+        """
+        Берёт токен, при необходимости ожидая пополнения ведра.
+
+        Исключения:
+            RateLimitExceeded: Если токен не появится за max_wait секунд
+        """
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire(priority)
+            if wait == 0:
+                return
+            self._check_deadline(wait, deadline)
+            time.sleep(wait)
+
+    async def acquire_async(self, priority: Optional[str] = None, max_wait: Optional[float] = None) -> None:
+        """
+        Асинхронный аналог acquire: ожидание не блокирует цикл событий.
+
+        Транзакция SQLite может ждать блокировку базы, пока её держит другой процесс,
+        поэтому try_acquire выполняется в пуле потоков цикла событий.
+        """
+        loop = asyncio.get_running_loop()
+        # Приоритет берётся из контекста корутины: в потоке пула контекст другой
+        priority = priority or current_priority()
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = await loop.run_in_executor(None, self.try_acquire, priority)
+            if wait == 0:
+                return
+            self._check_deadline(wait, deadline)
+            await asyncio.sleep(wait)
+
+    def _check_deadline(self, wait: float, deadline: Optional[float]) -> None:
+        if deadline is not None and time.monotonic() + wait > deadline:
+            logger.warning("Квота %s исчерпана", self.name)
+            raise _rate_limit_exceeded()(f"Квота запросов к {self.name} исчерпана")
+
+    def drain(self) -> None:
+        """Обнуляет ведро, например, когда провайдер уже ответил 429: все процессы подождут пополнения"""
+        with self._transaction() as connection:
+            connection.execute("UPDATE buckets SET tokens = 0, updated = ? WHERE name = ?", (time.time(), self.name))
+
+
+class RequestCoalescer:
+    """
+    Объединяет одинаковые одновременные запросы внутри процесса: первый вызов с ключом выполняет
+    функцию, остальные ждут и получают тот же результат или то же исключение.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, Future] = {}
+        self._async_in_flight: dict[Hashable, asyncio.Future] = {}
+
+    def run(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Выполняет func или присоединяется к уже выполняющемуся запросу с тем же ключом"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    async def run_async(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Асинхронный аналог run для корутинных функций одного цикла событий"""
+        task = self._async_in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._async_in_flight[key] = task
+            task.add_done_callback(lambda _: self._async_in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+
+def _parse_quota(variable: str, quota: str) -> tuple[float, float]:
+    """Разбирает квоту "запросов/секунд" из переменной окружения variable"""
+    try:
+        count, seconds = (float(value) for value in quota.split("/"))
+    except ValueError:
+        logger.critical("Ошибка: Неверная квота %s=%s", variable, quota)
+        raise ValueError(f'Квота {variable} должна быть задана в виде "запросов/секунд", например "10/60": {quota}')
+    if not (count >= 1 and seconds > 0):
+        logger.critical("Ошибка: Неверная квота %s=%s", variable, quota)
+        raise ValueError(f"В квоте {variable} запросов должно быть не меньше 1, а секунд - больше 0: {quota}")
+    return count, seconds
+
+
+class RateLimitScheduler:
+    """
+    Планировщик запросов к провайдерам с общей квотой.
+
+    Объединяет одинаковые одновременные запросы, берёт токен из квоты провайдера с учётом приоритета
+    и при ответе 429 обнуляет квоту и повторяет запрос после её пополнения.
+
+    Принимает:
+        buckets (dict[str, SharedTokenBucket]): Квоты по имени провайдера. Для провайдеров без квоты
+                                                запросы выполняются без ограничений
+        max_wait (Optional[float]): Максимальное ожидание токена в секундах
+        max_retries (int): Число повторов после ответа 429
+    """
+
+    def __init__(
+        self, buckets: dict[str, SharedTokenBucket], max_wait: Optional[float] = None, max_retries: int = 2
+    ) -> None:
+        self.buckets = buckets
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.coalescer = RequestCoalescer()
+
+    @classmethod
+    def from_env(cls) -> Optional["RateLimitScheduler"]:
+        """
+        Создаёт планировщик по переменным окружения или возвращает None, если квоты не заданы.
+
+        Переменные:
+            CURRENCY_DATA_RATE_LIMIT, MARKETSTACK_RATE_LIMIT: квота в виде "запросов/секунд", например "10/60"
+            MARKET_DATA_RATE_LIMIT_DB: путь к общему файлу SQLite (по умолчанию во временной директории)
+
+        Исключения:
+            ValueError: Если квота задана не в виде "запросов/секунд" с числами больше 0 (запросов - не меньше 1)
+        """
+        db_path = os.getenv("MARKET_DATA_RATE_LIMIT_DB", DEFAULT_DB_PATH)
+        buckets = {}
+        variables = {"currency_data": "CURRENCY_DATA_RATE_LIMIT", "marketstack": "MARKETSTACK_RATE_LIMIT"}
+        for provider, variable in variables.items():
+            quota = os.getenv(variable)
+            if quota:
+                count, seconds = _parse_quota(variable, quota)
+                buckets[provider] = SharedTokenBucket(provider, count / seconds, count, db_path)
+
+        return cls(buckets) if buckets else None
+
+    def call(self, provider: str, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Выполняет запрос func к провайдеру в рамках квоты. Одинаковые ключи объединяются"""
+        return self.coalescer.run((provider, key), lambda: self._call_with_quota(provider, func))
+
+    def _call_with_quota(self, provider: str, func: Callable[[], Any]) -> Any:
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return func()
+
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire(max_wait=self.max_wait)
+            response = func()
+            if getattr(response, "status_code", None) != 429 or attempt == self.max_retries:
+                return response
+            logger.warning("Провайдер %s ответил 429, квота обнулена", provider)
+            bucket.drain()
+        return response
+
+    async def call_async(self, provider: str, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Асинхронный аналог call для корутинных функций"""
+        return await self.coalescer.run_async((provider, key), lambda: self._call_with_quota_async(provider, func))
+
+    async def _call_with_quota_async(self, provider: str, func: Callable[[], Any]) -> Any:
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return await func()
+
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire_async(max_wait=self.max_wait)
+            response = await func()
+            if getattr(response, "status_code", None) != 429 or attempt == self.max_retries:
+                return response
+            logger.warning("Провайдер %s ответил 429, квота обнулена", provider)
+            await asyncio.get_running_loop().run_in_executor(None, bucket.drain)
+        return response
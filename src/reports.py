@@ -1,20 +1,23 @@
 import datetime
-import json
 import logging
 from typing import Optional
 
 import pandas as pd
 
+from src.metrics import record_rows, span, timed
+from src.serialization import dumps
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-stream_handler = logging.StreamHandler()
-stream_formatter = logging.Formatter("%(asctime)s %(filename)s %(funcName)s %(levelname)s: %(message)s")
-stream_handler.setFormatter(stream_formatter)
-logger.addHandler(stream_handler)
 
 
-def get_expenses_for_3_months_by_category(operation: pd.DataFrame, category: str, date: Optional[str] = None) -> str:
-    """Функция возвращает траты по указанной категории за последние 3 месяца в формате JSON.
+@timed("reports.get_expenses_for_3_months_by_category")
+def get_expenses_for_3_months_by_category_frame(
+    operation: pd.DataFrame, category: str, date: Optional[str] = None
+) -> pd.DataFrame:
+    """Функция возвращает траты по указанной категории за последние 3 месяца в виде DataFrame.
+
+    Результат get_expenses_for_3_months_by_category до сериализации в JSON: используется для экспорта
+    в Arrow (src.arrow_export) без разбора JSON-строки.
 
     Принимает:
         operation (pd.DataFrame): DataFrame с транзакциями, должен содержать колонки:
@@ -24,7 +27,8 @@ def get_expenses_for_3_months_by_category(operation: pd.DataFrame, category: str
                                       используется текущая дата. Defaults to None.
 
     Возвращает:
-        str: JSON-строка с результатами агрегации или пустой список, если транзакции не найдены
+        pd.DataFrame: Колонки 'Категория' и 'Сумма операции с округлением' (одна строка)
+                      или пустой DataFrame, если транзакции не найдены
 
     Исключения:
         ValueError: Если не переданы транзакции или категория, или если дата в неверном формате
@@ -35,7 +39,7 @@ def get_expenses_for_3_months_by_category(operation: pd.DataFrame, category: str
         logger.critical("Ошибка: Не переданы транзакции")
         raise ValueError("Транзакции не переданы")
     elif not isinstance(operation, pd.DataFrame):
-        logger.critical(f"Ошибка: Транзакции переданы в типе {type(operation)}")
+        logger.critical("Ошибка: Транзакции переданы в типе %s", type(operation))
         raise TypeError("Транзакции должны быть переданы в виде pandas DataFrame")
 
     # Валидация категории: проверка наличия и типа
@@ -43,7 +47,7 @@ def get_expenses_for_3_months_by_category(operation: pd.DataFrame, category: str
         logger.critical("Ошибка: Категория не передана")
         raise ValueError("Категория не передана")
     elif not isinstance(category, str):
-        logger.critical(f"Ошибка: Категория передана в типе {type(category)}")
+        logger.critical("Ошибка: Категория передана в типе %s", type(category))
         raise TypeError("Категория должна быть передана в виде str")
 
     # Обработка даты: если не указана - берем текущую, иначе парсим строку
@@ -53,12 +57,15 @@ def get_expenses_for_3_months_by_category(operation: pd.DataFrame, category: str
         try:
             date_obj = datetime.datetime.strptime(date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
         except ValueError:
-            logger.critical(f"Ошибка: Дата ({date, type(date)}) не конвертируется в datetime")
+            logger.critical("Ошибка: Дата %s (тип %s) не конвертируется в datetime", date, type(date))
             raise ValueError("Дата указана неверно. Маска: YYYY-MM-DD")
 
-    # Конвертируем колонку с датами в datetime, если это еще не сделано
-    if not pd.api.types.is_datetime64_dtype(operation["Дата операции"]):
-        operation["Дата операции"] = pd.to_datetime(operation["Дата операции"], dayfirst=True)
+    # Конвертируем даты в datetime, если это еще не сделано. Переданный DataFrame не изменяется
+    dates: pd.Series = operation["Дата операции"]
+    if not pd.api.types.is_datetime64_dtype(dates):
+        with span("reports.convert_dates"):
+            dates = pd.to_datetime(dates, dayfirst=True)
+    record_rows("reports.get_expenses_for_3_months_by_category", len(operation))
 
     # Нормализуем категорию (удаляем пробелы и приводим к стандартному виду)
     normalize_category: str = category.strip().capitalize()
@@ -71,17 +78,33 @@ def get_expenses_for_3_months_by_category(operation: pd.DataFrame, category: str
     # - соответствию указанной категории
     # - попаданию в временной диапазон (последние 3 месяца)
     filtered_operation = operation.loc[
-        (operation["Дата операции"].notnull())
+        (dates.notnull())
         & (operation["Категория"].notnull())
         & (operation["Категория"] == normalize_category)
-        & (operation["Дата операции"] >= start_date)
-        & (operation["Дата операции"] <= date_obj)
+        & (dates >= start_date)
+        & (dates <= date_obj)
     ]
 
-    # Если найдены подходящие транзакции - группируем по категории и суммируем суммы
-    if len(filtered_operation) != 0:
-        grouped_operation = filtered_operation.groupby("Категория")["Сумма операции с округлением"].sum().reset_index()
-        return json.dumps(grouped_operation.to_dict(orient="records"), ensure_ascii=False, indent=4)
-    else:
-        # Если транзакций не найдено - возвращаем пустой список в JSON
-        return json.dumps([], ensure_ascii=False, indent=4)
+    # Группируем подходящие транзакции по категории и суммируем суммы
+    # (если транзакций не найдено - пустой DataFrame)
+    return filtered_operation.groupby("Категория", observed=True)["Сумма операции с округлением"].sum().reset_index()
+
+
+def get_expenses_for_3_months_by_category(operation: pd.DataFrame, category: str, date: Optional[str] = None) -> str:
+    """Функция возвращает траты по указанной категории за последние 3 месяца в формате JSON.
+
+    Принимает:
+        operation (pd.DataFrame): DataFrame с транзакциями, должен содержать колонки:
+                                 'Дата операции', 'Категория', 'Сумма операции с округлением'
+        category (str): Название категории для фильтрации транзакций
+        date (Optional[str], optional): Дата в формате YYYY-MM-DD. Если не указана,
+                                      используется текущая дата. Defaults to None.
+
+    Возвращает:
+        str: JSON-строка с результатами агрегации или пустой список, если транзакции не найдены
+
+    Исключения:
+        ValueError: Если не переданы транзакции или категория, или если дата в неверном формате
+        TypeError: Если переданы аргументы неверного типа
+    """
+    return dumps(get_expenses_for_3_months_by_category_frame(operation, category, date).to_dict(orient="records"))
@@ -0,0 +1,158 @@
+import datetime
+import json
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+from src.env import load_env
+from src.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Форматы вывода: "pretty" - отступ 4 пробела (формат по умолчанию), "compact" - одна строка без пробелов
+OUTPUT_FORMATS = ("pretty", "compact")
+
+# Библиотеки для компактного вывода: "auto" - orjson, если установлен, иначе json
+JSON_BACKENDS = ("auto", "orjson", "json")
+
+# Формат вывода публичных функций. Переопределяется переменной окружения JSON_OUTPUT_FORMAT (в том числе в .env)
+# или set_output_format
+output_format: str = "pretty"
+
+# Библиотека компактного вывода. Переопределяется переменной окружения JSON_BACKEND или set_json_backend
+json_backend: str = "auto"
+
+# Переменные окружения читаются при первом выводе (см. _load_settings), после загрузки .env
+_settings_loaded = False
+_settings_lock = threading.Lock()
+
+# Модуль orjson после первой попытки импорта (False - недоступен или отключён)
+_orjson: Any = None
+
+
+def _load_settings() -> None:
+    """Загружает .env и читает JSON_OUTPUT_FORMAT и JSON_BACKEND. Выполняется один раз"""
+    global output_format, json_backend, _settings_loaded
+    if _settings_loaded:
+        return
+    load_env()
+    with _settings_lock:
+        if _settings_loaded:
+            return
+        output_format = os.getenv("JSON_OUTPUT_FORMAT", "pretty")
+        if output_format not in OUTPUT_FORMATS:
+            logger.warning("Неизвестный формат JSON_OUTPUT_FORMAT=%s, используется pretty", output_format)
+            output_format = "pretty"
+        json_backend = os.getenv("JSON_BACKEND", "auto")
+        if json_backend not in JSON_BACKENDS:
+            logger.warning("Неизвестная библиотека JSON_BACKEND=%s, используется auto", json_backend)
+            json_backend = "auto"
+        _settings_loaded = True
+
+
+def set_output_format(value: str) -> None:
+    """
+    Устанавливает формат вывода функций, возвращающих JSON-строки.
+
+    Исключения:
+        ValueError: Если формат не "pretty" и не "compact"
+    """
+    global output_format
+    _load_settings()
+    if value not in OUTPUT_FORMATS:
+        logger.critical("Ошибка: Неизвестный формат вывода %s", value)
+        raise ValueError(f"Формат вывода должен быть одним из: {', '.join(OUTPUT_FORMATS)}")
+    output_format = value
+
+
+def set_json_backend(value: str) -> None:
+    """
+    Выбирает библиотеку для компактного вывода: "auto", "orjson" или "json".
+
+    Исключения:
+        ValueError: Если библиотека неизвестна
+    """
+    global json_backend, _orjson
+    _load_settings()
+    if value not in JSON_BACKENDS:
+        logger.critical("Ошибка: Неизвестная библиотека JSON %s", value)
+        raise ValueError(f"Библиотека JSON должна быть одной из: {', '.join(JSON_BACKENDS)}")
+    json_backend = value
+    _orjson = None
+
+
+def _load_orjson() -> Any:
+    """Импортирует orjson при первом компактном выводе. Возвращает модуль или None"""
+    global _orjson
+    _load_settings()
+    if _orjson is None:
+        _orjson = False
+        if json_backend != "json":
+            try:
+                import orjson
+
+                _orjson = orjson
+            except ImportError:
+                if json_backend == "orjson":
+                    logger.warning("orjson не установлен, для компактного вывода используется json")
+    return _orjson or None
+
+
+def get_json_backend() -> str:
+    """Возвращает библиотеку, которая используется для компактного вывода: "orjson" или "json" """
+    return "orjson" if _load_orjson() is not None else "json"
+
+
+def _default(value: Any) -> Any:
+    """
+    Приводит значения numpy, pandas и datetime к типам JSON.
+
+    Даты и время - строки ISO 8601, скаляры numpy - числа и bool, массивы - списки, NaT и pd.NA - null.
+    numpy и pandas не импортируются: типы определяются по атрибутам значений.
+    """
+    type_name = type(value).__name__
+    if type_name in ("NaTType", "NAType"):
+        return None
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if type_name == "datetime64":
+        # Наносекунды не переводятся в datetime: приводим к микросекундам
+        value = value.astype("datetime64[us]").item()
+        return None if value is None else value.isoformat()
+    if type_name == "ndarray" or type_name == "Series":
+        return value.tolist()
+    if hasattr(value, "item") and type(value).__module__ == "numpy":
+        return value.item()
+    raise TypeError(f"Object of type {type_name} is not JSON serializable")
+
+
+def dumps(value: Any, pretty: Optional[bool] = None) -> str:
+    """
+    Сериализует результат публичной функции в JSON-строку.
+
+    Принимает:
+        value (Any): Словари, списки, строки, числа, а также значения numpy, pandas и datetime
+        pretty (Optional[bool]): True - отступ 4 пробела, False - компактная строка.
+                                 По умолчанию - output_format
+
+    Возвращает:
+        str: JSON-строка, символы кириллицы не экранируются
+
+    Особенности:
+        - Формат pretty совпадает с json.dumps(value, ensure_ascii=False, indent=4)
+        - Компактный вывод использует orjson, если он установлен (в разы быстрее json). NaN orjson
+          записывает как null, json - как NaN
+    """
+    if pretty is None:
+        _load_settings()
+        pretty = output_format == "pretty"
+    with span("serialization.dumps", format="pretty" if pretty else "compact"):
+        if pretty:
+            return json.dumps(value, ensure_ascii=False, indent=4, default=_default)
+
+        orjson = _load_orjson()
+        if orjson is not None:
+            options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            return orjson.dumps(value, default=_default, option=options).decode("utf-8")
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default)
@@ -0,0 +1,555 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, NamedTuple, Optional
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from src.data import PreparedOperations, prepare_operations
+from src.env import load_env
+from src.metrics import metrics_json, metrics_prometheus, record_rows, set_metrics_enabled, span
+from src.profiling import PROFILE_MODES, profile_label, profiled, set_profile_mode
+from src.query_types import QUERY_TYPES
+from src.reports import get_expenses_for_3_months_by_category_frame
+from src.serialization import dumps, set_output_format
+from src.services import find_transactions_by_search_str
+from src.shared_data import SharedOperations, attach_operations, publish_operations
+from src.views import get_events_dict
+
+logger = logging.getLogger(__name__)
+
+# Файл операций по умолчанию. Переопределяется переменной окружения OPERATIONS_PATH
+DEFAULT_OPERATIONS_PATH = os.getenv(
+    "OPERATIONS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "operations.xlsx"),
+)
+
+# Тип ответа /metrics в текстовом формате Prometheus
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class DatasetSnapshot(NamedTuple):
+    """Загруженные операции в виде, готовом для всех эндпоинтов сервиса"""
+
+    operations: PreparedOperations  # Для get_events и get_expenses_for_3_months_by_category
+    records: list[dict]  # Для filter_transaction_by_search_str, в исходном порядке файла
+    loaded_at: float
+
+    def search_records(self, search_str: str) -> list[dict]:
+        """Возвращает результат find_transactions_by_search_str по загруженным операциям"""
+        return find_transactions_by_search_str(self.records, search_str)
+
+    def search(self, search_str: str) -> str:
+        """Возвращает результат filter_transaction_by_search_str по загруженным операциям"""
+        return dumps(self.search_records(search_str))
+
+
+# Эндпоинты сервиса для типов запросов
+_QUERY_PATHS = {"/events": "events", "/transactions": "search", "/reports/expenses": "report"}
+
+
+def run_query_dict(snapshot: Any, query_type: str, params: dict) -> Any:
+    """
+    Выполняет запрос к загруженным операциям и возвращает результат до сериализации в JSON.
+
+    Используется пакетным запуском (src.cli), который сам сериализует результаты всех запросов.
+
+    Принимает:
+        snapshot (Any): DatasetSnapshot или SharedOperations
+        query_type (str): Тип запроса из QUERY_TYPES: "events" (get_events),
+                          "search" (filter_transaction_by_search_str), "report" (get_expenses_for_3_months_by_category)
+        params (dict): Параметры запроса (date, period, search, category)
+
+    Возвращает:
+        Any: Результат функции: словарь get_events_dict или список записей для search и report
+
+    Исключения:
+        ValueError: Если тип запроса неизвестен или параметры неверны
+        TypeError: Если параметры переданы в неверном типе
+    """
+    if query_type == "events":
+        return get_events_dict(snapshot.operations, params.get("date"), params.get("period", "M"))
+    if query_type == "search":
+        return snapshot.search_records(params.get("search"))
+    if query_type == "report":
+        return get_expenses_for_3_months_by_category_frame(
+            snapshot.operations.frame, params.get("category"), params.get("date")
+        ).to_dict(orient="records")
+    logger.critical("Ошибка: Неизвестный тип запроса %s", query_type)
+    raise ValueError(f"Тип запроса должен быть одним из: {', '.join(QUERY_TYPES)}")
+
+
+def run_query(snapshot: Any, query_type: str, params: dict) -> str:
+    """
+    Выполняет запрос к загруженным операциям.
+
+    Результат run_query_dict, сериализованный src.serialization.dumps (аргументы и исключения - те же).
+
+    Возвращает:
+        str: Результат функции в виде JSON-строки
+    """
+    return dumps(run_query_dict(snapshot, query_type, params))
+
+
+class OperationsDataset:
+    """
+    Операции из файла, загруженные и подготовленные один раз и перечитываемые при изменении файла.
+
+    Принимает:
+        path (str): Путь к файлу операций
+        loader (Callable[[str], pd.DataFrame]): Функция чтения файла. По умолчанию pd.read_excel
+        check_interval (float): Интервал проверки изменения файла фоновым потоком в секундах
+
+    Особенности:
+        - Новый файл полностью загружается и подготавливается до замены текущего снимка,
+          поэтому запрос всегда работает с целым снимком: старым или новым
+        - Если новый файл не читается, сервис продолжает работать с прежними операциями
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_OPERATIONS_PATH,
+        loader: Callable[[str], pd.DataFrame] = pd.read_excel,
+        check_interval: float = 5.0,
+    ) -> None:
+        self.path = path
+        self.loader = loader
+        self.check_interval = check_interval
+        self._reload_lock = threading.Lock()
+        self._snapshot: Optional[Any] = None
+        self._loaded_signature: Optional[tuple[int, int]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _signature(self) -> tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self) -> Any:
+        """Возвращает текущий снимок операций, загружая файл при первом обращении"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.reload_if_changed()
+            snapshot = self._snapshot
+        return snapshot
+
+    def reload_if_changed(self) -> bool:
+        """
+        Перечитывает файл, если он изменился с последней загрузки.
+
+        Возвращает:
+            bool: True, если снимок операций заменён
+
+        Исключения:
+            FileNotFoundError: Если файл не найден при первой загрузке
+        """
+        with self._reload_lock:
+            try:
+                signature = self._signature()
+                if self._snapshot is not None and self._loaded_signature == signature:
+                    return False
+
+                started = time.perf_counter()
+                with span("server.load_operations"):
+                    frame = self.loader(self.path)
+                record_rows("server.load_operations", len(frame))
+                snapshot = self._build(frame)
+            except (OSError, ValueError, zipfile.BadZipFile) as e:
+                # Файл мог быть прочитан во время записи: повторная попытка - при следующей проверке
+                if self._snapshot is None:
+                    logger.critical("Ошибка: Не удалось загрузить операции из %s", self.path)
+                    raise
+                logger.warning("Операции из %s не перечитаны, используются прежние: %s", self.path, e)
+                return False
+
+            # Замена ссылки атомарна: запросы, начатые раньше, дорабатывают со старым снимком
+            self._snapshot = snapshot
+            self._loaded_signature = signature
+            self._on_replaced()
+            logger.info(
+                "Загружено %s операций из %s за %.2f с",
+                len(snapshot.operations),
+                self.path,
+                time.perf_counter() - started,
+            )
+            return True
+
+    def _build(self, frame: pd.DataFrame) -> DatasetSnapshot:
+        """Готовит снимок операций из загруженного файла"""
+        return DatasetSnapshot(prepare_operations(frame), frame.to_dict(orient="records"), time.time())
+
+    def _on_replaced(self) -> None:
+        """Вызывается после замены снимка"""
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.reload_if_changed()
+            except Exception:
+                # Любая ошибка загрузки (например, KeyError из prepare_operations для файла без нужных колонок)
+                # не должна останавливать проверку: сервис отвечает по прежнему снимку
+                logger.exception("Операции из %s не перечитаны, используются прежние", self.path)
+
+    def start_watching(self) -> None:
+        """Запускает фоновую проверку изменения файла"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="operations-reload", daemon=True)
+        self._thread.start()
+
+    def stop_watching(self) -> None:
+        """Останавливает фоновую проверку"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class SharedOperationsDataset(OperationsDataset):
+    """
+    Операции из файла в shared memory для процессов-обработчиков PreforkOperationsServer.
+
+    Каждая загрузка файла размещается в новом блоке <prefix>_<поколение> (publish_operations), а номер
+    текущего поколения публикуется в общей для процессов переменной generation. Блок предыдущего поколения
+    удаляется только после публикации следующего, чтобы обработчики успели переключиться.
+
+    Принимает те же аргументы, что OperationsDataset.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_OPERATIONS_PATH,
+        loader: Callable[[str], pd.DataFrame] = pd.read_excel,
+        check_interval: float = 5.0,
+    ) -> None:
+        super().__init__(path, loader, check_interval)
+        self.prefix = f"abo_{os.getpid()}_{id(self) % 10_000}"
+        self.generation = multiprocessing.Value("q", 0)
+        self._blocks: list[SharedOperations] = []
+
+    def _build(self, frame: pd.DataFrame) -> SharedOperations:
+        block = publish_operations(frame, f"{self.prefix}_{len(self._blocks) + 1}")
+        self._blocks.append(block)
+        return block
+
+    def _on_replaced(self) -> None:
+        self.generation.value = len(self._blocks)
+        # Блоки старше предыдущего поколения обработчикам уже не нужны
+        for block in self._blocks[:-2]:
+            if block.operations is not None:
+                block.close()
+                block.unlink()
+
+    def close(self) -> None:
+        """Удаляет все блоки операций"""
+        for block in self._blocks:
+            if block.operations is not None:
+                block.close()
+                block.unlink()
+
+
+class AttachedOperationsDataset:
+    """
+    Операции процесса-обработчика: подключение к текущему блоку SharedOperationsDataset без копирования.
+
+    Принимает:
+        prefix (str): Префикс имён блоков (SharedOperationsDataset.prefix)
+        generation (multiprocessing.Value): Номер текущего поколения (SharedOperationsDataset.generation)
+    """
+
+    def __init__(self, prefix: str, generation: Any) -> None:
+        self.prefix = prefix
+        self.generation = generation
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._attached: list[SharedOperations] = []
+
+    def get(self) -> SharedOperations:
+        """Возвращает операции текущего поколения, переподключаясь к новому блоку после перезагрузки файла"""
+        generation = self.generation.value
+        if generation != self._generation:
+            with self._lock:
+                if generation != self._generation:
+                    self._attached.append(attach_operations(f"{self.prefix}_{generation}"))
+                    self._generation = generation
+                    # Запросы, начатые до переключения, могут ещё работать с предыдущим блоком
+                    for block in self._attached[:-2]:
+                        block.close()
+                    self._attached = self._attached[-2:]
+        return self._attached[-1]
+
+    def start_watching(self) -> None:
+        """Файл проверяет родительский процесс"""
+
+    def stop_watching(self) -> None:
+        """Файл проверяет родительский процесс"""
+
+
+class OperationsServer:
+    """
+    Локальный HTTP-сервис, отвечающий на запросы к загруженным один раз операциям.
+
+    Эндпоинты (ответ - JSON тех же функций, что вызывает src.main):
+        - GET /events?date=YYYY-MM-DD&period=M - get_events
+        - GET /transactions?search=строка - filter_transaction_by_search_str
+        - GET /reports/expenses?category=...&date=YYYY-MM-DD - get_expenses_for_3_months_by_category
+        - GET /health - число операций и время загрузки файла
+
+    Принимает:
+        dataset (OperationsDataset): Операции сервиса
+        host (str): Адрес для прослушивания
+        port (int): Порт. 0 - выбрать свободный порт
+        sock (Optional[socket.socket]): Уже открытый слушающий сокет (вместо host и port)
+
+    Особенности:
+        - Обрабатывает запросы конкурентно (ThreadingHTTPServer)
+        - Неверные параметры запроса возвращаются с кодом 400
+        - Используется как контекстный менеджер: при входе запускается в фоновом потоке
+    """
+
+    def __init__(
+        self,
+        dataset: Any,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        sock: Optional[socket.socket] = None,
+    ) -> None:
+        self.dataset = dataset
+        if sock is None:
+            self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        else:
+            self._httpd = ThreadingHTTPServer(sock.getsockname(), self._make_handler(), bind_and_activate=False)
+            self._httpd.socket = sock
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Базовый URL сервиса"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "OperationsServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Загружает операции и запускает сервис в фоновом потоке"""
+        self.dataset.get()
+        self.dataset.start_watching()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="operations-server", daemon=True)
+        self._thread.start()
+        logger.info("Сервис операций запущен: %s", self.url)
+
+    def serve_forever(self) -> None:
+        """Загружает операции и запускает сервис в текущем потоке до прерывания"""
+        self.dataset.get()
+        self.dataset.start_watching()
+        logger.info("Сервис операций запущен: %s", self.url)
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        """Останавливает сервис и фоновую проверку файла, освобождает порт"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self.dataset.stop_watching()
+        if self._thread is not None:
+            self._thread.join()
+
+    def handle(self, path: str, query: dict[str, list[str]]) -> tuple[int, str]:
+        """Формирует код и тело ответа (JSON-строку, для /metrics - текст Prometheus) на запрос"""
+        params = {key: values[0] for key, values in query.items()}
+        if path == "/metrics":
+            return 200, metrics_json() if params.get("format") == "json" else metrics_prometheus()
+
+        snapshot = self.dataset.get()
+
+        if path in _QUERY_PATHS:
+            try:
+                with profiled(profile_label(_QUERY_PATHS[path], params)):
+                    return 200, run_query(snapshot, _QUERY_PATHS[path], params)
+            except (ValueError, TypeError) as e:
+                return 400, dumps({"message": str(e)})
+            except Exception:
+                # Ошибка сервиса (провайдер, кэш) - ответ в том же формате, подробности только в журнале
+                logger.exception("Ошибка при обработке запроса %s", path)
+                return 500, dumps({"message": "Internal Server Error"})
+
+        if path == "/health":
+            return 200, dumps({"operations": len(snapshot.operations), "loaded_at": snapshot.loaded_at})
+        return 404, dumps({"message": "Not Found"})
+
+    def _make_handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                status, body = server.handle(parsed.path, query)
+                payload = body.encode()
+                content_type = "application/json; charset=utf-8"
+                if parsed.path == "/metrics" and query.get("format") != ["json"]:
+                    content_type = PROMETHEUS_CONTENT_TYPE
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(format, *args)
+
+        return Handler
+
+
+def _serve_worker(sock: socket.socket, prefix: str, generation: Any) -> None:
+    """Процесс-обработчик PreforkOperationsServer"""
+    OperationsServer(AttachedOperationsDataset(prefix, generation), sock=sock).serve_forever()
+
+
+class PreforkOperationsServer:
+    """
+    Сервис операций из нескольких процессов-обработчиков, общих слушающего сокета и данных в shared memory.
+
+    Родительский процесс загружает файл и размещает подготовленные операции в shared memory, затем
+    запускает workers процессов OperationsServer на одном сокете. Обработчики подключаются к данным
+    без копирования и отвечают на запросы параллельно, без общей GIL.
+
+    Принимает:
+        dataset (SharedOperationsDataset): Операции сервиса
+        host (str): Адрес для прослушивания
+        port (int): Порт. 0 - выбрать свободный порт
+        workers (int): Число процессов-обработчиков. По умолчанию - число ядер
+
+    Особенности:
+        - Процессы создаются через fork (Linux, macOS)
+        - Файл операций проверяет родительский процесс, обработчики переключаются на новый блок
+          при следующем запросе
+        - Используется как контекстный менеджер
+    """
+
+    def __init__(
+        self,
+        dataset: SharedOperationsDataset,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        workers: Optional[int] = None,
+    ) -> None:
+        self.dataset = dataset
+        self.workers = workers or os.cpu_count() or 1
+        self._socket = socket.create_server((host, port))
+        self._processes: list[multiprocessing.Process] = []
+
+    @property
+    def url(self) -> str:
+        """Базовый URL сервиса"""
+        host, port = self._socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "PreforkOperationsServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Загружает операции в shared memory и запускает процессы-обработчики"""
+        self.dataset.get()
+        self.dataset.start_watching()
+        context = multiprocessing.get_context("fork")
+        for i in range(self.workers):
+            process = context.Process(
+                target=_serve_worker,
+                args=(self._socket, self.dataset.prefix, self.dataset.generation),
+                name=f"operations-worker-{i}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info("Сервис операций запущен: %s, процессов: %s", self.url, self.workers)
+
+    def serve_forever(self) -> None:
+        """Запускает сервис и ждёт завершения процессов-обработчиков"""
+        self.start()
+        for process in self._processes:
+            process.join()
+
+    def stop(self) -> None:
+        """Останавливает обработчики и фоновую проверку файла, удаляет данные из shared memory"""
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join()
+        self._processes = []
+        self.dataset.stop_watching()
+        self.dataset.close()
+        self._socket.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Запускает сервис из командной строки: python -m src.server --port 8000"""
+    parser = argparse.ArgumentParser(description="HTTP-сервис анализа банковских операций")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--data", default=DEFAULT_OPERATIONS_PATH, help="Путь к файлу операций (.xlsx)")
+    parser.add_argument(
+        "--reload-interval", type=float, default=5.0, help="Интервал проверки изменения файла в секундах"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Число процессов-обработчиков с общими данными в shared memory"
+    )
+    parser.add_argument("--compact", action="store_true", help="Компактный JSON в ответах (orjson, если установлен)")
+    parser.add_argument(
+        "--metrics", action="store_true", help="Собирать время этапов и счётчики для эндпоинта /metrics"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Профиль каждого запроса: cpu - cProfile (.prof), memory - tracemalloc (.collapsed)",
+    )
+    parser.add_argument("--profile-dir", default=None, help="Директория файлов профилей. По умолчанию profiles")
+    args = parser.parse_args(argv)
+    # .env загружается после разбора аргументов (--help его не читает), до настроек журнала и вывода
+    load_env()
+
+    if args.compact:
+        set_output_format("compact")
+    if args.metrics:
+        set_metrics_enabled(True)
+    if args.profile is not None:
+        set_profile_mode(args.profile, args.profile_dir)
+
+    if args.workers > 1:
+        server = PreforkOperationsServer(
+            SharedOperationsDataset(args.data, check_interval=args.reload_interval),
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+        )
+    else:
+        server = OperationsServer(
+            OperationsDataset(args.data, check_interval=args.reload_interval), host=args.host, port=args.port
+        )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
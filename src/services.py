@@ -1,75 +1,99 @@
-import json
 import logging
 
 from pandas import Timestamp
 
+from src.metrics import record_rows, timed
+from src.serialization import dumps
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-stream_handler = logging.StreamHandler()
-stream_formatter = logging.Formatter("%(asctime)s %(filename)s %(funcName)s %(levelname)s: %(message)s")
-stream_handler.setFormatter(stream_formatter)
-logger.addHandler(stream_handler)
 
 
-def filter_transaction_by_search_str(operation: list[dict], search_str: str) -> str:
+@timed("services.find_transactions_by_search_str")
+def find_transactions_by_search_str(operation: list[dict], search_str: str) -> list[dict]:
     """
-    Фильтрует транзакции по строке поиска, проверяя совпадения в полях 'Категория' и 'Описание'.
+    Возвращает транзакции, в полях 'Категория' или 'Описание' которых есть строка поиска.
+
+    Результат filter_transaction_by_search_str до сериализации в JSON: используется для экспорта
+    в Arrow (src.arrow_export) без разбора JSON-строки.
 
     Аргументы:
+        operation (list[dict]): Список словарей с транзакциями
         search_str (str): Строка для поиска в транзакциях. Регистр не учитывается.
 
     Возвращает:
-        operation: список словарей с транзакциями
-        str: JSON-строка с отфильтрованными транзакциями, где:
-             - search_str найдена в поле 'Категория' (без учета регистра)
-             - ИЛИ search_str найдена в поле 'Описание' (без учета регистра)
-             Если совпадений нет, возвращается пустой список в формате JSON.
+        list[dict]: Копии найденных транзакций: даты Timestamp заменены строками, пустые категория
+                    и описание - строкой 'Не указано'
 
     Исключения:
-        ValueError: Если search_str не передана (None)
-        TypeError: Если search_str передана не в виде строки
+        ValueError: Если транзакции или search_str не переданы (None)
+        TypeError: Если транзакции переданы не списком или search_str передана не в виде строки
     """
     # Проверка входных параметров
     if operation is None:
         logger.critical("Ошибка: Не переданы транзакции")
         raise ValueError("Транзакции не переданы")
     elif not isinstance(operation, list):
-        logger.critical(f"Ошибка: Транзакции переданы в типе {type(operation)}")
+        logger.critical("Ошибка: Транзакции переданы в типе %s", type(operation))
         raise TypeError("Транзакции должны быть переданы в списке")
 
     if search_str is None:
         logger.critical("Ошибка: Не передана строка для поиска")
         raise ValueError("Строка для поиска не передана")
     elif not isinstance(search_str, str):
-        logger.critical(f"Ошибка: Строка для поиска передана в типе {type(search_str)}")
+        logger.critical("Ошибка: Строка для поиска передана в типе %s", type(search_str))
         raise TypeError("Строка передана не в типе str")
 
+    record_rows("services.find_transactions_by_search_str", len(operation))
+
     # Приведение строки поиска к нижнему регистру для регистронезависимого поиска
     search_str_lower = search_str.lower()
 
-    checked_columns = {
-        'Ключи с датой': ['Дата операции', 'Дата платежа'],
-        'Ключи для поиска': ['Категория', 'Описание']
-    }
-    for i in range(len(operation)):
-        # Меняем тип колонок дат с Timestamp на str
-        for column in checked_columns['Ключи с датой']:
-            if isinstance(operation[i][column], Timestamp):
-                operation[i][column] = str(operation[i][column])
-
-        # Заменяем пустые значения в ключах Категория и Описание
-        for column in checked_columns['Ключи для поиска']:
-            if not isinstance(operation[i][column], str):
-                operation[i][column] = 'Не указано'
-
-    # Фильтрация и возврат результата в формате JSON:
+    date_columns = ['Дата операции', 'Дата платежа']
+
+    # Фильтрация:
     # 1. Итерируемся по всем транзакциям
-    # 2. Проверяем наличие search_str в полях 'Категория' или 'Описание' (без учета регистра)
-    # 3. Сериализуем результат в JSON
-    return json.dumps(
-        [
-            item
-            for item in operation
-            if search_str_lower in item["Категория"].lower() or search_str_lower in item["Описание"].lower()
-        ], ensure_ascii=False, indent=4
-    )
+    # 2. Проверяем наличие search_str в полях 'Категория' или 'Описание' (без учета регистра),
+    #    пустые значения считаются строкой 'Не указано'
+    # 3. Найденные транзакции копируем: меняем тип дат с Timestamp на str и заменяем пустые значения
+    #    (переданные словари не изменяются)
+    found_operation = []
+    for item in operation:
+        category, description = item['Категория'], item['Описание']
+        if not isinstance(category, str):
+            category = 'Не указано'
+        if not isinstance(description, str):
+            description = 'Не указано'
+        if search_str_lower not in category.lower() and search_str_lower not in description.lower():
+            continue
+
+        found_item = {**item, 'Категория': category, 'Описание': description}
+        for column in date_columns:
+            if isinstance(found_item[column], Timestamp):
+                found_item[column] = str(found_item[column])
+        found_operation.append(found_item)
+
+    return found_operation
+
+
+def filter_transaction_by_search_str(operation: list[dict], search_str: str) -> str:
+    """
+    Фильтрует транзакции по строке поиска, проверяя совпадения в полях 'Категория' и 'Описание'.
+
+    Аргументы:
+        search_str (str): Строка для поиска в транзакциях. Регистр не учитывается.
+
+    Возвращает:
+        operation: список словарей с транзакциями
+        str: JSON-строка с отфильтрованными транзакциями, где:
+             - search_str найдена в поле 'Категория' (без учета регистра)
+             - ИЛИ search_str найдена в поле 'Описание' (без учета регистра)
+             Если совпадений нет, возвращается пустой список в формате JSON.
+
+    Исключения:
+        ValueError: Если search_str не передана (None)
+        TypeError: Если search_str передана не в виде строки
+
+    Особенности:
+        - Переданные словари не изменяются
+    """
+    return dumps(find_transactions_by_search_str(operation, search_str))
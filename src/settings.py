@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from src.env import load_env
+
+logger = logging.getLogger(__name__)
+
+# Настройки пользователя в корне проекта. Переопределяются переменной окружения USER_SETTINGS_PATH
+# (в том числе в .env, см. default_settings_path)
+DEFAULT_SETTINGS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "user_settings.json")
+
+
+def default_settings_path() -> str:
+    """Возвращает путь к настройкам: USER_SETTINGS_PATH из окружения или .env, иначе DEFAULT_SETTINGS_PATH"""
+    load_env()
+    return os.getenv("USER_SETTINGS_PATH", DEFAULT_SETTINGS_PATH)
+
+
+class SettingsLoader:
+    """
+    Потокобезопасный загрузчик user_settings.json с кэшированием.
+
+    Файл читается один раз, а затем не чаще раза в check_interval секунд проверяется его mtime и размер:
+    файл перечитывается, только если он изменился. В остальное время настройки отдаются из памяти
+    без обращения к файловой системе.
+
+    Принимает:
+        path (Optional[str]): Путь к файлу настроек. По умолчанию default_settings_path() при первом чтении
+        check_interval (float): Минимальный интервал между проверками файла в секундах
+        clock (Callable[[], float]): Источник монотонного времени (используется в тестах)
+
+    Особенности:
+        - Возвращаемый словарь общий для всех вызовов и не должен изменяться
+        - Если файл стал недоступен или повреждён, используются последние успешно прочитанные настройки
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        check_interval: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._settings: Optional[dict] = None
+        self._signature: Optional[tuple[int, int]] = None
+        self._checked_at: Optional[float] = None
+
+    def get(self) -> dict:
+        """
+        Возвращает настройки пользователя.
+
+        Исключения:
+            FileNotFoundError: Если файл настроек не найден при первом чтении
+            json.JSONDecodeError: Если файл настроек повреждён при первом чтении
+        """
+        settings, checked_at = self._settings, self._checked_at
+        if settings is not None and checked_at is not None and self._clock() - checked_at < self.check_interval:
+            return settings
+
+        with self._lock:
+            if self.path is None:
+                self.path = default_settings_path()
+            try:
+                stat = os.stat(self.path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if self._settings is None or signature != self._signature:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._settings = json.load(f)
+                    self._signature = signature
+                    logger.info("Настройки пользователя загружены из %s", self.path)
+            except (OSError, json.JSONDecodeError) as e:
+                if self._settings is None:
+                    logger.critical("Ошибка: Не удалось прочитать настройки %s", self.path)
+                    raise
+                logger.warning("Настройки %s не перечитаны, используются прежние: %s", self.path, e)
+
+            self._checked_at = self._clock()
+            return self._settings
+
+    def invalidate(self) -> None:
+        """Сбрасывает кэш: следующий вызов get перечитает файл"""
+        with self._lock:
+            self._settings = None
+            self._signature = None
+            self._checked_at = None
+
+
+# Загрузчик настроек по умолчанию, общий для процесса
+default_settings_loader = SettingsLoader()
+
+
+def load_user_settings() -> dict:
+    """Возвращает настройки пользователя из user_settings.json через общий загрузчик с кэшированием"""
+    return default_settings_loader.get()
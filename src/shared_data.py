@@ -0,0 +1,224 @@
+import json
+import logging
+import time
+from multiprocessing import shared_memory
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data import PreparedOperations, prepare_operations
+from src.serialization import dumps
+from src.services import find_transactions_by_search_str
+
+logger = logging.getLogger(__name__)
+
+# Служебные колонки блока: номер строки в исходном файле и исходное значение даты операции
+_ROW_COLUMN = "__row"
+_SOURCE_DATE_COLUMN = "__source_date"
+
+# Выравнивание начала каждой колонки в блоке (байт)
+_ALIGNMENT = 64
+
+# Колонки, по которым ищет filter_transaction_by_search_str
+_SEARCH_COLUMNS = ("Категория", "Описание")
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def _encode_column(series: pd.Series) -> tuple[dict, np.ndarray]:
+    """
+    Кодирует колонку в массив фиксированной ширины для shared memory.
+
+    Числа и даты хранятся как есть, остальные колонки - кодами категорий (-1 - пропуск) со словарём
+    значений в описании колонки. Словарь отсортирован, как сортирует значения groupby.
+    """
+    if pd.api.types.is_datetime64_dtype(series):
+        return {"kind": "datetime"}, series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return {"kind": "numeric"}, series.to_numpy()
+
+    try:
+        codes, categories = pd.factorize(series, sort=True)
+    except TypeError:
+        # Значения разных типов не сортируются: порядок словаря - порядок появления
+        codes, categories = pd.factorize(series)
+    categories = pd.Index(categories).tolist()
+    # Ширина кодов - та, которую выбирает pandas для такого словаря, иначе from_codes скопирует коды
+    codes_dtype = pd.Categorical.from_codes(codes[:0], categories=categories).codes.dtype
+    return {"kind": "category", "categories": categories}, codes.astype(codes_dtype)
+
+
+class SharedOperations:
+    """
+    Подготовленные операции в одном блоке multiprocessing.shared_memory.
+
+    Колонки хранятся в блоке массивами фиксированной ширины: числа и даты - как есть, строки - кодами
+    категорий. Процессы, подключившиеся к блоку, строят PreparedOperations поверх его памяти без
+    копирования, поэтому N процессов занимают примерно столько же памяти, сколько один.
+
+    Создаётся функциями publish_operations (владелец блока) и attach_operations (подключение по имени).
+
+    Атрибуты:
+        name (str): Имя блока shared memory
+        operations (PreparedOperations): Операции, отсортированные по дате, со строковыми колонками
+                                         в виде pd.Categorical
+        loaded_at (float): Время публикации блока (Unix time)
+
+    Особенности:
+        - Массивы блока доступны только для чтения
+        - Блок удаляет владелец (unlink). Процессы, подключённые к удалённому блоку, продолжают работать с ним
+          до close
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory) -> None:
+        self._shm = shm
+        self.name = shm.name
+
+        header_size = int(np.frombuffer(shm.buf, dtype=np.int64, count=1)[0])
+        manifest = json.loads(bytes(shm.buf[8:8 + header_size]).decode("utf-8"))
+        self.loaded_at: float = manifest["loaded_at"]
+        self._columns: list[str] = manifest["source_columns"]
+
+        values = {}
+        for column in manifest["columns"]:
+            array = np.ndarray(
+                (manifest["rows"],), dtype=np.dtype(column["dtype"]), buffer=shm.buf, offset=column["offset"]
+            )
+            array.flags.writeable = False
+            if column["kind"] == "datetime":
+                values[column["name"]] = array.view("datetime64[ns]")
+            elif column["kind"] == "category":
+                values[column["name"]] = pd.Categorical.from_codes(
+                    array, categories=pd.Index(column["categories"], dtype=object), validate=False
+                )
+            else:
+                values[column["name"]] = array
+
+        self._rows: np.ndarray = values.pop(_ROW_COLUMN)
+        self._source_dates = values.pop(_SOURCE_DATE_COLUMN)
+        offsets = {
+            period: {int(period_id): tuple(bounds) for period_id, bounds in period_offsets.items()}
+            for period, period_offsets in manifest["offsets"].items()
+        }
+        self.operations = PreparedOperations(pd.DataFrame(values, copy=False), offsets)
+
+    def search(self, search_str: str) -> str:
+        """Возвращает результат filter_transaction_by_search_str по операциям блока"""
+        return dumps(self.search_records(search_str))
+
+    def search_records(self, search_str: str) -> list[dict]:
+        """
+        Возвращает результат find_transactions_by_search_str по операциям блока.
+
+        Совпадения ищутся в словарях категорий и описаний, а в словари записей превращаются только
+        найденные операции. Результат совпадает с поиском по всем операциям файла в исходном порядке.
+        """
+        if not isinstance(search_str, str):
+            # Проверку аргумента и сообщение об ошибке оставляем функции поиска
+            return find_transactions_by_search_str([], search_str)
+
+        frame = self.operations.frame
+        search_str_lower = search_str.lower()
+        mask = np.zeros(len(frame), dtype=bool)
+        for column in _SEARCH_COLUMNS:
+            values = pd.Categorical(frame[column])  # Колонка блока уже категориальная: без копирования
+            # Пустые и нестроковые значения функция поиска заменяет на 'Не указано'
+            labels = [value if isinstance(value, str) else "Не указано" for value in values.categories]
+            matched = np.array([search_str_lower in label.lower() for label in labels], dtype=bool)
+            mask |= np.where(values.codes >= 0, matched[values.codes], search_str_lower in "не указано")
+
+        positions = np.flatnonzero(mask)
+        positions = positions[np.argsort(self._rows[positions], kind="stable")]
+        found = frame.iloc[positions].assign(**{"Дата операции": self._source_dates[positions]})
+        return find_transactions_by_search_str(found[self._columns].to_dict(orient="records"), search_str)
+
+    def close(self) -> None:
+        """Отключается от блока. Объекты operations после этого использовать нельзя"""
+        self.operations = None
+        self._rows = self._source_dates = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # На массивы блока ещё ссылаются: память освободится при сборке мусора
+            logger.warning("Блок %s ещё используется и будет закрыт позже", self.name)
+
+    def unlink(self) -> None:
+        """Удаляет блок. Вызывает владелец после отключения всех процессов или публикации нового блока"""
+        self._shm.unlink()
+
+
+def publish_operations(operation: pd.DataFrame, name: Optional[str] = None) -> SharedOperations:
+    """
+    Подготавливает операции (prepare_operations) и размещает их в новом блоке shared memory.
+
+    Принимает:
+        operation (pd.DataFrame): Операции в формате файла operations.xlsx
+        name (Optional[str]): Имя блока. По умолчанию выбирается автоматически
+
+    Возвращает:
+        SharedOperations: Блок, владельцем которого является вызывающий процесс
+
+    Исключения:
+        ValueError: Если не переданы транзакции
+        TypeError: Если транзакции переданы не в виде pandas DataFrame
+    """
+    if operation is None:
+        logger.critical("Ошибка: Не переданы транзакции")
+        raise ValueError("Транзакции не переданы")
+    elif not isinstance(operation, pd.DataFrame):
+        logger.critical("Ошибка: Транзакции переданы в типе %s", type(operation))
+        raise TypeError("Транзакции должны быть переданы в виде pandas DataFrame")
+
+    # Номер строки и исходная дата проходят через сортировку вместе с операциями
+    prepared = prepare_operations(
+        operation.assign(**{_ROW_COLUMN: np.arange(len(operation)), _SOURCE_DATE_COLUMN: operation["Дата операции"]})
+    )
+
+    columns: list[dict[str, Any]] = []
+    arrays: list[np.ndarray] = []
+    for column, series in prepared.frame.items():
+        description, array = _encode_column(series)
+        columns.append({"name": column, "dtype": array.dtype.str, **description})
+        arrays.append(np.ascontiguousarray(array))
+
+    manifest = {
+        "rows": len(prepared),
+        "loaded_at": time.time(),
+        "source_columns": list(operation.columns),
+        "offsets": {
+            period: {str(period_id): list(bounds) for period_id, bounds in period_offsets.items()}
+            for period, period_offsets in prepared._offsets.items()
+        },
+        "columns": columns,
+    }
+
+    # Смещения колонок зависят от размера описания, а описание - от смещений: места под описание
+    # резервируется с запасом на запись смещений
+    header_size = len(json.dumps(manifest, ensure_ascii=False).encode("utf-8")) + 32 * len(columns)
+    offset = _align(8 + header_size)
+    for column, array in zip(columns, arrays):
+        column["offset"] = offset
+        offset = _align(offset + array.nbytes)
+    header = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+    shm.buf[:8] = np.int64(len(header)).tobytes()
+    shm.buf[8:8 + len(header)] = header
+    for column, array in zip(columns, arrays):
+        shm.buf[column["offset"]:column["offset"] + array.nbytes] = array.view(np.uint8)
+
+    logger.info("Операции (%s) размещены в блоке %s (%s байт)", len(prepared), shm.name, shm.size)
+    return SharedOperations(shm)
+
+
+def attach_operations(name: str) -> SharedOperations:
+    """
+    Подключается к блоку операций, созданному publish_operations, без копирования данных.
+
+    Исключения:
+        FileNotFoundError: Если блока с таким именем нет
+    """
+    return SharedOperations(shared_memory.SharedMemory(name=name))
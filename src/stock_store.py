@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from typing import IO, TYPE_CHECKING, Callable, Optional
+
+from src.lazy_imports import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+# Функция загрузки истории: (тикеры, date_from, date_to) -> [{"symbol", "date", "close"}, ...]
+HistoryFetcher = Callable[[list, str, str], list]
+
+
+class StockPriceStore:
+    """
+    Локальное колоночное хранилище цен закрытия акций (EOD).
+
+    Для каждого тикера хранятся два массива: даты (datetime64[D]) и цены закрытия (float64)
+    в файле <store_dir>/<ТИКЕР>.npz. Массивы держатся в памяти, поэтому последняя цена - это
+    чтение последнего элемента, а история портфеля считается векторно.
+
+    Принимает:
+        store_dir (str): Директория хранилища
+        fetch (HistoryFetcher): Функция загрузки истории цен по нескольким тикерам за период
+        history_days (int): Глубина первоначальной загрузки для нового тикера в днях
+        retry_interval (float): Интервал в секундах между повторными запросами тикера, по которому
+                                провайдер не вернул баров
+        clock (Callable[[], float]): Источник времени (секунды), для тестов
+
+    Особенности:
+        - update() запрашивает только даты после последнего сохранённого бара, одним запросом на все тикеры
+        - Дата последней проверки хранится в meta.json, поэтому в течение дня повторных запросов нет.
+          Тикер без новых баров (провайдер ещё не опубликовал день) запрашивается снова через retry_interval
+        - Файлы заменяются атомарно, хранилище можно разделять между процессами
+        - Массивы тикеров и meta.json кэшируются в памяти и перечитываются, только если изменились mtime
+          или размер файла (например, после update в другом процессе)
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        fetch: HistoryFetcher,
+        history_days: int = 365,
+        retry_interval: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.store_dir = store_dir
+        self.fetch = fetch
+        self.history_days = history_days
+        self.retry_interval = retry_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Тикер -> (mtime и размер файла, даты, цены закрытия); mtime и размер None - файла нет
+        self._series: dict[str, tuple[Optional[tuple[int, int]], np.ndarray, np.ndarray]] = {}
+        self._meta: dict = {}
+        self._meta_signature: Optional[tuple[int, int]] = None
+
+    def _path(self, ticker: str) -> str:
+        return os.path.join(self.store_dir, f"{ticker}.npz")
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.store_dir, "meta.json")
+
+    @staticmethod
+    def _signature(path: str) -> Optional[tuple[int, int]]:
+        """mtime и размер файла или None, если файла нет"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_meta(self) -> dict:
+        """Возвращает отметки последней проверки тикеров. Словарь общий для вызовов и не должен изменяться"""
+        signature = self._signature(self._meta_path())
+        with self._lock:
+            if signature != self._meta_signature:
+                meta = {}
+                if signature is not None:
+                    try:
+                        with open(self._meta_path(), encoding="utf-8") as f:
+                            meta = json.load(f)
+                    except (OSError, json.JSONDecodeError) as e:
+                        logger.warning("Файл %s не прочитан, тикеры будут проверены заново: %s", self._meta_path(), e)
+                self._meta, self._meta_signature = meta, signature
+            return self._meta
+
+    def _write_atomic(self, path: str, write: Callable[[IO[bytes]], None]) -> None:
+        """Записывает файл через временный файл, чтобы параллельные процессы не прочитали его наполовину"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def series(self, ticker: str) -> tuple[np.ndarray, np.ndarray]:
+        """Возвращает даты и цены закрытия тикера, отсортированные по дате (пустые массивы, если данных нет)"""
+        signature = self._signature(self._path(ticker))
+        with self._lock:
+            cached = self._series.get(ticker)
+            if cached is None or cached[0] != signature:
+                if signature is None:
+                    cached = (None, np.array([], dtype="datetime64[D]"), np.array([], dtype=float))
+                else:
+                    with np.load(self._path(ticker)) as data:
+                        cached = (signature, data["dates"], data["close"])
+                self._series[ticker] = cached
+            return cached[1], cached[2]
+
+    def latest_close(self, ticker: str) -> Optional[tuple[datetime.date, float]]:
+        """Возвращает дату и цену последнего сохранённого бара тикера или None"""
+        dates, close = self.series(ticker)
+        if len(dates) == 0:
+            return None
+        return dates[-1].astype(datetime.date), float(close[-1])
+
+    def update(self, tickers: list, today: Optional[datetime.date] = None) -> int:
+        """
+        Дозагружает недостающие бары для тикеров одним запросом истории.
+
+        Возвращает:
+            int: Число новых сохранённых баров
+        """
+        today = today or datetime.date.today()
+        now = self._clock()
+        meta = self._read_meta()
+        stale = [ticker for ticker in tickers if not self._is_checked(meta.get(ticker), today, now)]
+        if not stale:
+            return 0
+
+        # Начало запроса - день после самого раннего из последних сохранённых баров
+        starts = []
+        for ticker in stale:
+            latest = self.latest_close(ticker)
+            if latest is None:
+                starts.append(today - datetime.timedelta(days=self.history_days))
+            else:
+                starts.append(latest[0] + datetime.timedelta(days=1))
+        date_from = min(starts)
+
+        bars = self.fetch(stale, date_from.isoformat(), today.isoformat()) if date_from <= today else []
+        logger.info("Получено %s баров для %s за %s - %s", len(bars), stale, date_from, today)
+
+        frame = pd.DataFrame(bars, columns=["symbol", "date", "close"])
+        frame["date"] = pd.to_datetime(frame["date"].astype(str).str[:10]).to_numpy().astype("datetime64[D]")
+
+        added = 0
+        marks: dict[str, object] = {}
+        for ticker in stale:
+            new = frame.loc[frame["symbol"] == ticker]
+            if not new.empty:
+                added += self._merge(ticker, new["date"].to_numpy(), new["close"].to_numpy(dtype=float))
+            latest = self.latest_close(ticker)
+            # Без баров и без сегодняшнего бара тикер не считается проверенным: отмечаем время попытки
+            checked = not new.empty or (latest is not None and latest[0] == today)
+            marks[ticker] = today.isoformat() if checked else now
+
+        # Перечитываем meta перед записью, чтобы не затереть отметки других процессов
+        meta = {**self._read_meta(), **marks}
+        self._write_atomic(self._meta_path(), lambda f: f.write(json.dumps(meta, indent=4).encode("utf-8")))
+        return added
+
+    def _is_checked(self, mark: object, today: datetime.date, now: float) -> bool:
+        """
+        Проверяет отметку тикера в meta.json: дата - тикер проверен в этот день,
+        число - время попытки без новых баров, повтор не раньше чем через retry_interval
+        """
+        if isinstance(mark, (int, float)):
+            return now - mark < self.retry_interval
+        return mark == today.isoformat()
+
+    def _merge(self, ticker: str, dates: np.ndarray, close: np.ndarray) -> int:
+        """Добавляет бары к тикеру (новые значения заменяют старые на те же даты) и сохраняет файл"""
+        old_dates, old_close = self.series(ticker)
+        all_dates = np.concatenate([old_dates, dates.astype("datetime64[D]")])
+        all_close = np.concatenate([old_close, close])
+
+        # np.unique оставляет первое вхождение, поэтому идём с конца, чтобы новые значения имели приоритет
+        unique_dates, reversed_index = np.unique(all_dates[::-1], return_index=True)
+        unique_close = all_close[::-1][reversed_index]
+
+        self._write_atomic(
+            self._path(ticker),
+            lambda f: np.savez(f, dates=unique_dates, close=unique_close),
+        )
+        with self._lock:
+            self._series[ticker] = (self._signature(self._path(ticker)), unique_dates, unique_close)
+        return len(unique_dates) - len(old_dates)
+
+    def history(self, tickers: list, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Возвращает цены закрытия за период в широком формате: индекс - даты, колонки - тикеры.
+
+        Пропуски (выходные, праздники, отсутствие торгов) заполняются последней известной ценой.
+        """
+        columns = {}
+        for ticker in tickers:
+            dates, close = self.series(ticker)
+            columns[ticker] = pd.Series(close, index=pd.DatetimeIndex(dates))
+
+        frame = pd.DataFrame(columns).sort_index().ffill()
+        return frame.loc[start:end]
+
+    def portfolio_value(
+        self, holdings: dict[str, float], start: Optional[str] = None, end: Optional[str] = None
+    ) -> pd.Series:
+        """
+        Возвращает стоимость портфеля по дням.
+
+        Принимает:
+            holdings (dict[str, float]): Количество акций по тикерам, например {"AAPL": 10, "MSFT": 5}
+            start, end (Optional[str]): Границы периода в формате YYYY-MM-DD
+
+        Возвращает:
+            pd.Series: Стоимость портфеля на каждую дату с известными ценами
+        """
+        tickers = list(holdings)
+        prices = self.history(tickers, start, end)
+        quantities = np.array([holdings[ticker] for ticker in tickers], dtype=float)
+        return pd.Series(prices.to_numpy() @ quantities, index=prices.index, name="portfolio_value").dropna()
@@ -0,0 +1,344 @@
+import argparse
+import datetime
+import json
+import logging
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+
+def _generated_value(symbol: str, day: datetime.date, base_low: float, base_high: float) -> float:
+    """Детерминированно генерирует значение курса или цены для символа на дату"""
+    seed = zlib.crc32(symbol.encode())
+    base = base_low + (seed % 10_000) / 10_000 * (base_high - base_low)
+    return round(base * (1 + 0.05 * math.sin(day.toordinal() / 7 + seed)), 6)
+
+
+class StubResponses:
+    """
+    Источник ответов стенда: записанные значения или сгенерированные детерминированно.
+
+    Принимает:
+        recordings (Optional[dict]): Записанные значения в формате
+            {
+                "currency_rates": {"USD": 78.918179, ...},
+                "stock_prices": {"AAPL": 213.55, ...}
+            }
+            Для отсутствующих валют и тикеров значения генерируются.
+    """
+
+    def __init__(self, recordings: Optional[dict] = None) -> None:
+        recordings = recordings or {}
+        self.currency_rates: dict = recordings.get("currency_rates", {})
+        self.stock_prices: dict = recordings.get("stock_prices", {})
+
+    def currency_rate(self, currency: str, day: datetime.date) -> float:
+        """Курс валюты к RUB на дату"""
+        if currency in self.currency_rates:
+            return self.currency_rates[currency]
+        return _generated_value(currency, day, 1.0, 120.0)
+
+    def stock_price(self, symbol: str, day: datetime.date) -> float:
+        """Цена закрытия акции на дату"""
+        if symbol in self.stock_prices:
+            return self.stock_prices[symbol]
+        return round(_generated_value(symbol, day, 20.0, 900.0), 2)
+
+
+class _TokenBucket:
+    """Ограничитель частоты запросов стенда: rate запросов в секунду с запасом burst"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class StubMarketDataServer:
+    """
+    Локальный HTTP-стенд, заменяющий currency_data-api (apilayer) и marketstack-api.
+
+    Отвечает по тем же схемам URL, что использует src.utils:
+        - GET /currency_data/change?start_date=...&end_date=...&currencies=RUB&source=USD
+        - GET /currency_data/timeframe?start_date=...&end_date=...&currencies=RUB&source=USD
+        - GET /v1/eod?access_key=...&symbols=AAPL,MSFT&date_from=...&date_to=...
+    и дополнительно:
+        - GET /__stats - счётчики запросов стенда в формате JSON
+
+    Принимает:
+        host (str): Адрес для прослушивания
+        port (int): Порт. 0 - выбрать свободный порт
+        latency (float): Задержка ответа в секундах
+        latency_jitter (float): Случайная добавка к задержке в секундах (от 0 до latency_jitter)
+        error_rate (float): Доля ответов с ошибкой 500 (от 0 до 1)
+        rate_limit (Optional[float]): Лимит запросов в секунду. При превышении отвечает 429
+        recordings (Optional[dict]): Записанные ответы (см. StubResponses)
+        seed (Optional[int]): Зерно генератора ошибок и задержек для воспроизводимости
+
+    Особенности:
+        - Обрабатывает запросы конкурентно (ThreadingHTTPServer)
+        - Используется как контекстный менеджер: при входе запускается в фоновом потоке
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        recordings: Optional[dict] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        if not 0 <= error_rate <= 1:
+            raise ValueError("Доля ошибок должна быть от 0 до 1")
+
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.responses = StubResponses(recordings)
+        self._bucket = _TokenBucket(rate_limit) if rate_limit else None
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats: dict[str, int] = dict.fromkeys(
+            ["requests", "currency_data", "marketstack", "errors", "rate_limited"], 0
+        )
+
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Базовый URL стенда, пригодный для set_api_base_urls"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubMarketDataServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Запускает стенд в фоновом потоке"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-market-data", daemon=True)
+        self._thread.start()
+        logger.info("Стенд рыночных данных запущен: %s", self.url)
+
+    def serve_forever(self) -> None:
+        """Запускает стенд в текущем потоке до прерывания"""
+        logger.info("Стенд рыночных данных запущен: %s", self.url)
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        """Останавливает стенд и освобождает порт"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _count(self, *keys: str) -> None:
+        with self._stats_lock:
+            for key in keys:
+                self.stats[key] += 1
+
+    def _draw(self) -> tuple[float, float]:
+        """Возвращает случайную добавку к задержке и число для решения об ошибке"""
+        with self._random_lock:
+            return self._random.uniform(0, self.latency_jitter), self._random.random()
+
+    def handle(self, path: str, query: dict[str, list[str]]) -> tuple[int, dict]:
+        """Формирует код и тело ответа на запрос с учётом задержки, доли ошибок и лимита запросов"""
+        self._count("requests")
+
+        if path == "/__stats":
+            with self._stats_lock:
+                return 200, dict(self.stats)
+
+        if path == "/currency_data/change":
+            self._count("currency_data")
+            provider_handler = self._currency_change
+        elif path == "/currency_data/timeframe":
+            self._count("currency_data")
+            provider_handler = self._currency_timeframe
+        elif path == "/v1/eod":
+            self._count("marketstack")
+            provider_handler = self._eod
+        else:
+            return 404, {"message": "Not Found"}
+
+        jitter, error_draw = self._draw()
+        if self.latency or jitter:
+            time.sleep(self.latency + jitter)
+
+        if self._bucket is not None and not self._bucket.try_acquire():
+            self._count("rate_limited")
+            return 429, {"message": "You have exceeded your rate limit"}
+
+        if error_draw < self.error_rate:
+            self._count("errors")
+            return 500, {"message": "Internal Server Error"}
+
+        try:
+            return 200, provider_handler(query)
+        except (KeyError, ValueError) as e:
+            return 400, {"message": f"Bad Request: {e}"}
+
+    def _currency_change(self, query: dict[str, list[str]]) -> dict:
+        start_date = query["start_date"][0]
+        end_date = query["end_date"][0]
+        source = query["source"][0]
+        start_rate = self.responses.currency_rate(source, datetime.date.fromisoformat(start_date))
+        end_rate = self.responses.currency_rate(source, datetime.date.fromisoformat(end_date))
+
+        quotes = {}
+        for currency in query.get("currencies", ["RUB"])[0].split(","):
+            quotes[f"{source}{currency}"] = {
+                "start_rate": start_rate,
+                "end_rate": end_rate,
+                "change": round(end_rate - start_rate, 6),
+                "change_pct": round((end_rate - start_rate) / start_rate * 100, 4),
+            }
+
+        return {
+            "success": True,
+            "change": True,
+            "start_date": start_date,
+            "end_date": end_date,
+            "source": source,
+            "quotes": quotes,
+        }
+
+    def _currency_timeframe(self, query: dict[str, list[str]]) -> dict:
+        start_date = datetime.date.fromisoformat(query["start_date"][0])
+        end_date = datetime.date.fromisoformat(query["end_date"][0])
+        source = query["source"][0]
+        currencies = query.get("currencies", ["RUB"])[0].split(",")
+
+        quotes = {}
+        for i in range((end_date - start_date).days + 1):
+            day = start_date + datetime.timedelta(days=i)
+            rate = self.responses.currency_rate(source, day)
+            quotes[day.isoformat()] = {f"{source}{currency}": rate for currency in currencies}
+
+        return {
+            "success": True,
+            "timeframe": True,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "source": source,
+            "quotes": quotes,
+        }
+
+    def _eod(self, query: dict[str, list[str]]) -> dict:
+        symbols = query["symbols"][0].split(",")
+        date_from = datetime.date.fromisoformat(query["date_from"][0])
+        date_to = datetime.date.fromisoformat(query.get("date_to", [date_from.isoformat()])[0])
+        limit = min(int(query.get("limit", ["100"])[0]), 1000)
+        offset = int(query.get("offset", ["0"])[0])
+
+        # Торговые дни (без выходных) от новых к старым, как отдаёт marketstack
+        days = [
+            date_to - datetime.timedelta(days=i)
+            for i in range((date_to - date_from).days + 1)
+            if (date_to - datetime.timedelta(days=i)).weekday() < 5
+        ]
+        bars = [
+            {
+                "close": self.responses.stock_price(symbol, day),
+                "symbol": symbol,
+                "exchange": "XNAS",
+                "date": f"{day.isoformat()}T00:00:00+0000",
+            }
+            for day in days
+            for symbol in symbols
+        ]
+        page = bars[offset:offset + limit]
+
+        return {
+            "pagination": {"limit": limit, "offset": offset, "count": len(page), "total": len(bars)},
+            "data": page,
+        }
+
+    def _make_handler(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                parsed = urlparse(self.path)
+                status, body = stub.handle(parsed.path, parse_qs(parsed.query))
+                payload = json.dumps(body, ensure_ascii=False).encode()
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(format, *args)
+
+        return Handler
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Запускает стенд из командной строки: python -m src.stub_server --port 8765"""
+    parser = argparse.ArgumentParser(description="Локальный стенд currency_data-api и marketstack-api")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка ответа в секундах")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Случайная добавка к задержке в секундах")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой 500 (0..1)")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Лимит запросов в секунду (иначе 429)")
+    parser.add_argument("--recordings", default=None, help="JSON-файл с записанными курсами и ценами")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    recordings = None
+    if args.recordings is not None:
+        with open(args.recordings, encoding="utf-8") as f:
+            recordings = json.load(f)
+
+    server = StubMarketDataServer(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        recordings=recordings,
+        seed=args.seed,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
 import datetime
 import json
 import logging
 import os
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Optional
+
+from src.circuit_breaker import CircuitBreaker
+from src.env import load_env
+from src.lazy_imports import lazy_import
+from src.market_cache import CacheEntry, MarketDataCache
+from src.metrics import record_cache, record_rows, span, timed
+from src.rate_limiter import RateLimitScheduler
+from src.serialization import dumps
+from src.stock_store import StockPriceStore
 
-import pandas as pd
-import requests
-from dotenv import load_dotenv
+if TYPE_CHECKING:
+    import httpx
+    import numpy as np
+    import pandas as pd
+    import requests
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    requests = lazy_import("requests")
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-stream_handler = logging.StreamHandler()
-stream_formatter = logging.Formatter("%(asctime)s %(filename)s %(funcName)s %(levelname)s: %(message)s")
-stream_handler.setFormatter(stream_formatter)
-logger.addHandler(stream_handler)
 
+# Настройки провайдеров из переменных окружения и .env. Читаются при первом обращении к ним или к API
+# (см. _load_settings), поэтому импорт модуля не загружает .env. Здесь они объявлены только для проверки типов
+if TYPE_CHECKING:
+    currency_data_api_key: Optional[str] = None
+    marketstack_api_key: Optional[str] = None
+
+    # Базовые URL провайдеров. Переопределяются переменными окружения или set_api_base_urls,
+    # например, чтобы направить запросы на локальный стенд src.stub_server
+    currency_data_api_url: str = ""
+    marketstack_api_url: str = ""
+
+    # Директория локального кэша рыночных данных (истории курсов, цен и т.п.)
+    market_data_cache_dir: str = ""
 
-load_dotenv()
-currency_data_api_key = os.getenv("CURRENCY_DATA_API_KEY")
-marketstack_api_key = os.getenv("MARKETSTACK_API_KEY")
+    # Последние успешно полученные курсы валют и цены акций. Если задан MARKET_DATA_CACHE_FILE,
+    # кэш хранится в файле и общий для процессов (например, с фоновым src.prefetch)
+    market_data_cache: MarketDataCache = MarketDataCache()
 
+    # Сколько секунд данные в кэше считаются свежими и используются get_events без запроса к API.
+    # None (по умолчанию) - get_events всегда запрашивает провайдеров
+    market_data_max_age: Optional[float] = None
 
-def get_expenses(operation: pd.DataFrame) -> str:
+    # Общая для процессов квота запросов к провайдерам (None - без ограничений)
+    rate_limit_scheduler: Optional[RateLimitScheduler] = None
+
+    # Локальное хранилище цен закрытия акций. Включается переменной окружения STOCK_PRICE_STORE=1
+    # или set_stock_price_store. По умолчанию выключено, и get_stock_prices запрашивает цены у API
+    stock_price_store: Optional[StockPriceStore] = None
+
+_SETTINGS_NAMES = frozenset(
+    {
+        "currency_data_api_key",
+        "marketstack_api_key",
+        "currency_data_api_url",
+        "marketstack_api_url",
+        "market_data_cache_dir",
+        "market_data_cache",
+        "market_data_max_age",
+        "rate_limit_scheduler",
+        "stock_price_store",
+    }
+)
+_settings_loaded = False
+_settings_lock = threading.Lock()
+
+
+def _load_settings() -> None:
     """
-    Анализирует расходы из DataFrame операций и возвращает структурированные данные в формате JSON.
+    Загружает .env и читает настройки провайдеров из окружения. Выполняется один раз, при первом обращении.
+
+    Исключения:
+        ValueError: Если квота запросов в окружении задана неверно (см. RateLimitScheduler.from_env)
+    """
+    global currency_data_api_key, marketstack_api_key, currency_data_api_url, marketstack_api_url
+    global market_data_cache_dir, market_data_cache, market_data_max_age, rate_limit_scheduler, stock_price_store
+    global _settings_loaded
+
+    if _settings_loaded:
+        return
+    with _settings_lock:
+        if _settings_loaded:
+            return
+        load_env()
+        currency_data_api_key = os.getenv("CURRENCY_DATA_API_KEY")
+        marketstack_api_key = os.getenv("MARKETSTACK_API_KEY")
+        currency_data_api_url = os.getenv("CURRENCY_DATA_API_URL", "https://api.apilayer.com")
+        marketstack_api_url = os.getenv("MARKETSTACK_API_URL", "https://api.marketstack.com")
+        market_data_cache_dir = os.getenv(
+            "MARKET_DATA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "analysis_banking_operation")
+        )
+        market_data_cache = MarketDataCache(os.getenv("MARKET_DATA_CACHE_FILE"))
+        market_data_max_age = float(os.environ["MARKET_DATA_MAX_AGE"]) if os.getenv("MARKET_DATA_MAX_AGE") else None
+        rate_limit_scheduler = RateLimitScheduler.from_env()
+        stock_price_store = (
+            StockPriceStore(os.path.join(market_data_cache_dir, "stock_prices"), get_stock_price_history)
+            if os.getenv("STOCK_PRICE_STORE", "").lower() in ("1", "true", "yes")
+            else None
+        )
+        _settings_loaded = True
+
+
+def __getattr__(name: str) -> Any:
+    # Настройки провайдеров (utils.marketstack_api_url и т.п.) читаются при первом обращении к ним
+    if name in _SETTINGS_NAMES:
+        _load_settings()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Максимальный период одного запроса истории курсов к currency_data-api
+CURRENCY_TIMEFRAME_MAX_DAYS = 365
+
+# Circuit breaker для каждого провайдера: после серии ошибок провайдер временно пропускается
+currency_data_breaker = CircuitBreaker("currency_data-api")
+marketstack_breaker = CircuitBreaker("marketstack-api")
+
+# Категории расходов, которые учитываются отдельно от топ-7
+CASH_AND_TRANSFERS_CATEGORIES = ["Переводы", "Наличные"]
+
+# Число категорий расходов в топе по умолчанию, остальные объединяются в 'Остальное'
+EXPENSES_TOP_N = 7
+
+# Максимальное число баров в одной странице ответа marketstack-api
+MARKETSTACK_PAGE_LIMIT = 1000
+
+# Ограничения асинхронного клиента по умолчанию
+ASYNC_MAX_CONCURRENCY = 10  # Максимум одновременных запросов к API
+ASYNC_REQUEST_TIMEOUT = 10.0  # Таймаут одного запроса в секундах
+
+
+def _to_kopecks(amount: pd.Series) -> pd.Series:
+    """
+    Переводит суммы в целые копейки (пропуски - 0).
+
+    Сумма целых чисел не зависит от порядка строк, поэтому итоги совпадают для исходных операций,
+    операций, отсортированных по дате (src.data.prepare_operations), и накопленных сумм
+    """
+    kopecks = np.round(np.nan_to_num(amount.to_numpy(dtype=float)) * 100).astype(np.int64)
+    return pd.Series(kopecks, index=amount.index, name=amount.name)
+
+
+@timed("utils.get_expenses_dict")
+def get_expenses_dict(operation: pd.DataFrame, top_n: int = EXPENSES_TOP_N) -> dict:
+    """
+    Анализирует расходы из DataFrame операций и возвращает структурированные данные в виде словаря.
 
     Возвращает:
     1. Общую сумму всех расходов (включая наличные и переводы)
@@ -32,9 +164,10 @@ def get_expenses(operation: pd.DataFrame) -> str:
     Принимает:
         operation (pd.DataFrame): DataFrame с операциями, должен содержать колонки:
                                 'Категория', 'Сумма операции', 'Сумма операции с округлением'
+        top_n (int): Число категорий в топе (по умолчанию 7)
 
     Возвращает:
-        str: JSON-строка с структурированными данными о расходах, включая:
+        dict: Словарь с структурированными данными о расходах, включая:
             - total_amount: общая сумма расходов
             - main: топ-7 категорий расходов
             - transfers_and_cash: расходы по наличным и переводам
@@ -42,7 +175,7 @@ def get_expenses(operation: pd.DataFrame) -> str:
     Особенности:
         - Отрицательные значения суммы считаются расходами
         - Категории 'Наличные' и 'Переводы' обрабатываются отдельно
-        - Если категорий больше 7, остальные объединяются в категорию 'Остальное'
+        - Если категорий больше top_n, остальные объединяются в категорию 'Остальное'
     """
     # Переименовываем колонки для удобства работы
     operation = operation.rename(
@@ -53,7 +186,7 @@ def get_expenses(operation: pd.DataFrame) -> str:
     )
 
     # Категории, которые нужно обработать отдельно
-    cash_and_transfers_categories: list = ["Переводы", "Наличные"]
+    cash_and_transfers_categories: list = CASH_AND_TRANSFERS_CATEGORIES
 
     # Находим все категории расходов (отрицательные суммы, исключая наличные и переводы)
     expenses_categories: list = operation.loc[
@@ -66,23 +199,28 @@ def get_expenses(operation: pd.DataFrame) -> str:
     expenses: pd.DataFrame = operation.loc[operation["category"].isin(expenses_categories)]
     cash_and_transfers: pd.DataFrame = operation.loc[operation["category"].isin(cash_and_transfers_categories)]
 
-    # Суммируем общие расходы (обычные + наличные/переводы)
-    total_amount: int = round(expenses["amount"].sum()) + round(cash_and_transfers["amount"].sum())
+    # Суммируем общие расходы (обычные + наличные/переводы) в копейках, чтобы итог не зависел от порядка строк
+    total_amount: int = round(_to_kopecks(expenses["amount"]).sum() / 100) + round(
+        _to_kopecks(cash_and_transfers["amount"]).sum() / 100
+    )
 
-    # Анализ расходов по категориям (топ-7)
+    # Анализ расходов по категориям (топ-top_n)
     if len(expenses) == 0:
         logger.info("Расходы по категориям не найдены")
         expenses_by_categories: list = []
     else:
         # Группируем по категориям, суммируем и сортируем по убыванию
         grouped_expenses: pd.DataFrame = (
-            expenses.groupby(["category"])["amount"].sum().round().sort_values(ascending=False).reset_index()
+            (_to_kopecks(expenses["amount"]).groupby(expenses["category"], observed=True).sum() / 100)
+            .round()
+            .sort_values(ascending=False)
+            .reset_index()
         )
-        # Берем топ-7 категорий
-        expenses_by_categories: list[dict] = grouped_expenses.iloc[:7].to_dict(orient="records")
+        # Берем топ-top_n категорий
+        expenses_by_categories: list[dict] = grouped_expenses.iloc[:top_n].to_dict(orient="records")
         # Если есть еще категории - объединяем в 'Остальное'
-        if len(expenses_by_categories) == 7:
-            expenses_in_other_category: int = grouped_expenses.iloc[7:]["amount"].sum()
+        if len(expenses_by_categories) == top_n:
+            expenses_in_other_category: int = grouped_expenses.iloc[top_n:]["amount"].sum()
             if expenses_in_other_category > 0:
                 expenses_by_categories.append({"category": "Остальное", "amount": expenses_in_other_category})
 
@@ -93,25 +231,44 @@ def get_expenses(operation: pd.DataFrame) -> str:
     else:
         # Группируем и сортируем наличные/переводы
         grouped_cash_and_transfers: pd.DataFrame = (
-            cash_and_transfers.groupby(["category"])["amount"].sum().round().sort_values(ascending=False).reset_index()
+            (
+                _to_kopecks(cash_and_transfers["amount"]).groupby(cash_and_transfers["category"], observed=True).sum()
+                / 100
+            )
+            .round()
+            .sort_values(ascending=False)
+            .reset_index()
         )
         result_cash_and_transfers: list[dict] = grouped_cash_and_transfers.to_dict(orient="records")
 
-    # Формируем итоговый JSON с красивым форматированием
-    return json.dumps(
-        {
-            "expenses": {
-                "total_amount": total_amount,  # Общая сумма расходов
-                "main": expenses_by_categories,  # Топ-7 категорий
-                "transfers_and_cash": result_cash_and_transfers,  # Наличные и переводы
-            }
-        }, ensure_ascii=False, indent=4
-    )
+    # Формируем итоговый словарь
+    return {
+        "expenses": {
+            "total_amount": total_amount,  # Общая сумма расходов
+            "main": expenses_by_categories,  # Топ-top_n категорий
+            "transfers_and_cash": result_cash_and_transfers,  # Наличные и переводы
+        }
+    }
 
 
-def get_income(operation: pd.DataFrame) -> str:
+def get_expenses(operation: pd.DataFrame, top_n: int = EXPENSES_TOP_N) -> str:
     """
-    Анализирует поступления (доходы) из DataFrame операций и возвращает структурированные данные в формате JSON.
+    Анализирует расходы из DataFrame операций и возвращает структурированные данные в формате JSON.
+
+    Принимает:
+        operation (pd.DataFrame): DataFrame с операциями (см. get_expenses_dict)
+        top_n (int): Число категорий в топе (по умолчанию 7)
+
+    Возвращает:
+        str: Результат get_expenses_dict в виде JSON-строки с отступами
+    """
+    return dumps(get_expenses_dict(operation, top_n))
+
+
+@timed("utils.get_income_dict")
+def get_income_dict(operation: pd.DataFrame) -> dict:
+    """
+    Анализирует поступления (доходы) из DataFrame операций и возвращает структурированные данные в виде словаря.
 
     Функция обрабатывает операции с категорией "Пополнения" и возвращает:
     1. Общую сумму всех поступлений
@@ -122,7 +279,7 @@ def get_income(operation: pd.DataFrame) -> str:
                                'Категория', 'Описание', 'Сумма операции с округлением'
 
     Возвращает:
-        str: JSON-строка с данными о поступлениях в формате:
+        dict: Словарь с данными о поступлениях в формате:
             {
                 "income": {
                     "total_amount": общая сумма поступлений,
@@ -133,7 +290,6 @@ def get_income(operation: pd.DataFrame) -> str:
     Особенности:
         - Использует поле 'Описание' как категорию для классификации поступлений
         - Все суммы округляются до целых чисел
-        - Возвращает JSON с отступами для удобного чтения
     """
     # Переименование колонок для удобства обработки
     operation = operation.rename(
@@ -146,8 +302,8 @@ def get_income(operation: pd.DataFrame) -> str:
     # Фильтруем только операции пополнения (доходы)
     income: pd.DataFrame = operation.loc[operation["Категория"] == "Пополнения"]
 
-    # Считаем общую сумму всех поступлений с округлением
-    total_amount: int = round(income["amount"].sum())
+    # Считаем общую сумму всех поступлений в копейках с округлением
+    total_amount: int = round(_to_kopecks(income["amount"]).sum() / 100)
 
     # Анализ поступлений по категориям (из поля Описание)
     if len(income) == 0:
@@ -156,23 +312,464 @@ def get_income(operation: pd.DataFrame) -> str:
     else:
         # Группируем по категориям, суммируем суммы, сортируем по убыванию
         grouped_income: pd.DataFrame = (
-            income.groupby(["category"])["amount"].sum().round().sort_values(ascending=False).reset_index()
+            (_to_kopecks(income["amount"]).groupby(income["category"], observed=True).sum() / 100)
+            .round()
+            .sort_values(ascending=False)
+            .reset_index()
         )
         # Конвертируем в список словарей
         income_by_categories: list[dict] = grouped_income.to_dict(orient="records")
 
-    # Формируем итоговый JSON с отступами
-    return json.dumps(
-        {
-            "income": {
-                "total_amount": total_amount,  # Общая сумма доходов
-                "main": income_by_categories,  # Детализация по категориям
+    # Формируем итоговый словарь
+    return {
+        "income": {
+            "total_amount": total_amount,  # Общая сумма доходов
+            "main": income_by_categories,  # Детализация по категориям
+        }
+    }
+
+
+def get_income(operation: pd.DataFrame) -> str:
+    """
+    Анализирует поступления (доходы) из DataFrame операций и возвращает структурированные данные в формате JSON.
+
+    Принимает:
+        operation (pd.DataFrame): DataFrame с операциями (см. get_income_dict)
+
+    Возвращает:
+        str: Результат get_income_dict в виде JSON-строки с отступами
+    """
+    return dumps(get_income_dict(operation))
+
+
+def _grouped_records(amounts: pd.Series) -> list[dict]:
+    """Возвращает суммы по группам в виде записей {"category", "amount"}"""
+    return amounts.rename("amount").reset_index().to_dict(orient="records")
+
+
+@timed("utils.aggregate_operations")
+def aggregate_operations(operation: pd.DataFrame, top_n: int = EXPENSES_TOP_N) -> dict:
+    """
+    Считает расходы и поступления за один проход по операциям.
+
+    Результат совпадает с {**get_expenses_dict(operation, top_n), **get_income_dict(operation)}, но категории
+    кодируются один раз (pd.factorize), суммы по всем категориям считаются одним groupby,
+    а итоговые суммы - по маскам строк без копирования DataFrame. Суммы складываются в целых копейках,
+    поэтому результат не зависит от порядка строк.
+
+    Принимает:
+        operation (pd.DataFrame): DataFrame с операциями, должен содержать колонки:
+                                'Категория', 'Описание', 'Сумма операции', 'Сумма операции с округлением'
+        top_n (int): Число категорий расходов в топе (по умолчанию 7)
+
+    Возвращает:
+        dict: Словарь с ключами "expenses" и "income" в формате get_expenses_dict и get_income_dict
+    """
+    record_rows("utils.aggregate_operations", len(operation))
+    category: pd.Series = operation["Категория"].rename("category")
+    amount: pd.Series = _to_kopecks(operation["Сумма операции с округлением"])
+
+    # Коды категорий (пропуск - отдельный код, как и в isin) и признаки категорий по кодам
+    codes, uniques = pd.factorize(category, use_na_sentinel=False)
+    uniques = pd.Index(uniques)
+    is_cash_and_transfers_category = uniques.isin(CASH_AND_TRANSFERS_CATEGORIES)
+    cash_and_transfers_mask = is_cash_and_transfers_category[codes]
+
+    # Категория считается категорией расходов, если в ней есть операция с отрицательной суммой
+    negative_mask = (operation["Сумма операции"] < 0).to_numpy()
+    is_expenses_category = np.zeros(len(uniques), dtype=bool)
+    is_expenses_category[codes[negative_mask & ~cash_and_transfers_mask]] = True
+    expenses_mask = is_expenses_category[codes]
+
+    total_amount: int = round(amount[expenses_mask].sum() / 100) + round(amount[cash_and_transfers_mask].sum() / 100)
+
+    # Суммы по всем категориям одним groupby
+    by_category: pd.Series = amount.groupby(category, observed=True).sum() / 100
+
+    if not expenses_mask.any():
+        logger.info("Расходы по категориям не найдены")
+        expenses_by_categories: list = []
+    else:
+        grouped_expenses: pd.Series = (
+            by_category.loc[by_category.index.isin(uniques[is_expenses_category])]
+            .round()
+            .sort_values(ascending=False)
+        )
+        expenses_by_categories = _grouped_records(grouped_expenses.iloc[:top_n])
+        if len(expenses_by_categories) == top_n:
+            expenses_in_other_category = grouped_expenses.iloc[top_n:].sum()
+            if expenses_in_other_category > 0:
+                expenses_by_categories.append({"category": "Остальное", "amount": expenses_in_other_category})
+
+    if not cash_and_transfers_mask.any():
+        logger.info("Переводы и наличные не найдены")
+        result_cash_and_transfers: list = []
+    else:
+        result_cash_and_transfers = _grouped_records(
+            by_category.loc[by_category.index.isin(uniques[is_cash_and_transfers_category])]
+            .round()
+            .sort_values(ascending=False)
+        )
+
+    # Поступления: описание операции используется как категория
+    income_mask = (operation["Категория"] == "Пополнения").to_numpy()
+    income_amount: pd.Series = amount[income_mask]
+    if not income_mask.any():
+        logger.info("Поступления по категориям не найдены")
+        income_by_categories: list = []
+    else:
+        income_by_categories = _grouped_records(
+            (income_amount.groupby(operation["Описание"][income_mask].rename("category"), observed=True).sum() / 100)
+            .round()
+            .sort_values(ascending=False)
+        )
+
+    return {
+        "expenses": {
+            "total_amount": total_amount,
+            "main": expenses_by_categories,
+            "transfers_and_cash": result_cash_and_transfers,
+        },
+        "income": {
+            "total_amount": round(income_amount.sum() / 100),
+            "main": income_by_categories,
+        },
+    }
+
+
+class OperationsAggregateState:
+    """
+    Накопленные суммы операций по дням для расчёта get_expenses и get_income без пересчёта истории.
+
+    Для каждого дня хранятся сумма (в копейках), число операций и число операций с отрицательной суммой
+    по каждой категории, а для категории 'Пополнения' - по каждому источнику поступлений ('Описание').
+    Пакеты новых операций и исправления учитываются за время, пропорциональное размеру пакета.
+    Результаты за период считаются по накопленным суммам: aggregate_operations получает одну строку
+    на категорию (источник поступлений), а не исходные операции.
+
+    Принимает:
+        operation (Optional[pd.DataFrame]): Начальные операции. Должны содержать колонки 'Дата операции',
+                                            'Категория', 'Описание', 'Сумма операции',
+                                            'Сумма операции с округлением'
+
+    Особенности:
+        - Границы периода - дни (включительно), время операции не учитывается
+        - Операции без даты не учитываются
+        - Суммы хранятся в копейках и складываются точно. Результат совпадает с get_expenses_dict
+          и get_income_dict по операциям периода
+        - Не потокобезопасен: изменения и запросы из разных потоков нужно синхронизировать
+    """
+
+    def __init__(self, operation: Optional[pd.DataFrame] = None) -> None:
+        # День (число дней от 1970-01-01) -> (категория, источник поступлений) -> [копейки, операции, расходы]
+        self._days: dict[int, dict[tuple, list[int]]] = {}
+        self._sorted_days: list[int] = []
+        if operation is not None:
+            self.add(operation)
+
+    def __len__(self) -> int:
+        """Число дней с операциями"""
+        return len(self._sorted_days)
+
+    @staticmethod
+    def _group(operation: pd.DataFrame) -> list[tuple]:
+        """Группирует пакет операций: [(день, (категория, источник), копейки, операции, расходы), ...]"""
+        if not isinstance(operation, pd.DataFrame):
+            logger.critical("Ошибка: Транзакции переданы в типе %s", type(operation))
+            raise TypeError("Транзакции должны быть переданы в виде pandas DataFrame")
+
+        dates = operation["Дата операции"]
+        if not pd.api.types.is_datetime64_dtype(dates):
+            dates = pd.to_datetime(dates, dayfirst=True)
+        days = dates.to_numpy(dtype="datetime64[D]")
+        has_date = ~np.isnat(days)
+        if not has_date.all():
+            logger.warning("Операции без даты не учтены: %s", int((~has_date).sum()))
+
+        category = operation["Категория"].to_numpy(dtype=object)
+        # Источник поступлений нужен только для категории 'Пополнения'
+        source = np.where(category == "Пополнения", operation["Описание"].to_numpy(dtype=object), None)
+        amount = operation["Сумма операции с округлением"].to_numpy(dtype=float)
+
+        batch = pd.DataFrame(
+            {
+                "day": days[has_date].astype(np.int64),
+                "category": category[has_date],
+                "source": source[has_date],
+                "amount": np.round(np.nan_to_num(amount[has_date]) * 100).astype(np.int64),
+                "negative": (operation["Сумма операции"].to_numpy(dtype=float)[has_date] < 0).astype(np.int64),
             }
-        }, ensure_ascii=False, indent=4
-    )
+        )
+        grouped = (
+            batch.groupby(["day", "category", "source"], dropna=False, sort=False)
+            .agg(amount=("amount", "sum"), rows=("amount", "size"), negative=("negative", "sum"))
+        )
+        return [
+            (int(day), (None if pd.isna(category_) else category_, None if pd.isna(source_) else source_),
+             int(amount_), int(rows), int(negative))
+            for (day, category_, source_), amount_, rows, negative in grouped.itertuples(name=None)
+        ]
 
+    def add(self, operation: pd.DataFrame) -> None:
+        """
+        Учитывает пакет новых операций.
 
-def get_currency_rates(currencies: list) -> str:
+        Исключения:
+            TypeError: Если транзакции переданы не в виде pandas DataFrame
+        """
+        for day, key, amount, rows, negative in self._group(operation):
+            day_sums = self._days.get(day)
+            if day_sums is None:
+                day_sums = self._days[day] = {}
+                bisect.insort(self._sorted_days, day)
+            sums = day_sums.setdefault(key, [0, 0, 0])
+            sums[0] += amount
+            sums[1] += rows
+            sums[2] += negative
+
+    def remove(self, operation: pd.DataFrame) -> None:
+        """
+        Исключает ранее учтённые операции. Исправление операции - remove старой версии и add новой.
+
+        Исключения:
+            TypeError: Если транзакции переданы не в виде pandas DataFrame
+            ValueError: Если среди операций есть не учтённые ранее (состояние при этом не меняется)
+        """
+        groups = self._group(operation)
+        for day, key, amount, rows, negative in groups:
+            sums = self._days.get(day, {}).get(key)
+            if sums is None or sums[1] < rows or sums[2] < negative:
+                logger.critical("Ошибка: Операции категории %s за день %s не были учтены", key[0], day)
+                raise ValueError("Исключаемые операции не были учтены ранее")
+
+        for day, key, amount, rows, negative in groups:
+            day_sums = self._days[day]
+            sums = day_sums[key]
+            sums[0] -= amount
+            sums[1] -= rows
+            sums[2] -= negative
+            if sums[1] == 0:
+                del day_sums[key]
+                if not day_sums:
+                    del self._days[day]
+                    del self._sorted_days[bisect.bisect_left(self._sorted_days, day)]
+
+    def _period_totals(self, start: Any, end: Any) -> pd.DataFrame:
+        """Суммирует дни периода: по строке на категорию (источник поступлений) в формате файла операций"""
+        first = 0
+        last = len(self._sorted_days)
+        if start is not None:
+            first = bisect.bisect_left(self._sorted_days, _day_number(start))
+        if end is not None:
+            last = bisect.bisect_right(self._sorted_days, _day_number(end))
+
+        totals: dict[tuple, list[int]] = {}
+        for day in self._sorted_days[first:last]:
+            for key, (amount, _, negative) in self._days[day].items():
+                key_totals = totals.setdefault(key, [0, 0])
+                key_totals[0] += amount
+                key_totals[1] += negative
+
+        keys = list(totals)
+        return pd.DataFrame(
+            {
+                "Категория": [np.nan if category is None else category for category, _ in keys],
+                "Описание": [np.nan if source is None else source for _, source in keys],
+                # Знак суммы нужен только для признака категории расходов
+                "Сумма операции": [-1.0 if totals[key][1] else 0.0 for key in keys],
+                "Сумма операции с округлением": [totals[key][0] / 100 for key in keys],
+            }
+        )
+
+    def aggregate(self, start: Any = None, end: Any = None, top_n: int = EXPENSES_TOP_N) -> dict:
+        """
+        Возвращает расходы и поступления за период в формате aggregate_operations.
+
+        Принимает:
+            start: Первый день периода (строка 'YYYY-MM-DD', date или datetime). None - с первой операции
+            end: Последний день периода включительно. None - по последнюю операцию
+            top_n (int): Число категорий расходов в топе (по умолчанию 7)
+
+        Исключения:
+            ValueError: Если граница периода имеет неверный формат
+        """
+        return aggregate_operations(self._period_totals(start, end), top_n)
+
+    def expenses_dict(self, start: Any = None, end: Any = None, top_n: int = EXPENSES_TOP_N) -> dict:
+        """Возвращает расходы за период в формате get_expenses_dict"""
+        return {"expenses": self.aggregate(start, end, top_n)["expenses"]}
+
+    def income_dict(self, start: Any = None, end: Any = None) -> dict:
+        """Возвращает поступления за период в формате get_income_dict"""
+        return {"income": self.aggregate(start, end)["income"]}
+
+    def expenses(self, start: Any = None, end: Any = None, top_n: int = EXPENSES_TOP_N) -> str:
+        """Возвращает расходы за период в формате get_expenses (JSON-строка)"""
+        return dumps(self.expenses_dict(start, end, top_n))
+
+    def income(self, start: Any = None, end: Any = None) -> str:
+        """Возвращает поступления за период в формате get_income (JSON-строка)"""
+        return dumps(self.income_dict(start, end))
+
+
+def _day_number(value: Any) -> int:
+    """Возвращает номер дня (от 1970-01-01) для границы периода"""
+    try:
+        day = pd.Timestamp(value)
+    except (ValueError, TypeError):
+        logger.critical("Ошибка: Неверная граница периода %s", value)
+        raise ValueError("Граница периода должна быть датой в формате YYYY-MM-DD")
+    if pd.isna(day):
+        logger.critical("Ошибка: Неверная граница периода %s", value)
+        raise ValueError("Граница периода должна быть датой в формате YYYY-MM-DD")
+    return int(np.datetime64(day.date(), "D").astype(np.int64))
+
+
+def set_api_base_urls(currency_data_url: Optional[str] = None, marketstack_url: Optional[str] = None) -> None:
+    """
+    Переключает базовые URL провайдеров курсов валют и цен акций.
+
+    Принимает:
+        currency_data_url (Optional[str]): Базовый URL currency_data-api (без /currency_data)
+        marketstack_url (Optional[str]): Базовый URL marketstack-api (без /v1)
+
+    Особенности:
+        - Не переданный URL не меняется
+        - Используется для нагрузочного тестирования на локальном стенде src.stub_server
+    """
+    global currency_data_api_url, marketstack_api_url
+    _load_settings()
+
+    if currency_data_url is not None:
+        currency_data_api_url = currency_data_url.rstrip("/")
+    if marketstack_url is not None:
+        marketstack_api_url = marketstack_url.rstrip("/")
+
+
+def set_rate_limit_scheduler(scheduler: Optional[RateLimitScheduler]) -> None:
+    """Устанавливает планировщик квот запросов к провайдерам. None отключает ограничение"""
+    global rate_limit_scheduler
+    _load_settings()
+    rate_limit_scheduler = scheduler
+
+
+def set_market_data_max_age(max_age: Optional[float]) -> None:
+    """Устанавливает срок свежести данных в кэше в секундах. None - get_events всегда запрашивает провайдеров"""
+    global market_data_max_age
+    _load_settings()
+    market_data_max_age = max_age
+
+
+def get_fresh_market_data(section: str, params: list) -> Optional[CacheEntry]:
+    """Возвращает свежую запись кэша раздела или None, если её нет, она устарела или срок свежести не задан"""
+    _load_settings()
+    if market_data_max_age is None:
+        return None
+    entry = market_data_cache.get_fresh(section, params, market_data_max_age)
+    record_cache("market_data_fresh", entry is not None)
+    return entry
+
+
+def set_stock_price_store(store: Optional[StockPriceStore]) -> None:
+    """Устанавливает локальное хранилище цен акций для get_stock_prices. None - цены запрашиваются у API"""
+    global stock_price_store
+    _load_settings()
+    stock_price_store = store
+
+
+def _request_key(url: str, params: Optional[dict] = None, headers: Optional[dict] = None) -> str:
+    """Ключ запроса для объединения одинаковых одновременных запросов"""
+    return json.dumps([url, params or {}, headers or {}], sort_keys=True, default=str)
+
+
+def _http_get(provider: str, url: str, **kwargs: Any) -> requests.Response:
+    """Выполняет GET-запрос к провайдеру в рамках общей квоты, если она настроена"""
+    _load_settings()
+    with span("utils.http_get", provider=provider):
+        if rate_limit_scheduler is None:
+            return requests.get(url, **kwargs)
+
+        key = _request_key(url, kwargs.get("params"), kwargs.get("headers"))
+        return rate_limit_scheduler.call(provider, key, lambda: requests.get(url, **kwargs))
+
+
+def _validate_currencies(currencies: list) -> None:
+    """Проверяет список валют, переданный в функции получения курсов"""
+    if currencies is None:
+        logger.critical("Ошибка: Валюта не передана")
+        raise ValueError("Валюты не переданы")
+    elif isinstance(currencies, list):
+        if len(currencies) == 0:
+            logger.critical("Ошибка: Передан пустой список валют")
+            raise ValueError("Список валют пустой")
+    elif not isinstance(currencies, list):
+        logger.critical("Ошибка: Валюты переданы в типе %s", type(currencies))
+        raise TypeError("Валюты переданы не в списке")
+
+
+def _validate_stocks(stocks: list) -> None:
+    """Проверяет список тикеров, переданный в функции получения цен акций"""
+    if stocks is None:
+        logger.critical("Ошибка: Акции не переданы")
+        raise ValueError("Акции не переданы")
+    elif isinstance(stocks, list):
+        if len(stocks) == 0:
+            logger.critical("Ошибка: Передан пустой список акций")
+            raise ValueError("Список акций пустой")
+    elif not isinstance(stocks, list):
+        logger.critical("Ошибка: Акции переданы в типе %s", type(stocks))
+        raise TypeError("Акции переданы не в списке")
+
+
+def _build_currency_rate_url(currency: str, day_string: str) -> str:
+    """Формирует URL запроса курса валюты к RUB за указанный день"""
+    _load_settings()
+    domain = f"{currency_data_api_url}/currency_data/change?"
+    return f"{domain}start_date={day_string}&end_date={day_string}&currencies=RUB&source={currency}"
+
+
+def _parse_currency_rate(currency: str, content: dict) -> dict:
+    """Извлекает курс валюты к рублю из ответа currency_data-api"""
+    return {
+        "currency": currency,  # Код валюты (например, USD)
+        "rate": content.get("quotes", {}).get(f"{currency}RUB", {}).get("end_rate", 0.00),  # Курс к рублю
+    }
+
+
+def _build_stock_prices_request(stocks: list) -> tuple[str, dict]:
+    """Формирует URL и параметры запроса цен закрытия акций к marketstack-api"""
+    _load_settings()
+    # Определение даты для запроса (4 дня назад как запасной вариант)
+    day_ = datetime.datetime.now() - datetime.timedelta(days=4)
+    day_string = day_.strftime("%Y-%m-%d")
+
+    url = f"{marketstack_api_url}/v1/eod?access_key={marketstack_api_key}"
+    querystring = {
+        "symbols": ",".join(stocks),  # Объединяем тикеры через запятую
+        "date_from": day_string,  # Начальная дата периода
+        "date_to": day_string,  # Конечная дата периода (та же дата)
+    }
+    return url, querystring
+
+
+def _parse_stock_prices(content: dict) -> list[dict]:
+    """Извлекает цены закрытия акций из ответа marketstack-api"""
+    # Проверка наличия ключа 'data' в ответе
+    if "data" not in content:
+        logger.critical('Ошибка: В ответе нет ключа "data"')
+        raise ValueError("В ответе нет ключа data. Проверьте ответ от API")
+
+    return [
+        {
+            "stock": content["data"][i]["symbol"],  # Тикер акции
+            "price": content["data"][i]["close"],  # Цена закрытия
+        }
+        for i in range(len(content["data"]))
+        if "symbol" in content["data"][i] and "close" in content["data"][i]  # Проверка наличия ключей
+    ]
+
+
+def get_currency_rates_dict(currencies: list) -> dict:
     """
     Получает текущие курсы валют относительно RUB (российского рубля) через внешний API.
 
@@ -183,7 +780,7 @@ def get_currency_rates(currencies: list) -> str:
         currencies (list): Список валютных кодов (например, ["USD", "EUR"]), для которых нужно получить курс
 
     Возвращает:
-        str: JSON-строка с курсами валют в формате:
+        dict: Словарь с курсами валют в формате:
             {
                 "currency_rates": [
                     {
@@ -204,19 +801,10 @@ def get_currency_rates(currencies: list) -> str:
         - Использует API apilayer.com для получения курсов валют
         - Запрашивает курс на текущую дату
         - Возвращает курс относительно RUB (российского рубля)
-        - Форматирует вывод с отступами для удобного чтения
     """
+    _load_settings()
     # Валидация входных данных
-    if currencies is None:
-        logger.critical("Ошибка: Валюта не передана")
-        raise ValueError("Валюты не переданы")
-    elif isinstance(currencies, list):
-        if len(currencies) == 0:
-            logger.critical("Ошибка: Передан пустой список валют")
-            raise ValueError("Список валют пустой")
-    elif not isinstance(currencies, list):
-        logger.critical(f"Ошибка: Валюты переданы в типе {type(currencies)}")
-        raise TypeError("Валюты переданы не в списке")
+    _validate_currencies(currencies)
 
     # Инициализация списка для хранения результатов
     currency_rates: list = []
@@ -228,57 +816,48 @@ def get_currency_rates(currencies: list) -> str:
     # Запрос курса для каждой валюты из списка
     for currency in currencies:
         # Формирование URL для API запроса
-        domain = "https://api.apilayer.com/currency_data/change?"
-        url = f"{domain}start_date={current_day_string}&end_date={current_day_string}&currencies=RUB&source={currency}"
+        url = _build_currency_rate_url(currency, current_day_string)
 
-        # Подготовка данных для запроса
-        payload = {}
-        headers = {"apikey": currency_data_api_key}  # API ключ должен быть определен где-то в коде
+        # Провайдер, который раз за разом отвечает ошибкой, пропускается без запроса (см. _get_provider_json)
+        content = _get_provider_json(
+            "currency_data", currency_data_breaker, url, headers={"apikey": currency_data_api_key}, data={}
+        )
+        currency_rates.append(_parse_currency_rate(currency, content))
 
-        try:
-            # Выполнение HTTP GET запроса
-            response = requests.get(url, headers=headers, data=payload)
-            response.raise_for_status()  # Проверка на ошибки HTTP
-            content = response.json()  # Парсинг JSON ответа
+    # Сохраняем курсы как последние известные
+    market_data_cache.put("currency_rates", currencies, currency_rates)
 
-        except requests.HTTPError as e:
-            # Обработка ошибок HTTP (404, 500 и т.д.)
-            logger.critical("Ошибка: HTTPError")
-            raise requests.HTTPError(
-                f"""Ошибка HTTP: {e}
-Причина: {response.reason}"""
-            )
+    return {"currency_rates": currency_rates}
 
-        except requests.exceptions.RequestException as e:
-            # Обработка других сетевых ошибок
-            logger.critical("Ошибка: Другие ошибки при get запросе")
-            raise requests.exceptions.RequestException(f"Ошибка: {e}")
 
-        else:
-            # Если запрос успешен, извлекаем курс из ответа
-            currency_rates.append(
-                {
-                    "currency": currency,  # Код валюты (например, USD)
-                    "rate": content.get("quotes", {}).get(f"{currency}RUB", {}).get("end_rate", 0.00),  # Курс к рублю
-                }
-            )
+def get_currency_rates(currencies: list) -> str:
+    """
+    Получает текущие курсы валют относительно RUB (российского рубля) через внешний API.
 
-    # Возвращаем результат в виде форматированного JSON
-    return json.dumps({"currency_rates": currency_rates}, ensure_ascii=False, indent=4)
+    Принимает:
+        currencies (list): Список валютных кодов (например, ["USD", "EUR"])
 
+    Возвращает:
+        str: Результат get_currency_rates_dict в виде JSON-строки с отступами
 
-def get_stock_prices(stocks: list) -> str:
+    Исключения:
+        См. get_currency_rates_dict
+    """
+    return dumps(get_currency_rates_dict(currencies))
+
+
+def get_stock_prices_dict(stocks: list) -> dict:
     """
     Получает текущие цены акций через API Marketstack.
 
     Функция запрашивает цены закрытия для указанных акций за последний торговый день
-    и возвращает их в формате JSON.
+    и возвращает их в виде словаря.
 
     Принимает:
         stocks (list): Список тикеров акций (например, ['AAPL', 'MSFT'])
 
     Возвращает:
-        str: JSON-строка с ценами акций в формате:
+        dict: Словарь с ценами акций в формате:
             {
                 "stock_prices": [
                     {
@@ -298,74 +877,427 @@ def get_stock_prices(stocks: list) -> str:
     Особенности:
         - Использует API marketstack.com для получения данных
         - Запрашивает цены закрытия за последний торговый день (с запасом в 4 дня)
-        - Возвращает данные с отступами для удобного чтения
+        - Если задано stock_price_store, берёт последнюю цену закрытия из локального хранилища,
+          дозагружая только бары после последнего сохранённого. Если провайдер недоступен,
+          возвращаются сохранённые цены тех акций, которые есть в хранилище
         - Логирует критические ошибки
     """
+    _load_settings()
     # Валидация входных параметров
-    if stocks is None:
-        logger.critical("Ошибка: Акции не переданы")
-        raise ValueError("Акции не переданы")
-    elif isinstance(stocks, list):
-        if len(stocks) == 0:
-            logger.critical("Ошибка: Передан пустой список акций")
-            raise ValueError("Список акций пустой")
-    elif not isinstance(stocks, list):
-        logger.critical(f"Ошибка: Акции переданы в типе {type(stocks)}")
-        raise TypeError("Акции переданы не в списке")
+    _validate_stocks(stocks)
+
+    # С локальным хранилищем у API запрашиваются только недостающие бары, а цена - последняя сохранённая
+    if stock_price_store is not None:
+        return {"stock_prices": _get_stock_prices_from_store(stock_price_store, stocks)}
 
     # Инициализация списка для хранения результатов
     stock_prices: list = []
 
-    # Определение даты для запроса (4 дня назад как запасной вариант)
-    day_ = datetime.datetime.now() - datetime.timedelta(days=4)
-    day_string = day_.strftime("%Y-%m-%d")
+    # Базовый URL API и параметры запроса
+    url, querystring = _build_stock_prices_request(stocks)
 
-    # Базовый URL API
-    url = f"https://api.marketstack.com/v1/eod?access_key={marketstack_api_key}"
+    # Провайдер, который раз за разом отвечает ошибкой, пропускается без запроса (см. _get_provider_json)
+    content = _get_provider_json("marketstack", marketstack_breaker, url, params=querystring)
+    stock_prices.extend(_parse_stock_prices(content))
+
+    # Сохраняем цены как последние известные
+    market_data_cache.put("stock_prices", stocks, stock_prices)
+
+    return {"stock_prices": stock_prices}
 
-    # Параметры запроса
-    querystring = {
-        "symbols": ",".join(stocks),  # Объединяем тикеры через запятую
-        "date_from": day_string,  # Начальная дата периода
-        "date_to": day_string,  # Конечная дата периода (та же дата)
-    }
 
+def _get_stock_prices_from_store(store: StockPriceStore, stocks: list) -> list[dict]:
+    """
+    Возвращает последние цены закрытия акций из локального хранилища, дозагрузив недостающие бары.
+
+    Исключения:
+        requests.exceptions.RequestException, ValueError: Если провайдер недоступен,
+            а в хранилище нет ни одной из акций
+    """
+    _load_settings()
     try:
-        # Выполнение GET-запроса с параметрами
-        response = requests.get(url, params=querystring)
+        store.update(stocks)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if all(store.latest_close(stock) is None for stock in stocks):
+            raise
+        # Сохранённые цены не кладутся в market_data_cache: иначе они считались бы только что полученными
+        logger.warning("Цены акций %s не обновлены, используются сохранённые: %s", stocks, e)
+        return _latest_store_prices(store, stocks)
+
+    stock_prices = _latest_store_prices(store, stocks)
+    market_data_cache.put("stock_prices", stocks, stock_prices)
+    return stock_prices
+
+
+def _latest_store_prices(store: StockPriceStore, stocks: list) -> list[dict]:
+    """Последние сохранённые цены акций, которые есть в хранилище"""
+    return [
+        {"stock": stock, "price": latest[1]} for stock in stocks if (latest := store.latest_close(stock)) is not None
+    ]
+
+
+def get_stock_prices(stocks: list) -> str:
+    """
+    Получает текущие цены акций через API Marketstack.
+
+    Принимает:
+        stocks (list): Список тикеров акций (например, ['AAPL', 'MSFT'])
+
+    Возвращает:
+        str: Результат get_stock_prices_dict в виде JSON-строки с отступами
+
+    Исключения:
+        См. get_stock_prices_dict
+    """
+    return dumps(get_stock_prices_dict(stocks))
+
+
+def _get_provider_json(provider: str, breaker: CircuitBreaker, url: str, **kwargs: Any) -> dict:
+    """Выполняет GET-запрос к провайдеру с учётом circuit breaker и квоты и возвращает JSON ответа"""
+    breaker.before_call()
+
+    try:
+        response = _http_get(provider, url, **kwargs)
         response.raise_for_status()  # Проверка на ошибки HTTP
-        content = response.json()  # Парсинг JSON-ответа
+        content = response.json()  # Парсинг JSON ответа
 
     except requests.HTTPError as e:
-        # Обработка HTTP-ошибок (404, 500 и т.д.)
+        # Обработка ошибок HTTP (404, 500 и т.д.)
+        breaker.record_failure()
         logger.critical("Ошибка: HTTPError")
         raise requests.HTTPError(
             f"""Ошибка HTTP: {e}
-        Причина: {response.reason}"""
+Причина: {response.reason}"""
         )
 
     except requests.exceptions.RequestException as e:
         # Обработка других сетевых ошибок
+        breaker.record_failure()
         logger.critical("Ошибка: Другие ошибки при get запросе")
         raise requests.exceptions.RequestException(f"Ошибка: {e}")
 
-    else:
-        # Проверка наличия ключа 'data' в ответе
+    except BaseException:
+        # Прочие ошибки (квота, прерывание) не говорят о провайдере, но пробный запрос завершён
+        breaker.record_cancelled()
+        raise
+
+    breaker.record_success()
+    return content
+
+
+def get_currency_rate_history(currency: str, start_date: str, end_date: str) -> list[dict]:
+    """
+    Получает дневные курсы валюты к RUB за период одним запросом timeframe к currency_data-api.
+
+    Принимает:
+        currency (str): Код валюты (например, "USD")
+        start_date (str): Начало периода в формате YYYY-MM-DD
+        end_date (str): Конец периода в формате YYYY-MM-DD (период не длиннее CURRENCY_TIMEFRAME_MAX_DAYS дней)
+
+    Возвращает:
+        list[dict]: Курсы по дням, отсортированные по дате:
+            [{"date": "2025-07-01", "rate": 78.5}, ...]
+
+    Исключения:
+        ValueError: Если период длиннее CURRENCY_TIMEFRAME_MAX_DAYS дней или в ответе нет ключа 'quotes'
+        requests.HTTPError: При ошибках HTTP-запроса к API
+        requests.exceptions.RequestException: При других ошибках сетевого запроса
+    """
+    _load_settings()
+    start = datetime.date.fromisoformat(start_date)
+    end = datetime.date.fromisoformat(end_date)
+    if not 0 <= (end - start).days < CURRENCY_TIMEFRAME_MAX_DAYS:
+        logger.critical("Ошибка: Неверный период истории курсов %s - %s", start_date, end_date)
+        raise ValueError(f"Период должен быть от 1 до {CURRENCY_TIMEFRAME_MAX_DAYS} дней")
+
+    url = f"{currency_data_api_url}/currency_data/timeframe"
+    querystring = {"start_date": start_date, "end_date": end_date, "currencies": "RUB", "source": currency}
+    content = _get_provider_json(
+        "currency_data", currency_data_breaker, url, params=querystring, headers={"apikey": currency_data_api_key}
+    )
+
+    if "quotes" not in content:
+        logger.critical('Ошибка: В ответе нет ключа "quotes"')
+        raise ValueError("В ответе нет ключа quotes. Проверьте ответ от API")
+
+    return [
+        {"date": day, "rate": quotes[f"{currency}RUB"]}
+        for day, quotes in sorted(content["quotes"].items())
+        if f"{currency}RUB" in quotes
+    ]
+
+
+def get_stock_price_history(stocks: list, date_from: str, date_to: str) -> list[dict]:
+    """
+    Получает цены закрытия нескольких акций за период одним запросом к marketstack-api.
+
+    Если баров больше, чем MARKETSTACK_PAGE_LIMIT, ответ дочитывается постранично через offset.
+
+    Принимает:
+        stocks (list): Список тикеров акций (например, ['AAPL', 'MSFT'])
+        date_from (str): Начало периода в формате YYYY-MM-DD
+        date_to (str): Конец периода в формате YYYY-MM-DD
+
+    Возвращает:
+        list[dict]: Бары в формате [{"symbol": "AAPL", "date": "2025-07-01", "close": 150.5}, ...]
+
+    Исключения:
+        ValueError: Если передан пустой список акций или None, либо если в ответе API нет ключа 'data'
+        TypeError: Если акции переданы не в виде списка
+        requests.HTTPError: При ошибках HTTP-запроса к API
+        requests.exceptions.RequestException: При других ошибках сетевого запроса
+    """
+    _load_settings()
+    _validate_stocks(stocks)
+
+    url = f"{marketstack_api_url}/v1/eod?access_key={marketstack_api_key}"
+    bars: list = []
+    offset = 0
+    while True:
+        querystring = {
+            "symbols": ",".join(stocks),
+            "date_from": date_from,
+            "date_to": date_to,
+            "limit": MARKETSTACK_PAGE_LIMIT,
+            "offset": offset,
+        }
+        content = _get_provider_json("marketstack", marketstack_breaker, url, params=querystring)
+
         if "data" not in content:
             logger.critical('Ошибка: В ответе нет ключа "data"')
             raise ValueError("В ответе нет ключа data. Проверьте ответ от API")
 
-        # Формирование списка цен акций из ответа API
-        stock_prices.extend(
-            [
-                {
-                    "stock": content["data"][i]["symbol"],  # Тикер акции
-                    "price": content["data"][i]["close"],  # Цена закрытия
-                }
-                for i in range(len(content["data"]))
-                if "symbol" in content["data"][i] and "close" in content["data"][i]  # Проверка наличия ключей
-            ]
-        )
+        page = [
+            {"symbol": bar["symbol"], "date": bar["date"][:10], "close": bar["close"]}
+            for bar in content["data"]
+            if "symbol" in bar and "date" in bar and "close" in bar
+        ]
+        bars.extend(page)
+
+        # Без блока pagination считаем ответ единственной страницей
+        total = content.get("pagination", {}).get("total", 0)
+        offset += len(content["data"])
+        if not content["data"] or offset >= total:
+            return bars
+
+
+class AsyncMarketDataClient:
+    """
+    Общий асинхронный HTTP-клиент для запросов к API курсов валют и цен акций.
+
+    Один экземпляр разделяется между корутинами: держит пул соединений httpx.AsyncClient
+    и семафор, который ограничивает число одновременных запросов к внешним API.
+
+    Принимает:
+        max_concurrency (int): Максимальное число одновременных запросов
+        timeout (float): Таймаут одного запроса в секундах
+        transport (Optional[httpx.AsyncBaseTransport]): Транспорт httpx (используется в тестах)
+
+    Особенности:
+        - Используется как асинхронный контекстный менеджер: async with AsyncMarketDataClient() as client
+        - Ошибки httpx приводятся к исключениям requests, как в синхронных функциях
+        - httpx импортируется при создании первого клиента, а не при импорте модуля
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+        timeout: float = ASYNC_REQUEST_TIMEOUT,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("Число одновременных запросов должно быть больше 0")
+
+        # httpx нужен только асинхронному пути: импортируется при создании первого клиента
+        import httpx
+
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(timeout), transport=transport)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self) -> "AsyncMarketDataClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Закрывает пул соединений клиента"""
+        await self._client.aclose()
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        provider: Optional[str] = None,
+    ) -> dict:
+        """
+        Выполняет GET-запрос с учётом ограничения одновременных запросов и возвращает JSON ответа.
+
+        Если передан breaker, результат запроса учитывается в circuit breaker провайдера.
+        Если передан provider и настроен rate_limit_scheduler, запрос выполняется в рамках квоты провайдера.
+
+        Исключения:
+            CircuitOpenError: Если circuit breaker провайдера разомкнут
+            requests.HTTPError: При ошибках HTTP (4xx, 5xx)
+            requests.exceptions.Timeout: При превышении таймаута запроса
+            requests.exceptions.RequestException: При других ошибках сетевого запроса
+        """
+        # Как и requests, не отправляем заголовки без значения (например, если API-ключ не задан)
+        headers = {key: value for key, value in (headers or {}).items() if value is not None}
+
+        async with self._semaphore:
+            if breaker is None:
+                return await self._get_json(url, params, headers, provider)
+
+            breaker.before_call()
+            try:
+                content = await self._get_json(url, params, headers, provider)
+            except requests.exceptions.RequestException:
+                breaker.record_failure()
+                raise
+            except BaseException:
+                breaker.record_cancelled()
+                raise
+            breaker.record_success()
+            return content
+
+    async def _get_json(self, url: str, params: Optional[dict], headers: dict, provider: Optional[str]) -> dict:
+        """Выполняет GET-запрос и приводит ошибки httpx к исключениям requests"""
+        _load_settings()
+        import httpx
+
+        try:
+            with span("utils.http_get_async", provider=provider):
+                if rate_limit_scheduler is None or provider is None:
+                    response = await self._client.get(url, params=params, headers=headers)
+                else:
+                    response = await rate_limit_scheduler.call_async(
+                        provider,
+                        _request_key(url, params, headers),
+                        lambda: self._client.get(url, params=params, headers=headers),
+                    )
+            response.raise_for_status()  # Проверка на ошибки HTTP
+            return response.json()  # Парсинг JSON ответа
+
+        except httpx.HTTPStatusError as e:
+            # Обработка ошибок HTTP (404, 500 и т.д.)
+            logger.critical("Ошибка: HTTPError")
+            raise requests.HTTPError(
+                f"""Ошибка HTTP: {e}
+Причина: {e.response.reason_phrase}"""
+            )
+
+        except httpx.TimeoutException as e:
+            # Запрос не уложился в таймаут
+            logger.critical("Ошибка: Превышен таймаут get запроса")
+            raise requests.exceptions.Timeout(f"Ошибка: {e}")
+
+        except httpx.HTTPError as e:
+            # Обработка других сетевых ошибок
+            logger.critical("Ошибка: Другие ошибки при get запросе")
+            raise requests.exceptions.RequestException(f"Ошибка: {e}")
+
+
+async def gather_or_cancel(*aws: Awaitable) -> list:
+    """Ожидает корутины конкурентно. При первой ошибке отменяет оставшиеся и пробрасывает исключение"""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def get_currency_rates_dict_async(currencies: list, client: Optional[AsyncMarketDataClient] = None) -> dict:
+    """
+    Асинхронный аналог get_currency_rates_dict: запрашивает курсы всех валют конкурентно.
+
+    Принимает:
+        currencies (list): Список валютных кодов (например, ["USD", "EUR"])
+        client (Optional[AsyncMarketDataClient]): Общий асинхронный клиент. Если не передан,
+                                                  создаётся временный клиент на время вызова
+
+    Возвращает:
+        dict: Словарь в том же формате, что и get_currency_rates_dict
+
+    Исключения:
+        ValueError, TypeError: При некорректном списке валют
+        requests.HTTPError, requests.exceptions.RequestException: При ошибках запроса.
+            Остальные запросы при этом отменяются
+    """
+    _load_settings()
+    _validate_currencies(currencies)
+
+    if client is None:
+        async with AsyncMarketDataClient() as own_client:
+            return await get_currency_rates_dict_async(currencies, own_client)
+
+    current_day_string = datetime.datetime.now().strftime("%Y-%m-%d")
+    headers = {"apikey": currency_data_api_key}
+
+    contents = await gather_or_cancel(
+        *[
+            client.get_json(
+                _build_currency_rate_url(currency, current_day_string),
+                headers=headers,
+                breaker=currency_data_breaker,
+                provider="currency_data",
+            )
+            for currency in currencies
+        ]
+    )
+    currency_rates = [_parse_currency_rate(currency, content) for currency, content in zip(currencies, contents)]
+    market_data_cache.put("currency_rates", currencies, currency_rates)
+
+    return {"currency_rates": currency_rates}
+
+
+async def get_currency_rates_async(currencies: list, client: Optional[AsyncMarketDataClient] = None) -> str:
+    """Асинхронный аналог get_currency_rates: результат get_currency_rates_dict_async в виде JSON-строки"""
+    return dumps(await get_currency_rates_dict_async(currencies, client))
+
+
+async def get_stock_prices_dict_async(stocks: list, client: Optional[AsyncMarketDataClient] = None) -> dict:
+    """
+    Асинхронный аналог get_stock_prices_dict. Если задано stock_price_store, цены, как и в синхронной
+    функции, берутся из локального хранилища.
+
+    Принимает:
+        stocks (list): Список тикеров акций (например, ['AAPL', 'MSFT'])
+        client (Optional[AsyncMarketDataClient]): Общий асинхронный клиент. Если не передан,
+                                                  создаётся временный клиент на время вызова
+
+    Возвращает:
+        dict: Словарь в том же формате, что и get_stock_prices_dict
+
+    Исключения:
+        ValueError, TypeError: При некорректном списке акций или ответе без ключа 'data'
+        requests.HTTPError, requests.exceptions.RequestException: При ошибках запроса
+    """
+    _load_settings()
+    _validate_stocks(stocks)
+
+    # Хранилище синхронное (файлы и requests), поэтому обращение к нему выполняется в потоке
+    store = stock_price_store
+    if store is not None:
+        return {"stock_prices": await asyncio.to_thread(_get_stock_prices_from_store, store, stocks)}
+
+    if client is None:
+        async with AsyncMarketDataClient() as own_client:
+            return await get_stock_prices_dict_async(stocks, own_client)
+
+    url, querystring = _build_stock_prices_request(stocks)
+    content = await client.get_json(url, params=querystring, breaker=marketstack_breaker, provider="marketstack")
+    stock_prices = _parse_stock_prices(content)
+    market_data_cache.put("stock_prices", stocks, stock_prices)
+
+    return {"stock_prices": stock_prices}
+
 
-    # Возврат результатов в виде форматированного JSON
-    return json.dumps({"stock_prices": stock_prices}, ensure_ascii=False, indent=4)
+async def get_stock_prices_async(stocks: list, client: Optional[AsyncMarketDataClient] = None) -> str:
+    """Асинхронный аналог get_stock_prices: результат get_stock_prices_dict_async в виде JSON-строки"""
+    return dumps(await get_stock_prices_dict_async(stocks, client))
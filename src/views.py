@@ -1,22 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
 import datetime
-import json
 import logging
-from typing import Optional
+import os
+import time
+from typing import TYPE_CHECKING, Any, Optional, Union
 
-import pandas as pd
+from src import utils
+from src.data import PreparedOperations
+from src.lazy_imports import lazy_import
+from src.metrics import record_cache, record_rows, span, timed
+from src.serialization import dumps
+from src.settings import load_user_settings
+from src.utils import (
+    AsyncMarketDataClient,
+    aggregate_operations,
+    get_currency_rates_dict,
+    get_currency_rates_dict_async,
+    get_fresh_market_data,
+    get_stock_prices_dict,
+    get_stock_prices_dict_async,
+)
 
-from src.utils import get_currency_rates, get_expenses, get_income, get_stock_prices
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import requests
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    requests = lazy_import("requests")
 
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-stream_handler = logging.StreamHandler()
-stream_formatter = logging.Formatter("%(asctime)s %(filename)s %(funcName)s %(levelname)s: %(message)s")
-stream_handler.setFormatter(stream_formatter)
-logger.addHandler(stream_handler)
 
+# Пул потоков для запросов к внешним API, которые выполняются параллельно с агрегацией операций.
+# Запросы, не уложившиеся в бюджет времени, завершаются в фоне и обновляют кэш рыночных данных
+_market_data_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-data")
+
+
+def _reset_market_data_executor() -> None:
+    """Создаёт новый пул в дочернем процессе: потоки пула родителя после fork не существуют"""
+    global _market_data_executor
+    _market_data_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="market-data")
+
+
+os.register_at_fork(after_in_child=_reset_market_data_executor)
+
+# Периоды get_events_batch с диапазоном дат
+_RANGE_PERIODS = ("W", "M", "Y")
+
+
+def _period_end_offset(period: str) -> Any:
+    """Смещение к последнему дню недели, месяца или года для get_events_batch с диапазоном дат"""
+    return {"W": pd.offsets.Week(weekday=6), "M": pd.offsets.MonthEnd(), "Y": pd.offsets.YearEnd()}[period]
 
-def get_events(operation: pd.DataFrame, date_: str, period: Optional[str] = "M") -> str:
-    """Функция возвращает агрегированные финансовые события за указанный период в формате JSON.
+
+def _market_data_errors() -> tuple:
+    """Ошибки провайдера, при которых раздел рыночных данных заменяется данными из кэша"""
+    return requests.exceptions.RequestException, ValueError, TypeError
+
+
+@timed("views.get_events_dict")
+def get_events_dict(
+    operation: Union[pd.DataFrame, PreparedOperations],
+    date_: str,
+    period: Optional[str] = "M",
+    timeout: Optional[float] = None,
+    settings: Optional[dict] = None,
+) -> dict:
+    """Функция возвращает агрегированные финансовые события за указанный период в виде словаря.
+
+    Результат get_events до сериализации в JSON: используется для экспорта разделов в Arrow
+    (src.arrow_export) без разбора JSON-строки.
 
     Собирает данные о:
     - Расходах
@@ -26,19 +83,390 @@ def get_events(operation: pd.DataFrame, date_: str, period: Optional[str] = "M")
     и объединяет их в единый JSON-объект.
 
     Принимает:
-        operation (pd.DataFrame): DataFrame с транзакциями, должен содержать колонку 'Дата операции'
+        operation (Union[pd.DataFrame, PreparedOperations]): DataFrame с транзакциями, должен содержать
+            колонку 'Дата операции', или операции, подготовленные src.data.prepare_operations
+            (тогда выборка периода - срез без прохода по всем операциям)
         date_ (str): Конечная дата периода в формате YYYY-MM-DD
         period (Optional[str], optional): Период для выборки данных. Варианты:
             "W" - неделя (на которой находится date_)
             "M" - месяц (по умолчанию)
             "Y" - год
             "ALL" - все данные до date_
+        timeout (Optional[float], optional): Бюджет времени на вызов в секундах. По умолчанию не ограничен
+        settings (Optional[dict], optional): Настройки с ключами "user_currencies" и "user_stocks".
+            По умолчанию берутся из user_settings.json через кэширующий src.settings.load_user_settings
 
     Возвращает:
-        str: JSON-строка с объединенными данными о событиях
+        dict: Объединенные данные о событиях. Ключ "market_data_status" содержит
+             статус разделов currency_rates и stock_prices:
+             "ok" - свежие данные от провайдера или из кэша, если они моложе utils.market_data_max_age
+                    (тогда с updated_at),
+             "stale" - провайдер не ответил вовремя или вернул ошибку, данные взяты из кэша (с updated_at),
+             "unavailable" - провайдер не ответил, а в кэше данных нет (раздел пустой)
 
     Исключение:
         ValueError: Если дата не передана или имеет неверный формат
+
+    Особенности:
+        - Расходы и доходы считаются локально и возвращаются всегда
+        - Запросы к API выполняются параллельно с агрегацией операций
+        - Если задан utils.market_data_max_age, свежие данные из кэша используются без запросов к API
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    # Фильтрация операций по периоду
+    with span("views.select_period", period=period):
+        operation = _select_period(operation, date_, period)
+    record_rows("views.select_period", len(operation))
+
+    # Пользовательские настройки по валютам и акциям (из памяти, без чтения файла на каждый вызов)
+    currencies_and_stocks: dict = settings if settings is not None else load_user_settings()
+
+    # Получение списка валют и акций из настроек
+    currencies: list = currencies_and_stocks.get("user_currencies", [])
+    stocks: list = currencies_and_stocks.get("user_stocks", [])
+
+    # Запросы к API запускаются до агрегации, чтобы выполняться параллельно с ней
+    market_sections = _start_market_sections(currencies, stocks)
+
+    # Расходы и доходы считаются за один проход по операциям
+    expenses_and_income: dict = aggregate_operations(operation)
+
+    # Ожидание рыночных данных, которые не успели загрузиться за время агрегации
+    with span("views.wait_market_data"):
+        market_data: dict = _finish_market_sections(market_sections, deadline)
+
+    # Объединение всех данных в один словарь
+    merged_events_data: dict = {**expenses_and_income, **market_data}
+
+    return merged_events_data
+
+
+def get_events(
+    operation: Union[pd.DataFrame, PreparedOperations],
+    date_: str,
+    period: Optional[str] = "M",
+    timeout: Optional[float] = None,
+    settings: Optional[dict] = None,
+) -> str:
+    """Функция возвращает агрегированные финансовые события за указанный период в формате JSON.
+
+    Результат get_events_dict, сериализованный src.serialization.dumps (аргументы и исключения - те же).
+
+    Возвращает:
+        str: JSON-строка с объединенными данными о событиях (расходы, доходы, курсы валют, цены акций
+             и статус разделов рыночных данных "market_data_status")
+    """
+    return dumps(get_events_dict(operation, date_, period, timeout, settings))
+
+
+async def get_events_async(
+    operation: Union[pd.DataFrame, PreparedOperations],
+    date_: str,
+    period: Optional[str] = "M",
+    client: Optional[AsyncMarketDataClient] = None,
+    timeout: Optional[float] = None,
+    settings: Optional[dict] = None,
+) -> str:
+    """Асинхронный аналог get_events для встраивания в asyncio-сервисы.
+
+    Запросы курсов валют и цен акций выполняются конкурентно через общий асинхронный клиент,
+    а фильтрация и агрегация операций pandas - в пуле потоков по умолчанию, чтобы не блокировать цикл событий.
+
+    Принимает:
+        operation (Union[pd.DataFrame, PreparedOperations]): Операции, как в get_events
+        date_ (str): Конечная дата периода в формате YYYY-MM-DD
+        period (Optional[str], optional): Период для выборки данных ("W", "M", "Y", "ALL")
+        client (Optional[AsyncMarketDataClient]): Общий асинхронный клиент. Если не передан,
+                                                  создаётся временный клиент на время вызова
+        timeout (Optional[float], optional): Бюджет времени на вызов в секундах. Запросы к API,
+                                             не уложившиеся в бюджет, отменяются
+        settings (Optional[dict], optional): Настройки пользователя, как в get_events
+
+    Возвращает:
+        str: JSON-строка в том же формате, что и get_events
+
+    Исключение:
+        ValueError: Если дата не передана или имеет неверный формат
+    """
+    if client is None:
+        async with AsyncMarketDataClient() as own_client:
+            return await get_events_async(operation, date_, period, own_client, timeout, settings)
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    loop = asyncio.get_running_loop()
+
+    # Пользовательские настройки по валютам и акциям
+    currencies_and_stocks: dict = settings if settings is not None else load_user_settings()
+    currencies: list = currencies_and_stocks.get("user_currencies", [])
+    stocks: list = currencies_and_stocks.get("user_stocks", [])
+
+    # Фильтрация по периоду до запросов к API, чтобы неверная дата не порождала лишних запросов
+    operation = await loop.run_in_executor(None, _select_period, operation, date_, period)
+
+    # Свежие данные из кэша (например, загруженные src.prefetch) используются без запроса к API
+    currency_fresh = _fresh_market_section("currency_rates", currencies)
+    stock_fresh = _fresh_market_section("stock_prices", stocks)
+
+    # Агрегация операций в пуле потоков и запросы к API выполняются одновременно
+    currency_task = (
+        None if currency_fresh else asyncio.ensure_future(get_currency_rates_dict_async(currencies, client))
+    )
+    stock_task = None if stock_fresh else asyncio.ensure_future(get_stock_prices_dict_async(stocks, client))
+    tasks = [task for task in (currency_task, stock_task) if task is not None]
+    try:
+        expenses_and_income: dict = await loop.run_in_executor(None, aggregate_operations, operation)
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if tasks:
+            await asyncio.wait(tasks, timeout=remaining)
+    finally:
+        # Запросы, не уложившиеся в бюджет, отменяются
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    currency_rates, currency_status = currency_fresh or _market_section_from_task(
+        "currency_rates", currencies, currency_task
+    )
+    stock_rates, stock_status = stock_fresh or _market_section_from_task("stock_prices", stocks, stock_task)
+
+    # Объединение всех данных в один словарь
+    merged_events_data: dict = {
+        **expenses_and_income,
+        **currency_rates,
+        **stock_rates,
+        "market_data_status": {"currency_rates": currency_status, "stock_prices": stock_status},
+    }
+
+    return dumps(merged_events_data)
+
+
+def get_events_batch(
+    operation: Union[pd.DataFrame, PreparedOperations],
+    queries: Optional[list[tuple[str, str]]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    period: Optional[str] = "M",
+    timeout: Optional[float] = None,
+    settings: Optional[dict] = None,
+) -> str:
+    """Функция возвращает расходы и доходы за несколько периодов и рыночные данные одним вызовом в формате JSON.
+
+    Периоды задаются списком пар (дата, период) или диапазоном дат start - end с периодом period:
+    тогда берутся все недели, месяцы или годы, пересекающиеся с диапазоном, а датой каждого периода
+    считается его последний день (но не позже end).
+
+    Принимает:
+        operation (Union[pd.DataFrame, PreparedOperations]): Операции, как в get_events
+        queries (Optional[list[tuple[str, str]]]): Пары (конечная дата YYYY-MM-DD, период "W", "M", "Y" или "ALL")
+        start (Optional[str]): Начало диапазона дат в формате YYYY-MM-DD (если queries не переданы)
+        end (Optional[str]): Конец диапазона дат в формате YYYY-MM-DD (если queries не переданы)
+        period (Optional[str]): Период для диапазона дат: "W", "M" (по умолчанию) или "Y"
+        timeout (Optional[float], optional): Бюджет времени на рыночные данные в секундах
+        settings (Optional[dict], optional): Настройки пользователя, как в get_events
+
+    Возвращает:
+        str: JSON-строка вида
+            {
+                "events": [{"date": ..., "period": ..., "expenses": {...}, "income": {...}}, ...],
+                "currency_rates": [...],
+                "stock_prices": [...],
+                "market_data_status": {...}
+            }
+            Разделы expenses и income совпадают с результатом get_events для той же даты и периода
+
+    Исключение:
+        ValueError: Если не переданы ни queries, ни диапазон дат, если дата имеет неверный формат
+                    или период указан неверно
+
+    Особенности:
+        - Операции сортируются по дате один раз, срез каждого периода находится двоичным поиском
+        - Настройки пользователя читаются и рыночные данные запрашиваются один раз на весь пакет
+        - Переданный DataFrame не изменяется
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    if queries is None:
+        if start is None or end is None:
+            logger.critical("Ошибка: Не переданы ни периоды, ни диапазон дат")
+            raise ValueError("Передайте список пар (дата, период) или диапазон дат start и end")
+        queries = [(date_, period) for date_ in _period_end_dates(start, end, period)]
+
+    # Проверка всех дат до запросов к API
+    bounds = [_period_bounds(date_, query_period) for date_, query_period in queries]
+
+    # Настройки пользователя и запросы к API - один раз на пакет
+    currencies_and_stocks: dict = settings if settings is not None else load_user_settings()
+    market_sections = _start_market_sections(
+        currencies_and_stocks.get("user_currencies", []), currencies_and_stocks.get("user_stocks", [])
+    )
+
+    events = []
+    if isinstance(operation, PreparedOperations):
+        # Подготовленные операции: срез каждого периода по границам из словаря
+        for (date_, query_period), (_, end_date) in zip(queries, bounds):
+            period_operation = operation.period_slice(end_date, query_period)
+            events.append({"date": date_, "period": query_period, **aggregate_operations(period_operation)})
+    else:
+        dates = operation["Дата операции"]
+        if not pd.api.types.is_datetime64_dtype(dates):
+            dates = pd.to_datetime(dates, dayfirst=True)
+        order = np.argsort(dates.to_numpy(), kind="stable")
+        sorted_dates = dates.to_numpy()[order]
+
+        for (date_, query_period), (start_date, end_date) in zip(queries, bounds):
+            first = 0 if start_date is None else np.searchsorted(sorted_dates, np.datetime64(start_date), side="left")
+            last = np.searchsorted(sorted_dates, np.datetime64(end_date), side="right")
+            # Исходный порядок строк сохраняется, чтобы суммы совпадали с get_events
+            positions = np.sort(order[first:last])
+            events.append({"date": date_, "period": query_period, **aggregate_operations(operation.iloc[positions])})
+
+    merged_events_data: dict = {"events": events, **_finish_market_sections(market_sections, deadline)}
+    return dumps(merged_events_data)
+
+
+def _period_end_dates(start: str, end: str, period: Optional[str]) -> list[str]:
+    """Возвращает последние дни периодов, пересекающихся с диапазоном start - end (последний - не позже end)
+
+    Исключение:
+        ValueError: Если дата имеет неверный формат или период не "W", "M" или "Y"
+    """
+    if period not in _RANGE_PERIODS:
+        logger.critical("Ошибка: Период %s не подходит для диапазона дат", period)
+        raise ValueError("Для диапазона дат период должен быть W, M или Y")
+
+    _, start_date = _period_bounds(start, "ALL")
+    _, end_date = _period_bounds(end, "ALL")
+    period_ends = pd.date_range(start_date.date(), end_date.date(), freq=_period_end_offset(period))
+    end_dates = [day.strftime("%Y-%m-%d") for day in period_ends]
+
+    # Последний период может быть неполным и заканчиваться датой end
+    last_date = end_date.strftime("%Y-%m-%d")
+    if start_date <= end_date and (not end_dates or end_dates[-1] != last_date):
+        end_dates.append(last_date)
+    return end_dates
+
+
+def _start_market_sections(currencies: list, stocks: list) -> list[tuple]:
+    """Запускает в пуле потоков запросы разделов рыночных данных, для которых в кэше нет свежих данных"""
+    sections = []
+    for section, fetch, params in (
+        ("currency_rates", get_currency_rates_dict, currencies),
+        ("stock_prices", get_stock_prices_dict, stocks),
+    ):
+        # Свежие данные из кэша (например, загруженные src.prefetch) используются без запроса к API
+        fresh = _fresh_market_section(section, params)
+        future = None if fresh else _market_data_executor.submit(fetch, params)
+        sections.append((section, params, fresh, future))
+    return sections
+
+
+def _finish_market_sections(sections: list[tuple], deadline: Optional[float]) -> dict:
+    """Собирает разделы рыночных данных, запущенные _start_market_sections, и их статусы"""
+    market_data: dict = {}
+    statuses: dict = {}
+    for section, params, fresh, future in sections:
+        values, statuses[section] = fresh or _collect_market_section(section, params, future, deadline)
+        market_data.update(values)
+    return {**market_data, "market_data_status": statuses}
+
+
+def _collect_market_section(
+    section: str, params: list, future: concurrent.futures.Future, deadline: Optional[float]
+) -> tuple[dict, dict]:
+    """Ожидает раздел рыночных данных до дедлайна. При таймауте или ошибке провайдера берёт данные из кэша"""
+    remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+    try:
+        return future.result(timeout=remaining), {"status": "ok"}
+    except concurrent.futures.TimeoutError:
+        logger.warning("Раздел %s не получен за отведённое время", section)
+    except _market_data_errors() as e:
+        logger.warning("Раздел %s не получен: %s", section, e)
+
+    return _market_section_fallback(section, params)
+
+
+def _market_section_from_task(section: str, params: list, task: asyncio.Future) -> tuple[dict, dict]:
+    """Возвращает раздел рыночных данных из завершённой задачи или из кэша, если задача не успела или упала"""
+    if task.cancelled():
+        logger.warning("Раздел %s не получен за отведённое время", section)
+    elif isinstance(task.exception(), _market_data_errors()):
+        logger.warning("Раздел %s не получен: %s", section, task.exception())
+    elif task.exception() is not None:
+        raise task.exception()
+    else:
+        return task.result(), {"status": "ok"}
+
+    return _market_section_fallback(section, params)
+
+
+def _fresh_market_section(section: str, params: list) -> Optional[tuple[dict, dict[str, Any]]]:
+    """
+    Возвращает раздел из кэша со статусом ok, если данные в кэше свежие, иначе None.
+
+    Для пустого списка валют или акций в настройках раздел пуст и запрашивать провайдера не нужно
+    """
+    if not params:
+        return {section: []}, {"status": "ok"}
+
+    fresh = get_fresh_market_data(section, params)
+    if fresh is None:
+        return None
+
+    updated_at = datetime.datetime.fromtimestamp(fresh.updated_at).isoformat(timespec="seconds")
+    return {section: fresh.value}, {"status": "ok", "updated_at": updated_at}
+
+
+def _market_section_fallback(section: str, params: list) -> tuple[dict, dict[str, Any]]:
+    """Возвращает последние известные данные раздела со статусом stale или пустой раздел со статусом unavailable"""
+    cached = utils.market_data_cache.get(section, params)
+    record_cache("market_data_fallback", cached is not None)
+    if cached is None:
+        return {section: []}, {"status": "unavailable"}
+
+    updated_at = datetime.datetime.fromtimestamp(cached.updated_at).isoformat(timespec="seconds")
+    return {section: cached.value}, {"status": "stale", "updated_at": updated_at}
+
+
+def _select_period(
+    operation: Union[pd.DataFrame, PreparedOperations], date_: str, period: Optional[str] = "M"
+) -> pd.DataFrame:
+    """Возвращает операции за период: срез подготовленных операций или фильтрация DataFrame"""
+    if isinstance(operation, PreparedOperations):
+        _, date_obj = _period_bounds(date_, period)
+        return operation.period_slice(date_obj, period)
+    return _filter_operation_by_period(operation, date_, period)
+
+
+def _filter_operation_by_period(operation: pd.DataFrame, date_: str, period: Optional[str] = "M") -> pd.DataFrame:
+    """Возвращает операции за период ("W", "M", "Y" или "ALL"), который заканчивается датой date_
+
+    Исключение:
+        ValueError: Если дата не передана, имеет неверный формат или период указан неверно
+    """
+    start_date, date_obj = _period_bounds(date_, period)
+
+    # Конвертация дат в datetime, если необходимо. Переданный DataFrame не изменяется
+    dates: pd.Series = operation["Дата операции"]
+    if not pd.api.types.is_datetime64_dtype(dates):
+        with span("views.convert_dates"):
+            dates = pd.to_datetime(dates, dayfirst=True)
+
+    # Фильтрация данных по периоду
+    if start_date is not None:
+        # Фильтрация операций по временному диапазону
+        return operation.loc[(dates >= start_date) & (dates <= date_obj)]
+    # Для ALL - все операции до указанной даты
+    return operation.loc[dates <= date_obj]
+
+
+def _period_bounds(
+    date_: str, period: Optional[str] = "M"
+) -> tuple[Optional[datetime.datetime], datetime.datetime]:
+    """Возвращает начало периода (None для "ALL") и его конец - date_ 23:59:59
+
+    Исключение:
+        ValueError: Если дата не передана, имеет неверный формат или период указан неверно
     """
     # Проверка наличия даты
     if date_ is None:
@@ -49,54 +477,23 @@ def get_events(operation: pd.DataFrame, date_: str, period: Optional[str] = "M")
     try:
         date_obj = datetime.datetime.strptime(date_, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
     except ValueError:
-        logger.critical(f"Ошибка: Дата ({date_, type(date_)}) не конвертируется в datetime")
+        logger.critical("Ошибка: Дата %s (тип %s) не конвертируется в datetime", date_, type(date_))
         raise ValueError("Дата указана неверно. Маска: YYYY-MM-DD")
 
-    # Конвертация колонки с датами в datetime, если необходимо
-    if not pd.api.types.is_datetime64_dtype(operation["Дата операции"]):
-        operation["Дата операции"] = pd.to_datetime(operation["Дата операции"], dayfirst=True)
-
-    # Фильтрация данных по периоду
-    if period != "ALL":
-        # Определение начальной даты в зависимости от периода
-        if period == "W":
-            # Для недели - начало недели (понедельник)
-            start_date = (date_obj - datetime.timedelta(days=date_obj.weekday())).replace(
-                hour=00, minute=00, second=00
-            )
-        elif period == "M":
-            # Для месяца - первое число месяца
-            start_date = date_obj.replace(day=1, hour=00, minute=00, second=00)
-        elif period == "Y":
-            # Для года - первое число года
-            start_date = date_obj.replace(month=1, day=1, hour=00, minute=00, second=00)
-        else:
-            raise ValueError('Период указан неверно')
-
-        # Фильтрация операций по временному диапазону
-        operation = operation.loc[
-            (operation["Дата операции"] >= start_date) & (operation["Дата операции"] <= date_obj)
-        ]
-    else:
+    # Определение начальной даты в зависимости от периода
+    if period == "ALL":
         # Для ALL - все операции до указанной даты
-        operation = operation.loc[operation["Дата операции"] <= date_obj]
-
-    # Загрузка пользовательских настроек по валютам и акциям
-    with open("../user_settings.json") as f:
-        currencies_and_stocks: dict = json.load(f)
-
-    # Получение списка валют и акций из настроек
-    currencies: list = currencies_and_stocks.get("user_currencies", [])
-    stocks: list = currencies_and_stocks.get("user_stocks", [])
-
-    # Сбор данных из различных источников
-    expenses: dict = json.loads(get_expenses(operation))  # Получение расходов
-    income: dict = json.loads(get_income(operation))  # Получение доходов
-    currency_rates: dict = json.loads(get_currency_rates(currencies))  # Получение курсов валют
-    stock_rates: dict = json.loads(get_stock_prices(stocks))  # Получение цен акций
-
-    # Объединение всех данных в один словарь
-    merged_events_data: dict = {**expenses, **income, **currency_rates, **stock_rates}
+        return None, date_obj
+    elif period == "W":
+        # Для недели - начало недели (понедельник)
+        start_date = (date_obj - datetime.timedelta(days=date_obj.weekday())).replace(hour=00, minute=00, second=00)
+    elif period == "M":
+        # Для месяца - первое число месяца
+        start_date = date_obj.replace(day=1, hour=00, minute=00, second=00)
+    elif period == "Y":
+        # Для года - первое число года
+        start_date = date_obj.replace(month=1, day=1, hour=00, minute=00, second=00)
+    else:
+        raise ValueError('Период указан неверно')
 
-    # Возврат объединенных данных в формате JSON
-    return json.dumps(merged_events_data, ensure_ascii=False, indent=4)
+    return start_date, date_obj
@@ -3,6 +3,58 @@ import datetime
 import pandas as pd
 import pytest
 
+from src import env
+from src.logging_config import flush_logging
+from src.utils import currency_data_breaker, market_data_cache, marketstack_breaker
+
+
+# Журнал пакета пишет фоновый поток: очередь дописывается до конца каждой фазы теста, пока вывод
+# перехватывает pytest (trylast - внутри обёртки захвата вывода), иначе сообщения попадают в отчёт pytest
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_setup(item):
+    yield
+    flush_logging()
+
+
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_call(item):
+    yield
+    flush_logging()
+
+
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_teardown(item):
+    yield
+    flush_logging()
+
+
+@pytest.fixture
+def dotenv_variables(monkeypatch):
+    """
+    Фикстура подменяет файл .env: возвращает словарь его переменных, которые src.env.load_env
+    загрузит в окружение при следующем вызове (переменные окружения восстанавливаются после теста)
+    """
+    variables = {}
+
+    def load_dotenv():
+        for name, value in variables.items():
+            monkeypatch.setenv(name, value)
+        return True
+
+    monkeypatch.setattr("dotenv.load_dotenv", load_dotenv)
+    monkeypatch.setattr(env, "_loaded", False)
+    monkeypatch.setattr(env, "_callbacks", list(env._callbacks))
+    return variables
+
+
+@pytest.fixture(autouse=True)
+def reset_market_data_state():
+    """Сбрасывает circuit breaker провайдеров и кэш рыночных данных между тестами"""
+    yield
+    currency_data_breaker.reset()
+    marketstack_breaker.reset()
+    market_data_cache.clear()
+
 
 @pytest.fixture
 def get_data_for_services():
@@ -422,10 +474,10 @@ def get_data_for_get_stock_prices():
 def result_inner_functions_for_get_events():
     """Фикстура возвращает результат внутренних функций"""
     return {
-        "get_expenses": '{"expenses": {"total_amount": 0,"main": [],"transfers_and_cash": []}}',
-        "get_income": '{"income": {"total_amount": 0,"main": []}}',
-        "get_currency_rates": '{"currency_rates": [{"currency": "USD","rate": 78.918179}]}',
-        "get_stock_prices": '{"stock_prices": [{"stock": "AAPL","price": 213.55}]}',
+        "get_expenses": {"expenses": {"total_amount": 0, "main": [], "transfers_and_cash": []}},
+        "get_income": {"income": {"total_amount": 0, "main": []}},
+        "get_currency_rates": {"currency_rates": [{"currency": "USD", "rate": 78.918179}]},
+        "get_stock_prices": {"stock_prices": [{"stock": "AAPL", "price": 213.55}]},
     }
 
 
@@ -0,0 +1,91 @@
+import json
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from src import arrow_export
+from src.reports import get_expenses_for_3_months_by_category
+from src.services import filter_transaction_by_search_str
+from src.views import get_events
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def market_data():
+    """Фикстура подменяет рыночные данные и настройки пользователя"""
+    with (
+        patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]}),
+        patch("src.views.get_currency_rates_dict", return_value={"currency_rates": [{"currency": "USD", "rate": 73}]}),
+        patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []}),
+    ):
+        yield
+
+
+@pytest.mark.parametrize("file_format", ["ipc", "parquet"])
+def test_transactions_table_for_arrow_export(get_data_for_services, tmp_path, file_format):
+    """Тестирует, что таблица найденных транзакций совпадает с JSON поиска и читается из файла"""
+    expected = json.loads(filter_transaction_by_search_str(get_data_for_services, "Супермаркеты"))
+
+    table = arrow_export.transactions_table(get_data_for_services, "Супермаркеты")
+    path = str(tmp_path / f"found{arrow_export.FILE_FORMATS[file_format]}")
+    arrow_export.write_table(table, path, file_format)
+
+    assert table.to_pylist() == expected
+    assert arrow_export.read_table(path).equals(table)
+
+
+def test_report_table_for_arrow_export(get_data_for_reports):
+    """Тестирует, что таблица отчёта совпадает с JSON отчёта"""
+    expected = json.loads(get_expenses_for_3_months_by_category(get_data_for_reports, "Супермаркеты", "2021-12-31"))
+
+    table = arrow_export.report_table(get_data_for_reports, "Супермаркеты", "2021-12-31")
+
+    assert table.to_pylist() == expected
+
+
+def test_events_tables_for_arrow_export(get_data_for_get_expenses, market_data, tmp_path):
+    """Тестирует разделы get_events в таблицах Arrow и запись их в отдельные файлы"""
+    expected = json.loads(get_events(get_data_for_get_expenses, "2021-12-31", "M"))
+
+    tables = arrow_export.events_tables(get_data_for_get_expenses, "2021-12-31", "M")
+    paths = arrow_export.write_tables(tables, str(tmp_path / "events"))
+
+    assert tables["totals"].to_pylist() == [
+        {
+            "expenses_total_amount": expected["expenses"]["total_amount"],
+            "income_total_amount": expected["income"]["total_amount"],
+        }
+    ]
+    assert tables["expenses"].to_pylist() == expected["expenses"]["main"]
+    assert tables["transfers_and_cash"].to_pylist() == expected["expenses"]["transfers_and_cash"]
+    assert tables["currency_rates"].to_pylist() == [{"currency": "USD", "rate": 73.0}]
+    assert tables["stock_prices"].num_rows == 0
+    assert tables["stock_prices"].schema.names == ["stock", "price"]
+    assert arrow_export.read_table(paths["expenses"]).equals(tables["expenses"])
+
+
+def test_incorrect_format_for_arrow_export(tmp_path):
+    """Тестирует неизвестный формат файла"""
+    with pytest.raises(ValueError) as exc_info:
+        arrow_export.write_table(pa.table({"a": [1]}), str(tmp_path / "a.csv"), "csv")
+
+    assert str(exc_info.value) == "Формат файла должен быть одним из: ipc, parquet"
+
+
+def test_pyarrow_not_installed_for_arrow_export(monkeypatch):
+    """Тестирует понятную ошибку, если pyarrow не установлен"""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+
+    with pytest.raises(ImportError) as exc_info:
+        arrow_export.records_to_table([{"a": 1}])
+
+    assert str(exc_info.value) == "Для экспорта в Arrow установите пакет pyarrow"
+
+
+def test_empty_search_for_arrow_export(get_data_for_services):
+    """Тестирует пустой результат поиска"""
+    table = arrow_export.transactions_table(get_data_for_services, "нет такой категории")
+
+    assert table.num_rows == 0
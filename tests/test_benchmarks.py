@@ -0,0 +1,85 @@
+import json
+
+import pandas as pd
+import pytest
+
+from benchmarks.run import BENCHMARKS, compare_results, main, parse_sizes, run_benchmarks
+from benchmarks.synthetic import COLUMNS, make_operations
+from src.utils import get_expenses_dict
+
+
+def test_synthetic_operations_like_get_data():
+    """Тестирует, что синтетические операции повторяют формат файла операций и воспроизводимы"""
+    operation = make_operations(2000, seed=1)
+    dates = pd.to_datetime(operation["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+
+    assert list(operation.columns) == COLUMNS
+    assert len(operation) == 2000
+    assert dates.is_monotonic_decreasing
+    assert (operation["Сумма операции с округлением"] == operation["Сумма операции"].abs()).all()
+    assert (operation.loc[operation["Категория"] == "Пополнения", "Сумма операции"] > 0).all()
+    assert get_expenses_dict(operation)["expenses"]["main"]
+    assert make_operations(2000, seed=1).equals(operation)
+
+
+def test_parse_sizes():
+    """Тестирует разбор объёмов операций"""
+    assert parse_sizes("10k, 100K,1m,10m,500") == [10_000, 100_000, 1_000_000, 10_000_000, 500]
+
+    with pytest.raises(ValueError):
+        parse_sizes("1g")
+    with pytest.raises(ValueError):
+        parse_sizes("0")
+
+
+def test_run_benchmarks_with_stub_server():
+    """Тестирует выполнение всех бенчмарков на малом объёме с локальным стендом API"""
+    result = run_benchmarks([200], repeat=2, warmup=0, log=lambda message: None)
+
+    assert [item["benchmark"] for item in result["results"]] == [benchmark.name for benchmark in BENCHMARKS]
+    assert all(len(item["timings"]) == 2 and item["min_seconds"] > 0 for item in result["results"])
+    assert result["parameters"]["sizes"] == [200]
+    assert result["skipped"] == []
+
+
+def test_compare_results():
+    """Тестирует поиск регрессий относительно базовых результатов"""
+    baseline = {
+        "results": [
+            {"benchmark": "get_expenses", "rows": 100, "min_seconds": 1.0},
+            {"benchmark": "get_income", "rows": 100, "min_seconds": 1.0},
+            {"benchmark": "get_events", "rows": 100, "min_seconds": 1.0},
+        ]
+    }
+    current = {
+        "results": [
+            {"benchmark": "get_expenses", "rows": 100, "min_seconds": 1.5},
+            {"benchmark": "get_income", "rows": 100, "min_seconds": 1.1},
+            {"benchmark": "get_events", "rows": 100, "min_seconds": 0.5},
+            {"benchmark": "get_events", "rows": 1000, "min_seconds": 2.0},
+        ]
+    }
+
+    comparison = compare_results(current, baseline, threshold=0.2)
+
+    assert [item["status"] for item in comparison] == ["regression", "ok", "improved", "new"]
+    assert comparison[0]["ratio"] == 1.5
+
+
+def test_regression_exit_code_for_main(tmp_path, capsys):
+    """Тестирует файл результатов, сравнение с базовыми результатами и код завершения при регрессии"""
+    baseline = tmp_path / "baseline.json"
+    output = tmp_path / "current.json"
+    baseline.write_text(
+        json.dumps({"results": [{"benchmark": "get_income", "rows": 100, "min_seconds": 1e-9}]}), encoding="utf-8"
+    )
+
+    exit_code = main(
+        ["--sizes", "100", "--benchmarks", "get_income", "--repeat", "1", "--warmup", "0"]
+        + ["--output", str(output), "--baseline", str(baseline)]
+    )
+
+    result = json.loads(output.read_text(encoding="utf-8"))
+    assert exit_code == 1
+    assert result["comparison"]["results"][0]["status"] == "regression"
+    assert "regression" in capsys.readouterr().out
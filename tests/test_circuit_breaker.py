@@ -0,0 +1,91 @@
+import pytest
+
+from src.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    """Управляемый источник времени для тестов"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_open_after_failure_threshold_for_circuit_breaker():
+    """Тестирует размыкание после серии ошибок подряд"""
+    breaker = CircuitBreaker("test", failure_threshold=3, clock=FakeClock())
+
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.before_call()
+    assert str(exc_info.value) == "Провайдер test временно недоступен"
+
+
+def test_success_resets_failures_for_circuit_breaker():
+    """Тестирует, что успешный запрос обнуляет счётчик ошибок"""
+    breaker = CircuitBreaker("test", failure_threshold=2, clock=FakeClock())
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_trial_for_circuit_breaker():
+    """Тестирует пробный запрос после reset_timeout: пропускается только один"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_reopens_circuit_breaker():
+    """Тестирует повторное размыкание после неудачного пробного запроса"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=10, clock=clock)
+    for _ in range(3):
+        breaker.record_failure()
+
+    clock.now = 10
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 15
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_cancelled_trial_for_circuit_breaker():
+    """Тестирует, что отменённый пробный запрос не блокирует следующий"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+
+    breaker.before_call()
+    breaker.record_cancelled()
+    breaker.before_call()
+
+
+def test_incorrect_failure_threshold_for_circuit_breaker():
+    """Тестирует кейс, когда порог ошибок меньше 1"""
+    with pytest.raises(ValueError) as exc_info:
+        CircuitBreaker("test", failure_threshold=0)
+    assert str(exc_info.value) == "Порог ошибок должен быть больше 0"
@@ -0,0 +1,180 @@
+import json
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.cli import load_queries, main, run_queries
+from src.profiling import set_profile_mode
+from src.reports import get_expenses_for_3_months_by_category
+from src.server import OperationsDataset
+from src.views import get_events
+
+
+@pytest.fixture
+def operations_file(tmp_path):
+    """Фикстура создаёт Excel-файл с операциями"""
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame(
+        [
+            {
+                "Дата операции": date,
+                "Дата платежа": date[:10],
+                "Сумма операции": amount,
+                "Категория": category,
+                "Описание": description,
+                "Сумма операции с округлением": abs(amount),
+            }
+            for date, amount, category, description in [
+                ("30.12.2021 12:00:00", -160.89, "Супермаркеты", "Колхоз"),
+                ("15.12.2021 12:00:00", -64.0, "Супермаркеты", "Магнит"),
+                ("10.12.2021 12:00:00", 5000.0, "Пополнения", "Перевод с карты"),
+                ("01.11.2021 12:00:00", -1500.0, "Ж/д билеты", "РЖД"),
+            ]
+        ]
+    ).to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture
+def market_data():
+    """Фикстура подменяет рыночные данные и настройки пользователя"""
+    with (
+        patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]}),
+        patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []}),
+        patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []}),
+    ):
+        yield
+
+
+QUERIES = [
+    {"id": "december", "type": "events", "date": "2021-12-31", "period": "M"},
+    {"type": "search", "search": "магнит"},
+    {"id": "report", "type": "report", "category": "Супермаркеты", "date": "2021-12-31"},
+    {"id": "bad-date", "type": "events", "date": "31-12-2021"},
+]
+
+
+def _write_jsonl(path, queries: list[dict]) -> None:
+    path.write_text("\n".join(json.dumps(query, ensure_ascii=False) for query in queries), encoding="utf-8")
+
+
+def test_load_jsonl_and_yaml_for_load_queries(tmp_path):
+    """Тестирует чтение JSON lines и YAML с одинаковым результатом"""
+    pytest.importorskip("yaml")
+    jsonl = tmp_path / "queries.jsonl"
+    _write_jsonl(jsonl, QUERIES)
+    yaml_file = tmp_path / "queries.yaml"
+    yaml_file.write_text(
+        "- {id: december, type: events, date: 2021-12-31, period: M}\n"
+        "- {type: search, search: магнит}\n"
+        "---\n"
+        "{id: report, type: report, category: Супермаркеты, date: 2021-12-31}\n"
+        "---\n"
+        "{id: bad-date, type: events, date: 31-12-2021}\n",
+        encoding="utf-8",
+    )
+
+    queries = load_queries(str(jsonl))
+
+    assert [query["id"] for query in queries] == ["december", "query-2", "report", "bad-date"]
+    assert load_queries(str(yaml_file)) == queries
+
+
+@pytest.mark.parametrize(
+    "query, message",
+    [
+        ({"type": "unknown"}, "Тип запроса 1 должен быть одним из: events, search, report"),
+        ({"type": "search", "date": "2021-12-31"}, "Запрос 1 содержит неизвестные параметры: date"),
+        (
+            {"id": "../x", "type": "search"},
+            "id запроса 1 должен быть уникальным и состоять из букв, цифр, '_', '.' и '-'",
+        ),
+    ],
+)
+def test_incorrect_query_for_load_queries(tmp_path, query, message):
+    """Тестирует проверку запросов до загрузки операций"""
+    path = tmp_path / "queries.jsonl"
+    _write_jsonl(path, [query])
+
+    with pytest.raises(ValueError) as exc_info:
+        load_queries(str(path))
+
+    assert str(exc_info.value) == message
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_same_results_as_functions_for_run_queries(tmp_path, operations_file, market_data, jobs):
+    """Тестирует, что результаты совпадают с вызовом функций, а ошибка одного запроса не прерывает остальные"""
+    path = tmp_path / "queries.jsonl"
+    _write_jsonl(path, QUERIES)
+    operation = pd.read_excel(operations_file)
+
+    results = run_queries(OperationsDataset(str(operations_file)).get(), load_queries(str(path)), jobs=jobs)
+
+    assert [result["status"] for result in results] == ["ok", "ok", "ok", "error"]
+    assert results[0]["result"] == json.loads(get_events(operation, "2021-12-31", "M"))
+    assert [item["Описание"] for item in results[1]["result"]] == ["Магнит"]
+    assert results[2]["result"] == json.loads(
+        get_expenses_for_3_months_by_category(operation, "Супермаркеты", "2021-12-31")
+    )
+    assert results[3]["error"]
+
+
+def test_ndjson_output_for_main(tmp_path, operations_file, market_data, capsys):
+    """Тестирует вывод NDJSON в stdout и код завершения при ошибке в запросе"""
+    path = tmp_path / "queries.jsonl"
+    _write_jsonl(path, QUERIES)
+
+    with patch("src.server.OperationsDataset", wraps=OperationsDataset) as dataset:
+        exit_code = main([str(path), "--data", str(operations_file), "--jobs", "2"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert exit_code == 1
+    assert dataset.call_count == 1
+    assert [json.loads(line)["id"] for line in lines] == ["december", "query-2", "report", "bad-date"]
+
+
+def test_output_dir_for_main(tmp_path, operations_file, market_data):
+    """Тестирует запись результата каждого запроса в отдельный файл"""
+    path = tmp_path / "queries.jsonl"
+    _write_jsonl(path, QUERIES[:3])
+    output_dir = tmp_path / "results"
+
+    exit_code = main([str(path), "--data", str(operations_file), "--output-dir", str(output_dir)])
+
+    assert exit_code == 0
+    assert sorted(file.name for file in output_dir.iterdir()) == ["december.json", "query-2.json", "report.json"]
+    assert json.loads((output_dir / "december.json").read_text(encoding="utf-8"))["expenses"]
+
+
+def test_profile_for_main(tmp_path, operations_file, market_data, capsys):
+    """Тестирует профиль каждого запроса, подписанный id, типом и параметрами"""
+    path = tmp_path / "queries.jsonl"
+    _write_jsonl(path, QUERIES[:2])
+    profile_dir = tmp_path / "profiles"
+
+    try:
+        main([str(path), "--data", str(operations_file), "--profile", "cpu", "--profile-dir", str(profile_dir)])
+    finally:
+        set_profile_mode(None)
+
+    assert sorted(file.name for file in profile_dir.iterdir()) == [
+        "december_type=events_date=2021-12-31_period=M.prof",
+        "query-2_type=search_search=магнит.prof",
+    ]
+    assert "Ordered by: cumulative time" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("content", [None, '{"type": "unknown"}', "не JSON"])
+def test_incorrect_queries_file_for_main(tmp_path, capsys, content):
+    """Тестирует, что ошибка в файле запросов выводится через argparse с кодом 2, без трассировки"""
+    path = tmp_path / "queries.jsonl"
+    if content is not None:
+        path.write_text(content, encoding="utf-8")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main([str(path)])
+
+    assert exc_info.value.code == 2
+    assert f"не удалось прочитать запросы из {path}" in capsys.readouterr().err
@@ -0,0 +1,147 @@
+import datetime
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.currency_conversion import convert_operations_to_rub, load_currency_rate_history
+
+
+def fake_rate_history(currency, start_date, end_date):
+    """Курс валюты: 100 для USD и 10 для CNY плюс номер дня месяца"""
+    start = datetime.date.fromisoformat(start_date)
+    end = datetime.date.fromisoformat(end_date)
+    base = {"USD": 100, "CNY": 10}[currency]
+    days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+    return [{"date": day.isoformat(), "rate": base + day.day} for day in days]
+
+
+@pytest.fixture
+def foreign_currency_operations():
+    """Фикстура возвращает операции в рублях и иностранных валютах"""
+    return pd.DataFrame(
+        [
+            {
+                "Дата операции": "05.12.2021 12:00:00",
+                "Сумма операции": -10.0,
+                "Валюта операции": "USD",
+                "Сумма платежа": -1000.0,
+                "Валюта платежа": "RUB",
+                "Сумма операции с округлением": 1000.0,
+            },
+            {
+                "Дата операции": "20.12.2021 12:00:00",
+                "Сумма операции": -2.0,
+                "Валюта операции": "CNY",
+                "Сумма платежа": -2.0,
+                "Валюта платежа": "CNY",
+                "Сумма операции с округлением": 2.0,
+            },
+            {
+                "Дата операции": "10.12.2021 12:00:00",
+                "Сумма операции": -1.0,
+                "Валюта операции": "USD",
+                "Сумма платежа": -100.0,
+                "Валюта платежа": "RUB",
+                "Сумма операции с округлением": 100.0,
+            },
+            {
+                "Дата операции": "11.12.2021 12:00:00",
+                "Сумма операции": -50.0,
+                "Валюта операции": "RUB",
+                "Сумма платежа": -50.0,
+                "Валюта платежа": "RUB",
+                "Сумма операции с округлением": 50.0,
+            },
+        ]
+    )
+
+
+@patch("src.utils.get_currency_rate_history", side_effect=fake_rate_history)
+def test_convert_for_convert_operations_to_rub(mock_history, foreign_currency_operations, tmp_path):
+    """Тестирует пересчёт сумм по курсу на дату операции и один запрос истории на валюту"""
+    result = convert_operations_to_rub(foreign_currency_operations, str(tmp_path))
+
+    assert result["Сумма операции"].to_list() == [-1050.0, -60.0, -110.0, -50.0]
+    assert result["Сумма платежа"].to_list() == [-1000.0, -60.0, -100.0, -50.0]
+    assert result["Сумма операции с округлением"].to_list() == [1000.0, 60.0, 100.0, 50.0]
+    assert result["Валюта операции"].to_list() == ["RUB"] * 4
+    assert result["Валюта платежа"].to_list() == ["RUB"] * 4
+
+    assert sorted(call.args for call in mock_history.call_args_list) == [
+        ("CNY", "2021-12-20", "2021-12-20"),
+        ("USD", "2021-12-05", "2021-12-10"),
+    ]
+
+
+@patch("src.utils.get_currency_rate_history", side_effect=fake_rate_history)
+def test_input_not_modified_for_convert_operations_to_rub(mock_history, foreign_currency_operations, tmp_path):
+    """Тестирует, что переданный DataFrame не изменяется"""
+    original = foreign_currency_operations.copy()
+
+    convert_operations_to_rub(foreign_currency_operations, str(tmp_path))
+
+    pd.testing.assert_frame_equal(foreign_currency_operations, original)
+
+
+@patch("src.utils.get_currency_rate_history")
+def test_only_rub_for_convert_operations_to_rub(mock_history, foreign_currency_operations, tmp_path):
+    """Тестирует, что для рублёвых операций API не вызывается"""
+    result = convert_operations_to_rub(foreign_currency_operations.iloc[[3]], str(tmp_path))
+
+    assert result["Сумма операции"].to_list() == [-50.0]
+    mock_history.assert_not_called()
+
+
+@patch("src.utils.get_currency_rate_history", side_effect=fake_rate_history)
+def test_cache_is_extended_incrementally_for_load_currency_rate_history(mock_history, tmp_path):
+    """Тестирует, что повторно запрашиваются только даты вне сохранённого диапазона"""
+    load_currency_rate_history("USD", datetime.date(2021, 12, 5), datetime.date(2021, 12, 10), str(tmp_path))
+    rates = load_currency_rate_history("USD", datetime.date(2021, 12, 1), datetime.date(2021, 12, 10), str(tmp_path))
+
+    assert [call.args for call in mock_history.call_args_list] == [
+        ("USD", "2021-12-05", "2021-12-10"),
+        ("USD", "2021-12-01", "2021-12-04"),
+    ]
+    assert rates["rate"].to_list() == [100 + day for day in range(1, 11)]
+    assert (tmp_path / "currency_rates_USD.csv").exists()
+
+
+@patch("src.utils.get_currency_rate_history", side_effect=fake_rate_history)
+def test_long_period_is_split_for_load_currency_rate_history(mock_history, tmp_path):
+    """Тестирует разбиение периода длиннее лимита API на несколько запросов"""
+    rates = load_currency_rate_history("USD", datetime.date(2020, 1, 1), datetime.date(2021, 12, 31), str(tmp_path))
+
+    assert mock_history.call_count == 3
+    assert len(rates) == 731
+
+
+@pytest.mark.parametrize("operation, error", [(None, ValueError), ([{"Дата операции": "01.01.2021"}], TypeError)])
+def test_incorrect_operation_for_convert_operations_to_rub(operation, error):
+    """Тестирует проверку переданных транзакций"""
+    with pytest.raises(error):
+        convert_operations_to_rub(operation)
+
+
+@patch("src.utils.get_currency_rate_history", side_effect=fake_rate_history)
+def test_afternoon_operation_for_convert_operations_to_rub(mock_history, foreign_currency_operations, tmp_path):
+    """Тестирует, что операция после полудня пересчитывается по курсу своего дня, а не следующего"""
+    operation = foreign_currency_operations.iloc[[0]].assign(**{"Дата операции": "05.12.2021 16:00:00"})
+    rates = fake_rate_history("USD", "2021-12-05", "2021-12-06")
+    mock_history.side_effect = lambda currency, start_date, end_date: rates
+
+    result = convert_operations_to_rub(operation, str(tmp_path))
+
+    assert result["Сумма операции"].to_list() == [-1050.0]
+
+
+@patch("src.utils.get_currency_rate_history")
+def test_missing_day_rate_for_convert_operations_to_rub(mock_history, foreign_currency_operations, tmp_path):
+    """Тестирует, что без курса на день операции используется последний курс до него, а не ближайший"""
+    mock_history.return_value = [{"date": "2021-12-03", "rate": 70.0}, {"date": "2021-12-06", "rate": 71.0}]
+    operation = pd.concat([foreign_currency_operations.iloc[[0]]] * 2, ignore_index=True)
+    operation["Дата операции"] = ["03.12.2021 10:00:00", "05.12.2021 23:00:00"]
+
+    result = convert_operations_to_rub(operation, str(tmp_path))
+
+    assert result["Сумма операции"].to_list() == [-700.0, -700.0]
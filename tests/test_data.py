@@ -1,8 +1,10 @@
+import datetime
 from unittest.mock import patch
 
+import pandas as pd
 import pytest
 
-from src.data import get_data
+from src.data import get_data, prepare_operations
 
 
 @patch("pandas.read_excel")
@@ -13,3 +15,80 @@ def test_file_not_found_for_get_data(mock_read_excel):
     with pytest.raises(FileNotFoundError) as exc_info:
         get_data()
     assert str(exc_info.value) == "Файл не найден"
+
+
+@pytest.fixture
+def operations_for_prepare_operations():
+    """Фикстура возвращает операции за конец 2021 и начало 2022 года в произвольном порядке"""
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "03.01.2022 10:00:00",
+                "31.12.2021 23:00:00",
+                "27.12.2021 00:00:00",
+                None,
+                "26.12.2021 12:00:00",
+                "01.12.2021 09:00:00",
+                "30.11.2021 18:00:00",
+            ],
+            "Сумма операции": [1, 2, 3, 4, 5, 6, 7],
+        }
+    )
+
+
+def test_sorted_frame_with_period_ids_for_prepare_operations(operations_for_prepare_operations):
+    """Тестирует сортировку по дате, номера периодов и неизменность исходного DataFrame"""
+    original = operations_for_prepare_operations.copy()
+
+    prepared = prepare_operations(operations_for_prepare_operations)
+
+    assert operations_for_prepare_operations.equals(original)
+    assert list(prepared.frame["Сумма операции"]) == [7, 6, 5, 3, 2, 1, 4]
+    # Неделя с понедельника 27.12.2021 отличается от недели с 26.12.2021 (воскресенье)
+    assert prepared.frame["week_id"].iloc[2] + 1 == prepared.frame["week_id"].iloc[3]
+    assert prepared.frame["week_id"].iloc[3] == prepared.frame["week_id"].iloc[4]
+    assert list(prepared.frame["year_id"]) == [51, 51, 51, 51, 51, 52, -1]
+
+
+@pytest.mark.parametrize(
+    "end_date, period, amounts",
+    [
+        (datetime.datetime(2021, 12, 31, 23, 59, 59), "W", [3, 2]),
+        (datetime.datetime(2021, 12, 30, 23, 59, 59), "W", [3]),
+        (datetime.datetime(2021, 12, 31, 23, 59, 59), "M", [6, 5, 3, 2]),
+        (datetime.datetime(2021, 12, 31, 23, 59, 59), "Y", [7, 6, 5, 3, 2]),
+        (datetime.datetime(2022, 1, 5, 23, 59, 59), "ALL", [7, 6, 5, 3, 2, 1]),
+        (datetime.datetime(2021, 11, 30, 12, 0, 0), "ALL", []),
+        (datetime.datetime(2021, 10, 31, 23, 59, 59), "M", []),
+    ],
+)
+def test_period_slice_for_prepare_operations(operations_for_prepare_operations, end_date, period, amounts):
+    """Тестирует выборку операций за неделю, месяц, год и все операции до даты"""
+    prepared = prepare_operations(operations_for_prepare_operations)
+
+    assert list(prepared.period_slice(end_date, period)["Сумма операции"]) == amounts
+
+
+def test_wrong_period_for_prepare_operations(operations_for_prepare_operations):
+    """Тестирует передачу неверного периода"""
+    prepared = prepare_operations(operations_for_prepare_operations)
+
+    with pytest.raises(ValueError) as exc_info:
+        prepared.period_slice(datetime.datetime(2021, 12, 31), "D")
+
+    assert str(exc_info.value) == "Период указан неверно"
+
+
+@pytest.mark.parametrize(
+    "operation, error, raise_message",
+    [
+        (None, ValueError, "Транзакции не переданы"),
+        ([], TypeError, "Транзакции должны быть переданы в виде pandas DataFrame"),
+    ],
+)
+def test_incorrect_input_for_prepare_operations(operation, error, raise_message):
+    """Тестирует передачу пустых или неверных транзакций"""
+    with pytest.raises(error) as exc_info:
+        prepare_operations(operation)
+
+    assert str(exc_info.value) == raise_message
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.heavy_hitters import SpaceSaving, TopExpenses, top_expenses
+
+
+@pytest.fixture
+def skewed_operations():
+    """Фикстура возвращает расходы с несколькими крупными категориями и множеством мелких мест трат"""
+    rng = np.random.default_rng(42)
+    size = 6000
+    categories = np.array(["Супермаркеты", "Фастфуд", "Такси", "Аптеки", "Переводы", "Наличные"], dtype=object)
+    merchants = np.array([f"Магазин {i}" for i in range(1500)], dtype=object)
+    merchant_index = np.minimum(rng.zipf(1.5, size) - 1, len(merchants) - 1)
+    amounts = rng.integers(50, 5000, size).astype(float)
+    return pd.DataFrame(
+        {
+            "Сумма операции": np.where(rng.random(size) < 0.9, -amounts, amounts),
+            "Категория": categories[rng.choice(len(categories), size, p=[0.4, 0.2, 0.15, 0.05, 0.15, 0.05])],
+            "Описание": merchants[merchant_index],
+            "Сумма операции с округлением": amounts,
+        }
+    )
+
+
+def _exact_top(operations: pd.DataFrame, top_n: int) -> dict:
+    expenses = operations.loc[operations["Сумма операции"] < 0]
+    categories = expenses.loc[~expenses["Категория"].isin(["Переводы", "Наличные"])]
+    by_category = categories.groupby("Категория")["Сумма операции с округлением"].sum()
+    by_merchant = expenses.groupby("Описание")["Сумма операции с округлением"].sum()
+    return {
+        "categories": [
+            {"category": key, "amount": float(round(value))}
+            for key, value in by_category.sort_values(ascending=False, kind="stable").iloc[:top_n].items()
+        ],
+        "merchants": [
+            {"merchant": key, "amount": float(round(value))}
+            for key, value in by_merchant.sort_values(ascending=False, kind="stable").iloc[:top_n].items()
+        ],
+    }
+
+
+@pytest.mark.parametrize("top_n, capacity", [(7, None), (3, 20), (5, 50)])
+def test_exact_top_for_top_expenses(skewed_operations, top_n, capacity):
+    """Тестирует, что результат по частям со вторым проходом совпадает с полным groupby"""
+    chunks = [skewed_operations.iloc[i:i + 500] for i in range(0, len(skewed_operations), 500)]
+
+    assert top_expenses(chunks, top_n, capacity) == _exact_top(skewed_operations, top_n)
+
+
+def test_one_pass_for_top_expenses(skewed_operations):
+    """Тестирует оценки за один проход по итератору частей: состав топа и верхние оценки сумм"""
+    chunks = (skewed_operations.iloc[i:i + 500] for i in range(0, len(skewed_operations), 500))
+    exact = _exact_top(skewed_operations, 3)
+
+    result = top_expenses(chunks, top_n=3, capacity=30, exact=False)
+
+    assert [item["merchant"] for item in result["merchants"]] == [item["merchant"] for item in exact["merchants"]]
+    for estimated, item in zip(result["merchants"], exact["merchants"]):
+        assert estimated["amount"] >= item["amount"]
+
+
+def test_one_shot_iterator_falls_back_to_estimates_for_top_expenses(skewed_operations):
+    """Тестирует, что для одноразового итератора при exact=True возвращаются оценки, а не нулевые суммы"""
+    chunks = [skewed_operations.iloc[i:i + 500] for i in range(0, len(skewed_operations), 500)]
+    estimates = top_expenses(chunks, top_n=3, capacity=30, exact=False)
+
+    result = top_expenses(iter(chunks), top_n=3, capacity=30)
+
+    assert result == estimates
+    assert all(item["amount"] > 0 for item in result["merchants"] + result["categories"])
+
+
+def test_one_shot_iterator_for_exact_top(skewed_operations):
+    """Тестирует, что второй проход по одноразовому итератору частей не выполняется"""
+    aggregator = TopExpenses(3)
+    chunks = (skewed_operations.iloc[i:i + 500] for i in range(0, len(skewed_operations), 500))
+    aggregator.update(skewed_operations)
+
+    with pytest.raises(ValueError):
+        aggregator.exact_top(chunks)
+
+
+def test_bounded_memory_for_space_saving():
+    """Тестирует, что сводка хранит не больше capacity ключей, а оценки - верхние границы сумм"""
+    summary = SpaceSaving(capacity=5)
+    keys = pd.Series([f"k{i}" for i in range(100)] + ["heavy"] * 50)
+    weights = pd.Series([1.0] * 100 + [10.0] * 50)
+
+    for start in range(0, len(keys), 7):
+        summary.update(keys.iloc[start:start + 7], weights.iloc[start:start + 7])
+
+    assert len(summary) == 5
+    key, estimate, error = summary.top(1)[0]
+    assert key == "heavy"
+    assert estimate - error <= 500.0 <= estimate
+    assert summary.total == 600.0
+
+
+def test_callable_chunks_for_top_expenses(skewed_operations):
+    """Тестирует источник частей в виде функции, которая вызывается для каждого прохода"""
+    calls = []
+
+    def read_chunks():
+        calls.append(1)
+        return (skewed_operations.iloc[i:i + 1000] for i in range(0, len(skewed_operations), 1000))
+
+    assert top_expenses(read_chunks) == _exact_top(skewed_operations, 7)
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize("top_n, capacity", [(0, None), (7, 3), ("7", None)])
+def test_invalid_size_for_top_expenses(top_n, capacity):
+    """Тестирует неверный размер топа и сводки"""
+    with pytest.raises(ValueError):
+        TopExpenses(top_n, capacity)
+
+
+def test_invalid_chunk_for_top_expenses():
+    """Тестирует кейс, когда часть операций передана не в виде DataFrame"""
+    with pytest.raises(TypeError):
+        top_expenses([[{"Сумма операции": -1}]])
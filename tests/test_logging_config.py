@@ -0,0 +1,103 @@
+import io
+import logging
+import threading
+
+import pytest
+
+from src import env, logging_config
+from src.logging_config import configure_logging, flush_logging, set_log_level
+
+
+@pytest.fixture
+def log_stream(monkeypatch):
+    """Фикстура направляет журнал пакета в строковый поток и восстанавливает настройку после теста"""
+    monkeypatch.delenv("LOG_LEVEL", raising=False)
+    stream = io.StringIO()
+    yield stream
+    configure_logging()
+
+
+def test_default_level_for_configure_logging(log_stream):
+    """Тестирует уровень WARNING по умолчанию: сообщения INFO не выводятся"""
+    configure_logging(stream=log_stream)
+    logger = logging.getLogger("src.utils")
+
+    logger.info("Не выводится")
+    logger.warning("Выводится %s", "в поток")
+    flush_logging()
+
+    assert logging.getLogger("src").level == logging.WARNING
+    assert "Не выводится" not in log_stream.getvalue()
+    assert "WARNING: Выводится в поток" in log_stream.getvalue()
+
+
+def test_level_from_env_for_configure_logging(log_stream, monkeypatch):
+    """Тестирует уровень из переменной окружения LOG_LEVEL и неизвестный уровень в ней"""
+    monkeypatch.setenv("LOG_LEVEL", "debug")
+    configure_logging(stream=log_stream)
+    assert logging.getLogger("src").level == logging.DEBUG
+
+    monkeypatch.setenv("LOG_LEVEL", "verbose")
+    configure_logging(stream=log_stream)
+    assert logging.getLogger("src").level == logging.WARNING
+
+
+def test_level_from_dotenv_for_configure_logging(log_stream, dotenv_variables):
+    """Тестирует, что LOG_LEVEL из .env применяется после загрузки .env, а явный уровень - нет"""
+    dotenv_variables["LOG_LEVEL"] = "INFO"
+    configure_logging(stream=log_stream)
+    assert logging.getLogger("src").level == logging.WARNING
+
+    env.load_env()
+    assert logging.getLogger("src").level == logging.INFO
+
+    configure_logging("ERROR", stream=log_stream)
+    env._loaded = False
+    env.load_env()
+    assert logging.getLogger("src").level == logging.ERROR
+
+
+def test_messages_written_by_listener_thread(log_stream):
+    """Тестирует, что запись в поток выполняет фоновый поток, а не поток, вызвавший логгер"""
+    configure_logging("INFO", stream=log_stream)
+    threads = []
+
+    class ThreadFilter(logging.Filter):
+        def filter(self, record):
+            threads.append(threading.current_thread().name)
+            return True
+
+    logging_config._handler.target.addFilter(ThreadFilter())
+    logging.getLogger("src.views").info("Сообщение %s", 1)
+    flush_logging()
+
+    assert "INFO: Сообщение 1" in log_stream.getvalue()
+    assert threads and threads[0] != threading.current_thread().name
+
+
+def test_lazy_formatting_below_level(log_stream):
+    """Тестирует, что аргументы сообщений ниже уровня не приводятся к строке"""
+    configure_logging("WARNING", stream=log_stream)
+
+    class Argument:
+        calls = 0
+
+        def __str__(self):
+            Argument.calls += 1
+            return "аргумент"
+
+    logging.getLogger("src.services").debug("Отладка %s", Argument())
+    flush_logging()
+
+    assert Argument.calls == 0
+    assert log_stream.getvalue() == ""
+
+
+def test_incorrect_level_for_set_log_level():
+    """Тестирует неизвестный уровень журнала"""
+    with pytest.raises(ValueError) as exc_info:
+        set_log_level("verbose")
+
+    assert str(exc_info.value) == (
+        "Уровень журнала должен быть числом или одним из: DEBUG, INFO, WARNING, ERROR, CRITICAL"
+    )
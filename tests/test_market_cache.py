@@ -0,0 +1,109 @@
+import multiprocessing
+from unittest.mock import patch
+
+from src.market_cache import MarketDataCache
+
+
+@patch("src.market_cache.time.time", return_value=1751846400.0)
+def test_put_and_get_for_market_data_cache(mock_time):
+    """Тестирует сохранение и получение раздела по списку валют"""
+    cache = MarketDataCache()
+    cache.put("currency_rates", ["USD", "EUR"], [{"currency": "USD", "rate": 78.9}])
+
+    entry = cache.get("currency_rates", ["USD", "EUR"])
+
+    assert entry.value == [{"currency": "USD", "rate": 78.9}]
+    assert entry.updated_at == 1751846400.0
+
+
+def test_missing_entry_for_market_data_cache():
+    """Тестирует кейс, когда данных по ключу нет"""
+    cache = MarketDataCache()
+    cache.put("currency_rates", ["USD"], [])
+
+    assert cache.get("currency_rates", ["EUR"]) is None
+    assert cache.get("stock_prices", ["USD"]) is None
+
+
+def test_clear_for_market_data_cache():
+    """Тестирует очистку кэша"""
+    cache = MarketDataCache()
+    cache.put("stock_prices", ["AAPL"], [])
+    cache.clear()
+
+    assert cache.get("stock_prices", ["AAPL"]) is None
+
+
+def test_get_fresh_for_market_data_cache():
+    """Тестирует получение записи только в пределах срока свежести"""
+    cache = MarketDataCache()
+    with patch("src.market_cache.time.time", return_value=1751846400.0):
+        cache.put("currency_rates", ["USD"], [])
+
+    with patch("src.market_cache.time.time", return_value=1751846400.0 + 60):
+        assert cache.get_fresh("currency_rates", ["USD"], max_age=120) is not None
+        assert cache.get_fresh("currency_rates", ["USD"], max_age=30) is None
+        assert cache.get_fresh("currency_rates", ["EUR"], max_age=120) is None
+
+
+def test_shared_file_for_market_data_cache(tmp_path):
+    """Тестирует обмен записями между экземплярами кэша через файл не чаще раза в check_interval"""
+    path = str(tmp_path / "market_data.json")
+    now = [0.0]
+    writer, reader = MarketDataCache(path), MarketDataCache(path, check_interval=1.0, clock=lambda: now[0])
+    assert reader.get("stock_prices", ["AAPL"]) is None
+
+    writer.put("stock_prices", ["AAPL"], [{"stock": "AAPL", "price": 200.0}])
+
+    assert reader.get("stock_prices", ["AAPL"]) is None
+    now[0] = 1.0
+    assert reader.get("stock_prices", ["AAPL"]).value == [{"stock": "AAPL", "price": 200.0}]
+    assert MarketDataCache(path).get("stock_prices", ["AAPL"]) == writer.get("stock_prices", ["AAPL"])
+
+
+def test_no_stat_within_check_interval_for_market_data_cache(tmp_path):
+    """Тестирует, что get в пределах check_interval не обращается к файлу"""
+    cache = MarketDataCache(str(tmp_path / "market_data.json"), check_interval=60.0)
+    cache.put("stock_prices", ["AAPL"], [])
+    cache.get("stock_prices", ["AAPL"])
+
+    with patch("src.market_cache.os.stat") as mock_stat:
+        for _ in range(100):
+            cache.get("stock_prices", ["AAPL"])
+
+    mock_stat.assert_not_called()
+
+
+def test_corrupted_file_for_market_data_cache(tmp_path):
+    """Тестирует, что повреждённый файл не ломает get и put, а записи в памяти сохраняются"""
+    path = tmp_path / "market_data.json"
+    cache = MarketDataCache(str(path), check_interval=0.0)
+    cache.put("stock_prices", ["AAPL"], [{"stock": "AAPL", "price": 200.0}])
+    path.write_text("{не JSON", encoding="utf-8")
+
+    assert cache.get("stock_prices", ["AAPL"]).value == [{"stock": "AAPL", "price": 200.0}]
+    cache.put("currency_rates", ["USD"], [])
+    assert MarketDataCache(str(path)).get("stock_prices", ["AAPL"]) is not None
+
+
+def _put_entries(path: str, worker: int) -> None:
+    """Записывает в общий файл кэша 20 записей отдельным экземпляром (в отдельном процессе)"""
+    cache = MarketDataCache(path)
+    for number in range(20):
+        cache.put("stock_prices", [f"W{worker}-{number}"], [])
+
+
+def test_concurrent_writers_for_market_data_cache(tmp_path):
+    """Тестирует, что параллельные процессы не теряют записи друг друга"""
+    path = str(tmp_path / "market_data.json")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.starmap(_put_entries, [(path, worker) for worker in range(4)])
+
+    cache = MarketDataCache(path)
+    missing = [
+        (worker, number)
+        for worker in range(4)
+        for number in range(20)
+        if cache.get("stock_prices", [f"W{worker}-{number}"]) is None
+    ]
+    assert missing == []
@@ -0,0 +1,145 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src import metrics
+from src.data import prepare_operations
+from src.metrics import get_metrics, metrics_json, metrics_prometheus, record_cache, record_rows, span, timed
+from src.services import filter_transaction_by_search_str
+from src.views import get_events
+
+
+@pytest.fixture
+def enabled_metrics():
+    """Фикстура включает сбор метрик с пустым реестром и выключает его после теста"""
+    metrics.reset_metrics()
+    metrics.set_metrics_enabled(True)
+    yield
+    metrics.set_metrics_enabled(False)
+    metrics.reset_metrics()
+
+
+@pytest.fixture
+def market_data():
+    """Фикстура подменяет рыночные данные и настройки пользователя"""
+    with (
+        patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]}),
+        patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []}),
+        patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []}),
+    ):
+        yield
+
+
+def _spans(snapshot: dict) -> dict:
+    return {item["name"]: item for item in snapshot["spans"]}
+
+
+def _rows(snapshot: dict) -> dict:
+    return {item["labels"]["stage"]: item["value"] for item in snapshot["counters"] if item["name"] == "rows"}
+
+
+def test_nothing_recorded_when_disabled(get_data_for_get_expenses, market_data):
+    """Тестирует, что при выключенном сборе метрики не записываются, а span - общий пустой объект"""
+    metrics.reset_metrics()
+
+    get_events(get_data_for_get_expenses, "2021-12-31", "M")
+    record_rows("stage", 10)
+    record_cache("cache", True)
+
+    assert span("a") is span("b", label=1)
+    assert get_metrics() == {"spans": [], "counters": [], "cache_hit_ratio": {}}
+    assert metrics_prometheus() == ""
+
+
+def test_enabled_from_dotenv(dotenv_variables, monkeypatch):
+    """Тестирует, что METRICS_ENABLED из .env читается при первом обращении к метрикам, после загрузки .env"""
+    dotenv_variables["METRICS_ENABLED"] = "1"
+    monkeypatch.setattr(metrics, "enabled", False)
+    monkeypatch.setattr(metrics, "_settings_loaded", False)
+    metrics.reset_metrics()
+
+    record_rows("stage", 10)
+
+    assert metrics.enabled is True
+    assert _rows(get_metrics()) == {"stage": 10}
+    metrics.reset_metrics()
+
+
+def test_stages_for_get_events(get_data_for_get_expenses, market_data, enabled_metrics):
+    """Тестирует время этапов и число строк для get_events по подготовленным операциям"""
+    prepared = prepare_operations(get_data_for_get_expenses)
+    get_events(prepared, "2021-12-31", "M")
+    get_events(prepared, "2021-12-31", "Y")
+
+    snapshot = get_metrics()
+    spans = _spans(snapshot)
+
+    for name in (
+        "data.prepare_operations",
+        "data.convert_dates",
+        "data.sort",
+        "views.get_events_dict",
+        "views.select_period",
+        "views.wait_market_data",
+        "utils.aggregate_operations",
+        "serialization.dumps",
+    ):
+        assert spans[name]["total_seconds"] >= 0
+    assert spans["data.prepare_operations"]["count"] == 1
+    assert spans["views.get_events_dict"]["count"] == 2
+    assert spans["views.get_events_dict"]["max_seconds"] <= spans["views.get_events_dict"]["total_seconds"]
+    assert _rows(snapshot)["data.prepare_operations"] == len(get_data_for_get_expenses)
+    assert _rows(snapshot)["views.select_period"] == _rows(snapshot)["utils.aggregate_operations"]
+
+
+def test_labels_and_cache_hit_ratio(enabled_metrics):
+    """Тестирует метки этапов и долю попаданий в кэш"""
+    with span("stage", period="M"):
+        pass
+    with span("stage", period="Y"):
+        pass
+    for hit in (True, True, False, True):
+        record_cache("market_data_fresh", hit)
+
+    snapshot = get_metrics()
+
+    assert [item["labels"] for item in snapshot["spans"]] == [{"period": "M"}, {"period": "Y"}]
+    assert snapshot["cache_hit_ratio"] == {"market_data_fresh": 0.75}
+    assert json.loads(metrics_json()) == json.loads(json.dumps(snapshot))
+
+
+def test_timed_decorator(enabled_metrics):
+    """Тестирует декоратор timed: время записывается и при исключении, имя функции сохраняется"""
+
+    @timed("custom.stage")
+    def fail():
+        raise ValueError("ошибка")
+
+    with pytest.raises(ValueError):
+        fail()
+
+    assert fail.__name__ == "fail"
+    assert _spans(get_metrics())["custom.stage"]["count"] == 1
+
+
+def test_prometheus_exposition(get_data_for_services, enabled_metrics):
+    """Тестирует текстовый формат Prometheus"""
+    filter_transaction_by_search_str(get_data_for_services, "Супермаркеты")
+    record_cache("market_data_fallback", False)
+    with span("stage", name='a"b'):
+        pass
+
+    text = metrics_prometheus()
+    lines = text.splitlines()
+
+    assert text.endswith("\n")
+    assert "# TYPE banking_operations_span_seconds summary" in lines
+    assert 'banking_operations_span_seconds_count{span="services.find_transactions_by_search_str"} 1' in lines
+    assert (
+        f'banking_operations_rows_total{{stage="services.find_transactions_by_search_str"}} '
+        f"{len(get_data_for_services)}" in lines
+    )
+    assert 'banking_operations_cache_requests_total{cache="market_data_fallback",result="miss"} 1' in lines
+    assert any(line.startswith('banking_operations_span_max_seconds{span="stage",name="a\\"b"} ') for line in lines)
+    assert lines.count("# TYPE banking_operations_rows_total counter") == 1
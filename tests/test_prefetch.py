@@ -0,0 +1,86 @@
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+import requests
+
+from src.prefetch import DEFAULT_INTERVAL, MarketDataPrefetcher, main
+from src.rate_limiter import BATCH, current_priority
+
+
+@pytest.fixture
+def settings_path(tmp_path):
+    """Фикстура создаёт файл пользовательских настроек"""
+    path = tmp_path / "user_settings.json"
+    path.write_text(json.dumps({"user_currencies": ["USD"], "user_stocks": ["AAPL"]}))
+    return str(path)
+
+
+@patch("src.utils.get_stock_prices")
+@patch("src.utils.get_currency_rates")
+def test_refresh_once_for_prefetcher(mock_get_currency_rates, mock_get_stock_prices, settings_path):
+    """Тестирует обновление разделов из настроек с пакетным приоритетом"""
+    priorities = []
+    mock_get_currency_rates.side_effect = lambda currencies: priorities.append(current_priority())
+
+    result = MarketDataPrefetcher(settings_path).refresh_once()
+
+    assert result == {"currency_rates": True, "stock_prices": True}
+    mock_get_currency_rates.assert_called_once_with(["USD"])
+    mock_get_stock_prices.assert_called_once_with(["AAPL"])
+    assert priorities == [BATCH]
+
+
+@patch("src.utils.get_stock_prices", side_effect=requests.HTTPError("Ошибка HTTP: 500"))
+@patch("src.utils.get_currency_rates")
+def test_provider_error_for_prefetcher(mock_get_currency_rates, mock_get_stock_prices, settings_path):
+    """Тестирует, что ошибка одного провайдера не мешает обновлению другого раздела"""
+    prefetcher = MarketDataPrefetcher(settings_path, interval=600, retry_delay=30, jitter=0)
+
+    assert prefetcher.refresh_once() == {"currency_rates": True, "stock_prices": False}
+    assert prefetcher.next_delay(succeeded=False) == 30
+    assert prefetcher.next_delay(succeeded=True) == 600
+
+
+def test_interval_for_prefetcher(settings_path):
+    """Тестирует интервал обновления до истечения срока свежести кэша"""
+    prefetcher = MarketDataPrefetcher(settings_path, lead=0.25, jitter=0.1)
+
+    assert prefetcher.interval == DEFAULT_INTERVAL
+    with patch("src.utils.market_data_max_age", 1000.0):
+        assert prefetcher.interval == 750
+        assert 675 <= prefetcher.next_delay(succeeded=True) <= 750
+
+
+def test_wrong_fractions_for_prefetcher():
+    """Тестирует передачу неверных долей lead и jitter"""
+    with pytest.raises(ValueError) as exc_info:
+        MarketDataPrefetcher(lead=1)
+
+    assert str(exc_info.value) == "Доли lead и jitter должны быть в диапазоне от 0 до 1"
+
+
+@patch("src.utils.get_stock_prices")
+@patch("src.utils.get_currency_rates")
+def test_background_thread_for_prefetcher(mock_get_currency_rates, mock_get_stock_prices, settings_path):
+    """Тестирует запуск и остановку обновления в фоновом потоке"""
+    refreshed = threading.Event()
+    mock_get_stock_prices.side_effect = lambda stocks: refreshed.set()
+    prefetcher = MarketDataPrefetcher(settings_path, interval=60)
+
+    prefetcher.start()
+    assert refreshed.wait(5)
+    prefetcher.stop(timeout=5)
+
+    mock_get_currency_rates.assert_called_with(["USD"])
+
+
+@patch("src.utils.get_stock_prices")
+@patch("src.utils.get_currency_rates")
+def test_main_once_for_prefetcher(mock_get_currency_rates, mock_get_stock_prices, settings_path):
+    """Тестирует однократное обновление из командной строки"""
+    main(["--settings", settings_path, "--once"])
+
+    mock_get_currency_rates.assert_called_once_with(["USD"])
+    mock_get_stock_prices.assert_called_once_with(["AAPL"])
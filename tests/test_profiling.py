@@ -0,0 +1,92 @@
+import io
+import pstats
+
+import pytest
+
+from src import profiling
+from src.profiling import profile_label, profiled, set_profile_mode
+from src.utils import get_expenses
+
+
+@pytest.fixture(autouse=True)
+def reset_profiling():
+    """Фикстура восстанавливает режим и директорию профилирования после теста"""
+    mode, output_dir = profiling.profile_mode, profiling.profile_dir
+    yield
+    set_profile_mode(mode, output_dir)
+
+
+def test_settings_from_dotenv(dotenv_variables, monkeypatch, tmp_path):
+    """Тестирует, что PROFILE_MODE и PROFILE_DIR из .env читаются при первом профилируемом блоке"""
+    dotenv_variables.update({"PROFILE_MODE": "cpu", "PROFILE_DIR": str(tmp_path)})
+    monkeypatch.setattr(profiling, "_settings_loaded", False)
+
+    with profiled("dotenv", stream=io.StringIO()) as profile:
+        pass
+
+    assert profile is not None
+    assert (profiling.profile_mode, profiling.profile_dir) == ("cpu", str(tmp_path))
+    assert (tmp_path / "dotenv.prof").exists()
+
+
+def test_cpu_profile(get_data_for_get_expenses, tmp_path):
+    """Тестирует файл .prof и сводку функций по накопленному времени"""
+    stream = io.StringIO()
+    label = profile_label("expenses", {"date": "2021-12-31", "period": "M"})
+
+    with profiled(label, "cpu", str(tmp_path), top=5, stream=stream) as profile:
+        get_expenses(get_data_for_get_expenses)
+
+    assert profile.path == str(tmp_path / "expenses_date=2021-12-31_period=M.prof")
+    assert "get_expenses" in str(pstats.Stats(profile.path).stats)
+    assert "Ordered by: cumulative time" in profile.summary
+    assert stream.getvalue().startswith(f"Профиль {label} (cpu): {profile.path}")
+
+
+def test_memory_profile(tmp_path):
+    """Тестирует файл стеков выделений памяти и сводку мест выделения"""
+    stream = io.StringIO()
+
+    with profiled("memory", "memory", str(tmp_path), stream=stream) as profile:
+        kept = [str(number) * 10 for number in range(10000)]
+
+    lines = (tmp_path / "memory.collapsed").read_text(encoding="utf-8").splitlines()
+    assert len(kept) == 10000
+    assert profile.path == str(tmp_path / "memory.collapsed")
+    assert any(__file__ in line.rsplit(" ", 1)[0] and int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+    assert profile.summary.startswith("Пик: ")
+    assert f"1. {__file__}:" in profile.summary
+
+
+def test_disabled_and_repeated_profiles(tmp_path):
+    """Тестирует выключенное профилирование, режим по умолчанию и профиль блока с исключением"""
+    set_profile_mode(None, str(tmp_path))
+    with profiled("query") as profile:
+        pass
+    assert profile is None
+    assert list(tmp_path.iterdir()) == []
+
+    set_profile_mode("cpu")
+    with profiled("query", stream=io.StringIO()):
+        pass
+    with pytest.raises(ValueError):
+        with profiled("query", stream=io.StringIO()):
+            raise ValueError("ошибка")
+
+    assert sorted(file.name for file in tmp_path.iterdir()) == ["query-2.prof", "query.prof"]
+
+
+def test_profile_label():
+    """Тестирует метку профиля из параметров запроса"""
+    label = profile_label("search", {"search": "Супермаркеты / кафе", "date": None})
+
+    assert label == "search_search=Супермаркеты-кафе"
+    assert profile_label("../..") == "..-.."
+
+
+def test_incorrect_mode_for_profiling():
+    """Тестирует неизвестный режим профилирования"""
+    with pytest.raises(ValueError) as exc_info:
+        set_profile_mode("gpu")
+
+    assert str(exc_info.value) == "Режим профилирования должен быть одним из: cpu, memory"
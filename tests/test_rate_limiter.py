@@ -0,0 +1,220 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.rate_limiter import (
+    BATCH,
+    INTERACTIVE,
+    RateLimitExceeded,
+    RateLimitScheduler,
+    RequestCoalescer,
+    SharedTokenBucket,
+    batch_priority,
+    current_priority,
+)
+from src.utils import get_stock_prices, set_rate_limit_scheduler
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Фикстура возвращает путь к отдельной базе квот для теста"""
+    return str(tmp_path / "rate_limit.sqlite3")
+
+
+def test_capacity_for_shared_token_bucket(db_path):
+    """Тестирует выдачу токенов в пределах ёмкости и ожидание после"""
+    bucket = SharedTokenBucket("test", rate=1, capacity=2, db_path=db_path)
+
+    assert bucket.try_acquire(INTERACTIVE) == 0
+    assert bucket.try_acquire(INTERACTIVE) == 0
+    assert 0 < bucket.try_acquire(INTERACTIVE) <= 1
+
+
+def test_quota_is_shared_between_instances_for_shared_token_bucket(db_path):
+    """Тестирует, что экземпляры с одной базой (как разные процессы) делят квоту"""
+    first = SharedTokenBucket("test", rate=0.01, capacity=2, db_path=db_path)
+    second = SharedTokenBucket("test", rate=0.01, capacity=2, db_path=db_path)
+
+    assert first.try_acquire(INTERACTIVE) == 0
+    assert second.try_acquire(INTERACTIVE) == 0
+    assert first.try_acquire(INTERACTIVE) > 0
+    assert second.try_acquire(INTERACTIVE) > 0
+
+
+def test_batch_reserve_for_shared_token_bucket(db_path):
+    """Тестирует, что пакетные запросы оставляют резерв квоты интерактивным"""
+    bucket = SharedTokenBucket("test", rate=0.01, capacity=5, db_path=db_path, batch_reserve=0.2)
+
+    granted_batch = 0
+    while bucket.try_acquire(BATCH) == 0:
+        granted_batch += 1
+
+    assert granted_batch == 4
+    assert bucket.try_acquire(INTERACTIVE) == 0
+
+
+def test_max_wait_for_shared_token_bucket(db_path):
+    """Тестирует исключение, если токен не появится за допустимое время"""
+    bucket = SharedTokenBucket("test", rate=0.01, capacity=1, db_path=db_path)
+    bucket.acquire()
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        bucket.acquire(max_wait=0.1)
+    assert str(exc_info.value) == "Квота запросов к test исчерпана"
+
+
+def test_drain_for_shared_token_bucket(db_path):
+    """Тестирует обнуление квоты"""
+    bucket = SharedTokenBucket("test", rate=0.01, capacity=3, db_path=db_path)
+    bucket.drain()
+
+    assert bucket.try_acquire(INTERACTIVE) > 0
+
+
+def test_incorrect_rate_for_shared_token_bucket(db_path):
+    """Тестирует кейс, когда скорость квоты не положительная"""
+    with pytest.raises(ValueError):
+        SharedTokenBucket("test", rate=0, capacity=1, db_path=db_path)
+
+
+def test_batch_priority_context():
+    """Тестирует переключение приоритета в контексте batch_priority"""
+    assert current_priority() == INTERACTIVE
+    with batch_priority():
+        assert current_priority() == BATCH
+    assert current_priority() == INTERACTIVE
+
+
+def test_identical_requests_for_request_coalescer():
+    """Тестирует, что одинаковые одновременные запросы выполняются один раз"""
+    coalescer = RequestCoalescer()
+    calls = []
+    started = threading.Event()
+
+    def request():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "response"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(coalescer.run("key", request))) for _ in range(5)]
+    threads[0].start()
+    started.wait()
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["response"] * 5
+
+
+def test_exception_for_request_coalescer():
+    """Тестирует проброс исключения вызывающему"""
+    coalescer = RequestCoalescer()
+
+    with pytest.raises(RuntimeError):
+        coalescer.run("key", lambda: (_ for _ in ()).throw(RuntimeError("error")))
+
+    assert coalescer.run("key", lambda: "retry") == "retry"
+
+
+def test_retry_after_429_for_rate_limit_scheduler(db_path):
+    """Тестирует повтор запроса после ответа 429"""
+    scheduler = RateLimitScheduler({"marketstack": SharedTokenBucket("marketstack", 100, 5, db_path)})
+    responses = [MagicMock(status_code=429), MagicMock(status_code=200)]
+
+    response = scheduler.call("marketstack", "key", lambda: responses.pop(0))
+
+    assert response.status_code == 200
+    assert responses == []
+
+
+def test_identical_requests_for_request_coalescer_async():
+    """Тестирует объединение одинаковых одновременных корутин"""
+    coalescer = RequestCoalescer()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "response"
+
+    async def run():
+        return await asyncio.gather(*[coalescer.run_async("key", request) for _ in range(3)])
+
+    assert asyncio.run(run()) == ["response"] * 3
+    assert len(calls) == 1
+
+
+def test_locked_db_does_not_block_loop_for_acquire_async(db_path):
+    """Тестирует, что ожидание блокировки базы другим процессом не останавливает цикл событий"""
+    bucket = SharedTokenBucket("test", rate=1, capacity=2, db_path=db_path)
+    other_process = sqlite3.connect(db_path, isolation_level=None)
+    other_process.execute("BEGIN IMMEDIATE")
+
+    async def run():
+        task = asyncio.ensure_future(bucket.acquire_async())
+        started = time.monotonic()
+        await asyncio.sleep(0.1)
+        # Пока блокировка занята, цикл событий продолжает выполнять другие корутины
+        assert time.monotonic() - started < 0.5
+        assert not task.done()
+        other_process.execute("COMMIT")
+        await asyncio.wait_for(task, timeout=5)
+
+    try:
+        asyncio.run(run())
+    finally:
+        other_process.close()
+
+
+@patch("requests.get")
+def test_coalesced_requests_for_get_stock_prices(mock_get, db_path, get_data_for_get_stock_prices):
+    """Тестирует, что одновременные одинаковые вызовы get_stock_prices делают один запрос в рамках квоты"""
+
+    def slow_get(*args, **kwargs):
+        time.sleep(0.1)
+        return MagicMock(status_code=200, json=MagicMock(return_value=get_data_for_get_stock_prices))
+
+    mock_get.side_effect = slow_get
+    set_rate_limit_scheduler(RateLimitScheduler({"marketstack": SharedTokenBucket("marketstack", 10, 10, db_path)}))
+    try:
+        threads = [threading.Thread(target=get_stock_prices, args=(["AAPL", "AMZN"],)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        set_rate_limit_scheduler(None)
+
+    assert mock_get.call_count == 1
+
+
+def test_from_env_for_rate_limit_scheduler(db_path):
+    """Тестирует создание квот из переменных окружения"""
+    with patch.dict("os.environ", {"MARKETSTACK_RATE_LIMIT": "5/60", "MARKET_DATA_RATE_LIMIT_DB": db_path}):
+        scheduler = RateLimitScheduler.from_env()
+
+    assert list(scheduler.buckets) == ["marketstack"]
+    assert scheduler.buckets["marketstack"].capacity == 5
+    assert scheduler.buckets["marketstack"].rate == pytest.approx(5 / 60)
+
+
+@patch.dict("os.environ", {}, clear=True)
+def test_without_quotas_for_rate_limit_scheduler():
+    """Тестирует, что без настроенных квот планировщик не создаётся"""
+    assert RateLimitScheduler.from_env() is None
+
+
+@pytest.mark.parametrize("quota", ["10", "a/b", "10/0", "0/60", "1/2/3"])
+def test_incorrect_quota_for_rate_limit_scheduler(quota, db_path):
+    """Тестирует понятную ошибку при неверной квоте в переменной окружения"""
+    with patch.dict("os.environ", {"MARKETSTACK_RATE_LIMIT": quota, "MARKET_DATA_RATE_LIMIT_DB": db_path}):
+        with pytest.raises(ValueError, match="MARKETSTACK_RATE_LIMIT"):
+            RateLimitScheduler.from_env()
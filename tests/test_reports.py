@@ -30,7 +30,7 @@ def test_none_expenses_for_get_expenses_for_3_months_by_category(get_data_for_re
 
 def test_none_operation_for_get_expenses_for_3_months_by_category(caplog):
     """Тестирует кейс, когда транзакции не переданы"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(ValueError) as exc_info:
         get_expenses_for_3_months_by_category(None, "Переводы", "2021-12-31")
@@ -43,7 +43,7 @@ def test_none_operation_for_get_expenses_for_3_months_by_category(caplog):
 
 def test_operation_is_not_pd_df_for_get_expenses_for_3_months_by_category(caplog):
     """Тестирует кейс, когда транзакции переданы не как pd.DataFrame"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(TypeError) as exc_info:
         get_expenses_for_3_months_by_category([], "Переводы", "2021-12-31")
@@ -56,7 +56,7 @@ def test_operation_is_not_pd_df_for_get_expenses_for_3_months_by_category(caplog
 
 def test_none_category_for_get_expenses_for_3_months_by_category(get_data_for_reports, caplog):
     """Тестирует кейс, когда категория не передана"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(ValueError) as exc_info:
         get_expenses_for_3_months_by_category(get_data_for_reports, None, "2021-12-31")
@@ -69,7 +69,7 @@ def test_none_category_for_get_expenses_for_3_months_by_category(get_data_for_re
 
 def test_category_is_not_str_for_get_expenses_for_3_months_by_category(get_data_for_reports, caplog):
     """Тестирует кейс, когда категория передана не в str"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(TypeError) as exc_info:
         get_expenses_for_3_months_by_category(get_data_for_reports, [], "2021-12-31")
@@ -82,13 +82,14 @@ def test_category_is_not_str_for_get_expenses_for_3_months_by_category(get_data_
 
 def test_date_not_convert_to_datetime_for_get_expenses_for_3_months_by_category(get_data_for_reports, caplog):
     """Тестирует кейс, когда дата не конвертируется в datetime"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(ValueError) as exc_info:
         get_expenses_for_3_months_by_category(get_data_for_reports, "Переводы", "31.12.2025")
     assert str(exc_info.value) == "Дата указана неверно. Маска: YYYY-MM-DD"
 
     assert "не конвертируется в datetime" in caplog.text
+    assert caplog.records[0].getMessage() == "Ошибка: Дата 31.12.2025 (тип <class 'str'>) не конвертируется в datetime"
     assert len(caplog.records) == 1
     assert caplog.records[0].levelname == "CRITICAL"
 
@@ -0,0 +1,109 @@
+import datetime
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import serialization
+from src.serialization import dumps, get_json_backend, set_json_backend, set_output_format
+from src.utils import get_expenses, get_expenses_dict
+
+
+@pytest.fixture(autouse=True)
+def reset_serialization():
+    """Фикстура восстанавливает формат вывода и библиотеку JSON после теста"""
+    output_format, json_backend = serialization.output_format, serialization.json_backend
+    yield
+    set_output_format(output_format)
+    set_json_backend(json_backend)
+
+
+VALUE = {
+    "category": "Супермаркеты",
+    "amount": np.float64(160.5),
+    "count": np.int64(3),
+    "flag": np.bool_(True),
+    "values": np.array([1, 2]),
+    "date": pd.Timestamp("2021-12-31 16:44:00"),
+    "day": datetime.date(2021, 12, 31),
+    "time": np.datetime64("2021-12-31T16:44:00"),
+    "missing": pd.NaT,
+}
+
+EXPECTED = {
+    "category": "Супермаркеты",
+    "amount": 160.5,
+    "count": 3,
+    "flag": True,
+    "values": [1, 2],
+    "date": "2021-12-31T16:44:00",
+    "day": "2021-12-31",
+    "time": "2021-12-31T16:44:00",
+    "missing": None,
+}
+
+
+def test_pretty_matches_json_dumps():
+    """Тестирует, что формат pretty совпадает с прежним json.dumps(..., indent=4)"""
+    value = {"category": "Супермаркеты", "amount": 160.0, "items": [1, 2]}
+
+    assert dumps(value) == json.dumps(value, ensure_ascii=False, indent=4)
+    assert dumps(VALUE, pretty=True) == json.dumps(EXPECTED, ensure_ascii=False, indent=4)
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_compact_numpy_pandas_datetime(backend):
+    """Тестирует компактный вывод значений numpy, pandas и datetime обеими библиотеками"""
+    if backend == "orjson":
+        pytest.importorskip("orjson")
+    set_json_backend(backend)
+
+    result = dumps(VALUE, pretty=False)
+
+    assert get_json_backend() == backend
+    assert "\n" not in result and ", " not in result
+    assert json.loads(result) == EXPECTED
+
+
+def test_json_when_orjson_not_installed(monkeypatch):
+    """Тестирует переход на json, если orjson не установлен"""
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    set_json_backend("orjson")
+
+    assert get_json_backend() == "json"
+    assert dumps({"a": 1}, pretty=False) == '{"a":1}'
+
+
+def test_output_format_for_public_functions(get_data_for_get_expenses):
+    """Тестирует переключение формата вывода публичных функций"""
+    set_output_format("compact")
+
+    result = get_expenses(get_data_for_get_expenses)
+
+    assert "\n" not in result
+    assert json.loads(result) == json.loads(json.dumps(get_expenses_dict(get_data_for_get_expenses)))
+
+
+def test_settings_from_dotenv(dotenv_variables, monkeypatch):
+    """Тестирует, что JSON_OUTPUT_FORMAT и JSON_BACKEND из .env читаются при первом выводе"""
+    dotenv_variables.update({"JSON_OUTPUT_FORMAT": "compact", "JSON_BACKEND": "json"})
+    monkeypatch.setattr(serialization, "_settings_loaded", False)
+
+    assert dumps({"a": [1, 2]}) == '{"a":[1,2]}'
+    assert (serialization.output_format, serialization.json_backend) == ("compact", "json")
+
+
+def test_incorrect_values_for_serialization():
+    """Тестирует неверный формат, неверную библиотеку и неподдерживаемые значения"""
+    with pytest.raises(ValueError) as exc_info:
+        set_output_format("yaml")
+    assert str(exc_info.value) == "Формат вывода должен быть одним из: pretty, compact"
+
+    with pytest.raises(ValueError) as exc_info:
+        set_json_backend("ujson")
+    assert str(exc_info.value) == "Библиотека JSON должна быть одной из: auto, orjson, json"
+
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
@@ -0,0 +1,270 @@
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+import requests
+
+from src import metrics
+from src.profiling import set_profile_mode
+from src.server import (
+    OperationsDataset,
+    OperationsServer,
+    PreforkOperationsServer,
+    SharedOperationsDataset,
+)
+from src.views import get_events
+
+
+def _operation(date: str, amount: float, category: str, description: str) -> dict:
+    return {
+        "Дата операции": f"{date} 12:00:00",
+        "Дата платежа": date,
+        "Статус": "OK",
+        "Сумма операции": amount,
+        "Валюта операции": "RUB",
+        "Категория": category,
+        "Описание": description,
+        "Сумма операции с округлением": abs(amount),
+    }
+
+
+@pytest.fixture
+def operations_file(tmp_path):
+    """Фикстура создаёт Excel-файл с операциями"""
+    path = tmp_path / "operations.xlsx"
+    pd.DataFrame(
+        [
+            _operation("30.12.2021", -160.89, "Супермаркеты", "Колхоз"),
+            _operation("15.12.2021", -64.0, "Супермаркеты", "Магнит"),
+            _operation("10.12.2021", 5000.0, "Пополнения", "Перевод с карты"),
+            _operation("01.11.2021", -1500.0, "Ж/д билеты", "РЖД"),
+            _operation("20.10.2021", -300.0, None, "Без категории"),
+        ]
+    ).to_excel(path, index=False)
+    return path
+
+
+@pytest.fixture
+def market_data():
+    """Фикстура подменяет рыночные данные и настройки пользователя"""
+    with (
+        patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]}),
+        patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []}),
+        patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []}),
+    ):
+        yield
+
+
+@pytest.fixture
+def operations_server(operations_file, market_data):
+    """Фикстура запускает сервис операций на свободном порту"""
+    with OperationsServer(OperationsDataset(str(operations_file), check_interval=0.05)) as server:
+        yield server
+
+
+def test_events_for_operations_server(operations_server, operations_file):
+    """Тестирует, что /events возвращает результат get_events по загруженным операциям"""
+    response = requests.get(f"{operations_server.url}/events", params={"date": "2021-12-31", "period": "M"})
+
+    assert response.status_code == 200
+    assert response.json() == json.loads(get_events(pd.read_excel(operations_file), "2021-12-31", "M"))
+
+
+def test_search_for_operations_server(operations_server):
+    """Тестирует поиск транзакций, в том числе по операциям без категории"""
+    found = requests.get(f"{operations_server.url}/transactions", params={"search": "магнит"}).json()
+    not_specified = requests.get(f"{operations_server.url}/transactions", params={"search": "не указано"}).json()
+
+    assert [item["Описание"] for item in found] == ["Магнит"]
+    assert [item["Описание"] for item in not_specified] == ["Без категории"]
+
+
+def test_expenses_report_for_operations_server(operations_server):
+    """Тестирует отчёт о тратах по категории за 3 месяца"""
+    params = {"category": "супермаркеты", "date": "2021-12-31"}
+    result = requests.get(f"{operations_server.url}/reports/expenses", params=params).json()
+
+    assert result == [{"Категория": "Супермаркеты", "Сумма операции с округлением": 224.89}]
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/events", {"date": "31.12.2021"}),
+        ("/events", {"date": "2021-12-31", "period": "D"}),
+        ("/transactions", {}),
+        ("/reports/expenses", {"category": "Супермаркеты", "date": "2021/12/31"}),
+    ],
+)
+def test_bad_request_for_operations_server(operations_server, path, params):
+    """Тестирует ответ 400 на неверные параметры запроса"""
+    response = requests.get(f"{operations_server.url}{path}", params=params)
+
+    assert response.status_code == 400
+    assert response.json()["message"]
+
+
+def test_not_found_for_operations_server(operations_server):
+    """Тестирует ответ 404 на неизвестный путь"""
+    assert requests.get(f"{operations_server.url}/unknown").status_code == 404
+
+
+def test_internal_error_for_operations_server(operations_server, caplog):
+    """Тестирует ответ 500 в формате JSON и запись ошибки в журнал при непредвиденном исключении"""
+    with patch("src.server.run_query", side_effect=RuntimeError("database is locked")):
+        response = requests.get(f"{operations_server.url}/transactions", params={"search": "магнит"})
+
+    assert response.status_code == 500
+    assert response.json() == {"message": "Internal Server Error"}
+    assert "Ошибка при обработке запроса /transactions" in caplog.text
+    assert "RuntimeError: database is locked" in caplog.text
+
+
+def test_concurrent_requests_for_operations_server(operations_server):
+    """Тестирует одновременные запросы к сервису"""
+    expected = requests.get(f"{operations_server.url}/events", params={"date": "2021-12-31", "period": "Y"}).json()
+    results = []
+
+    def worker():
+        for _ in range(5):
+            response = requests.get(f"{operations_server.url}/events", params={"date": "2021-12-31", "period": "Y"})
+            results.append(response.json())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [expected] * 40
+
+
+def test_reload_after_change_for_operations_dataset(operations_file):
+    """Тестирует перечитывание файла после изменения и сохранение снимка без изменений"""
+    dataset = OperationsDataset(str(operations_file))
+    first = dataset.get()
+
+    assert dataset.reload_if_changed() is False
+    assert dataset.get() is first
+
+    pd.DataFrame([_operation("31.12.2021", -10.0, "Фастфуд", "Вкусно")]).to_excel(operations_file, index=False)
+    stat = os.stat(operations_file)
+    os.utime(operations_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert dataset.reload_if_changed() is True
+    assert len(dataset.get().operations) == 1
+    assert len(first.operations) == 5
+
+
+def test_keep_previous_operations_for_operations_dataset(operations_file):
+    """Тестирует, что повреждённый файл не заменяет загруженные операции"""
+    dataset = OperationsDataset(str(operations_file))
+    first = dataset.get()
+
+    operations_file.write_bytes(b"not an excel file")
+
+    assert dataset.reload_if_changed() is False
+    assert dataset.get() is first
+
+
+def test_watch_survives_unexpected_error_for_operations_dataset(operations_file):
+    """Тестирует, что неожиданная ошибка загрузки не останавливает фоновую проверку файла"""
+    calls = []
+
+    def loader(path: str) -> pd.DataFrame:
+        calls.append(path)
+        if len(calls) > 1:
+            raise KeyError("Дата операции")
+        return pd.read_excel(path)
+
+    dataset = OperationsDataset(str(operations_file), loader=loader, check_interval=0.01)
+    first = dataset.get()
+    stat = os.stat(operations_file)
+    os.utime(operations_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    dataset.start_watching()
+    try:
+        for _ in range(500):
+            if len(calls) >= 3:
+                break
+            threading.Event().wait(0.01)
+        alive = dataset._thread.is_alive()
+    finally:
+        dataset.stop_watching()
+
+    assert len(calls) >= 3
+    assert alive
+    assert dataset.get() is first
+
+
+def test_file_not_found_for_operations_dataset(tmp_path):
+    """Тестирует кейс, когда файла операций нет"""
+    with pytest.raises(FileNotFoundError):
+        OperationsDataset(str(tmp_path / "missing.xlsx")).get()
+
+
+@pytest.fixture
+def prefork_server(operations_file, market_data):
+    """Фикстура запускает сервис из двух процессов-обработчиков с данными в shared memory"""
+    with PreforkOperationsServer(
+        SharedOperationsDataset(str(operations_file), check_interval=0.05), workers=2
+    ) as server:
+        yield server
+
+
+def test_same_results_for_prefork_operations_server(prefork_server, operations_server):
+    """Тестирует, что процессы-обработчики отвечают так же, как однопроцессный сервис"""
+    requests_params = [
+        ("/events", {"date": "2021-12-31", "period": "M"}),
+        ("/transactions", {"search": "супермаркеты"}),
+        ("/transactions", {"search": "не указано"}),
+        ("/reports/expenses", {"category": "Супермаркеты", "date": "2021-12-31"}),
+    ]
+    for path, params in requests_params:
+        expected = requests.get(f"{operations_server.url}{path}", params=params)
+        for _ in range(4):
+            assert requests.get(f"{prefork_server.url}{path}", params=params).text == expected.text
+
+
+def test_reload_for_prefork_operations_server(prefork_server, operations_file):
+    """Тестирует переключение процессов-обработчиков на новый блок после изменения файла"""
+    pd.DataFrame([_operation("31.12.2021", -10.0, "Фастфуд", "Вкусно")]).to_excel(operations_file, index=False)
+    stat = os.stat(operations_file)
+    os.utime(operations_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    prefork_server.dataset.reload_if_changed()
+
+    for _ in range(4):
+        assert requests.get(f"{prefork_server.url}/health").json()["operations"] == 1
+
+
+def test_metrics_for_operations_server(operations_server):
+    """Тестирует эндпоинт /metrics в формате Prometheus и JSON"""
+    metrics.reset_metrics()
+    metrics.set_metrics_enabled(True)
+    try:
+        requests.get(f"{operations_server.url}/events", params={"date": "2021-12-31"})
+        text = requests.get(f"{operations_server.url}/metrics")
+        as_json = requests.get(f"{operations_server.url}/metrics", params={"format": "json"})
+    finally:
+        metrics.set_metrics_enabled(False)
+        metrics.reset_metrics()
+
+    assert text.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    assert 'banking_operations_span_seconds_count{span="views.get_events_dict"} 1' in text.text.splitlines()
+    assert as_json.headers["Content-Type"] == "application/json; charset=utf-8"
+    assert "views.get_events_dict" in [item["name"] for item in as_json.json()["spans"]]
+
+
+def test_profile_for_operations_server(operations_server, tmp_path):
+    """Тестирует профиль запроса к сервису, подписанный типом запроса и параметрами"""
+    set_profile_mode("cpu", str(tmp_path / "profiles"))
+    try:
+        response = requests.get(f"{operations_server.url}/events", params={"date": "2021-12-31"})
+    finally:
+        set_profile_mode(None)
+
+    assert response.status_code == 200
+    assert [file.name for file in (tmp_path / "profiles").iterdir()] == ["events_date=2021-12-31.prof"]
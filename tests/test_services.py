@@ -74,7 +74,7 @@ def test_transactions_not_found_for_filter_transaction_by_search_str(get_data_fo
 
 def test_none_search_str_for_filter_transaction_by_search_str(get_data_for_services, caplog):
     """Тестирует кейс, когда не передана строка поиска"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(ValueError) as exc_info:
         filter_transaction_by_search_str(get_data_for_services, None)
@@ -101,7 +101,7 @@ def test_search_is_not_str_for_filter_transaction_by_search_str(
     search_str, raise_message, get_data_for_services, caplog
 ):
     """Тестирует кейс, когда cтрока передана не в типе str"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(TypeError) as exc_info:
         filter_transaction_by_search_str(get_data_for_services, search_str)
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.settings import SettingsLoader
+
+
+class FakeClock:
+    """Управляемое монотонное время"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def settings_file(tmp_path):
+    """Фикстура создаёт файл пользовательских настроек"""
+    path = tmp_path / "user_settings.json"
+    path.write_text(json.dumps({"user_currencies": ["USD"], "user_stocks": ["AAPL"]}))
+    return path
+
+
+def test_read_once_for_settings_loader(settings_file):
+    """Тестирует, что в пределах интервала проверки файл не читается повторно"""
+    clock = FakeClock()
+    loader = SettingsLoader(str(settings_file), check_interval=1.0, clock=clock)
+
+    assert loader.get() == {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}
+    with patch("src.settings.os.stat") as mock_stat, patch("builtins.open") as mock_file_open:
+        clock.now = 0.5
+        assert loader.get()["user_currencies"] == ["USD"]
+        mock_stat.assert_not_called()
+        mock_file_open.assert_not_called()
+
+
+def test_reload_after_change_for_settings_loader(settings_file):
+    """Тестирует перечитывание файла после его изменения и отсутствие чтения без изменений"""
+    clock = FakeClock()
+    loader = SettingsLoader(str(settings_file), check_interval=1.0, clock=clock)
+    first = loader.get()
+
+    clock.now = 2.0
+    assert loader.get() is first
+
+    settings_file.write_text(json.dumps({"user_currencies": ["EUR", "CNY"], "user_stocks": []}))
+    stat = os.stat(settings_file)
+    os.utime(settings_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    clock.now = 4.0
+
+    assert loader.get() == {"user_currencies": ["EUR", "CNY"], "user_stocks": []}
+
+
+def test_keep_previous_settings_for_settings_loader(settings_file):
+    """Тестирует, что повреждённый файл не заменяет прочитанные ранее настройки"""
+    loader = SettingsLoader(str(settings_file), check_interval=0)
+    loader.get()
+
+    settings_file.write_text("{broken")
+
+    assert loader.get() == {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}
+
+
+def test_file_not_found_for_settings_loader(tmp_path):
+    """Тестирует кейс, когда файла настроек нет"""
+    with pytest.raises(FileNotFoundError):
+        SettingsLoader(str(tmp_path / "missing.json")).get()
+
+
+def test_threads_for_settings_loader(settings_file):
+    """Тестирует одновременные вызовы из нескольких потоков"""
+    loader = SettingsLoader(str(settings_file), check_interval=0)
+    results = []
+
+    def worker():
+        for _ in range(50):
+            results.append(loader.get()["user_stocks"])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [["AAPL"]] * 400
+
+
+def test_path_from_dotenv_for_settings_loader(dotenv_variables, settings_file):
+    """Тестирует, что USER_SETTINGS_PATH из .env учитывается при первом чтении настроек по умолчанию"""
+    dotenv_variables["USER_SETTINGS_PATH"] = str(settings_file)
+    loader = SettingsLoader(check_interval=0)
+
+    assert loader.get() == {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}
+    assert loader.path == str(settings_file)
@@ -0,0 +1,104 @@
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import prepare_operations
+from src.reports import get_expenses_for_3_months_by_category
+from src.services import filter_transaction_by_search_str
+from src.shared_data import attach_operations, publish_operations
+from src.views import get_events
+
+
+@pytest.fixture
+def operations():
+    """Фикстура возвращает операции в формате файла operations.xlsx"""
+    return pd.DataFrame(
+        {
+            "Дата операции": [
+                "31.12.2021 16:44:00",
+                "15.12.2021 10:00:00",
+                "10.12.2021 09:30:00",
+                "01.11.2021 12:00:00",
+                "20.10.2021 18:15:00",
+                "10.12.2021 09:30:00",
+            ],
+            "Дата платежа": ["31.12.2021", "15.12.2021", "10.12.2021", "01.11.2021", "20.10.2021", np.nan],
+            "Сумма операции": [-160.89, -64.0, 5000.0, -1500.0, -300.0, -3000.0],
+            "Валюта операции": ["RUB"] * 6,
+            "Категория": ["Супермаркеты", "Супермаркеты", "Пополнения", "Ж/д билеты", None, "Переводы"],
+            "Описание": ["Колхоз", "Магнит", "Перевод с карты", "РЖД", "Без категории", "Иван И."],
+            "Бонусы (включая кэшбэк)": [3, 1, 0, 30, 6, 0],
+            "Сумма операции с округлением": [160.89, 64.0, 5000.0, 1500.0, 300.0, 3000.0],
+        }
+    )
+
+
+@pytest.fixture
+def shared_operations(operations):
+    """Фикстура размещает операции в shared memory и подключается к ним, как процесс-обработчик"""
+    owner = publish_operations(operations)
+    attached = attach_operations(owner.name)
+    yield attached
+    attached.close()
+    owner.close()
+    owner.unlink()
+
+
+def test_zero_copy_for_attach_operations(shared_operations):
+    """Тестирует, что колонки подключённых операций указывают на память блока"""
+    frame = shared_operations.operations.frame
+    block = np.frombuffer(shared_operations._shm.buf, dtype=np.uint8)
+
+    assert np.shares_memory(frame["Сумма операции"].to_numpy(), block)
+    assert np.shares_memory(frame["Дата операции"].to_numpy(), block)
+    assert np.shares_memory(frame["Категория"].cat.codes.to_numpy(), block)
+    assert not frame["Сумма операции"].to_numpy().flags.writeable
+
+
+@pytest.mark.parametrize("date_, period", [("2021-12-31", "W"), ("2021-12-31", "M"), ("2021-12-31", "Y"),
+                                           ("2021-11-30", "ALL")])
+@patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []})
+@patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []})
+def test_same_events_for_shared_operations(
+    mock_get_currency_rates, mock_get_stock_prices, operations, shared_operations, date_, period
+):
+    """Тестирует, что get_events по операциям в shared memory совпадает с обычной подготовкой"""
+    settings = {"user_currencies": [], "user_stocks": []}
+
+    assert get_events(shared_operations.operations, date_, period, settings=settings) == get_events(
+        prepare_operations(operations), date_, period, settings=settings
+    )
+
+
+@pytest.mark.parametrize("category", ["Супермаркеты", "переводы", "Фастфуд"])
+def test_same_report_for_shared_operations(operations, shared_operations, category):
+    """Тестирует отчёт по категории для операций со строками в виде pd.Categorical"""
+    assert get_expenses_for_3_months_by_category(
+        shared_operations.operations.frame, category, "2021-12-31"
+    ) == get_expenses_for_3_months_by_category(prepare_operations(operations).frame, category, "2021-12-31")
+
+
+@pytest.mark.parametrize("search_str", ["магнит", "Супермаркеты", "не указано", "", "нет такой"])
+def test_same_search_for_shared_operations(operations, shared_operations, search_str):
+    """Тестирует, что поиск совпадает с filter_transaction_by_search_str, включая порядок операций"""
+    expected = filter_transaction_by_search_str(operations.to_dict(orient="records"), search_str)
+
+    assert shared_operations.search(search_str) == expected
+    assert json.loads(expected.replace("NaN", "null")) or search_str == "нет такой"
+
+
+def test_invalid_search_for_shared_operations(shared_operations):
+    """Тестирует кейс, когда строка поиска передана не в виде str"""
+    with pytest.raises(TypeError):
+        shared_operations.search(1)
+
+
+def test_invalid_operation_for_publish_operations():
+    """Тестирует кейс, когда транзакции переданы не в виде DataFrame"""
+    with pytest.raises(ValueError):
+        publish_operations(None)
+    with pytest.raises(TypeError):
+        publish_operations([])
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бюджет времени импорта src.cli и src.views (мкс, суммарно с зависимостями) - с запасом для медленных машин
+IMPORT_BUDGET_US = 250_000
+
+# Зависимости, которые импорт модулей пакета и короткий запуск CLI не должны импортировать
+HEAVY_MODULES = {"pandas", "numpy", "requests", "httpx", "dotenv"}
+
+
+def _import_times(*args: str) -> dict[str, int]:
+    """Запускает python -X importtime и возвращает суммарное время импорта каждого модуля (мкс)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": PROJECT_ROOT},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["src.cli", "src.views", "src.utils"])
+def test_import_budget(module):
+    """Тестирует, что импорт модуля укладывается в бюджет и не загружает тяжёлые зависимости"""
+    times = _import_times("-c", f"import {module}")
+
+    assert HEAVY_MODULES.isdisjoint(times)
+    assert times[module] < IMPORT_BUDGET_US
+
+
+def test_env_loaded_on_first_settings_access():
+    """Тестирует, что .env загружается при первом обращении к настройкам провайдеров, а не при импорте"""
+    check = "print('dotenv' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, src.utils; {check}; src.utils.marketstack_api_url; {check}"],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": PROJECT_ROOT},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+    assert result.stdout.split() == ["False", "True"]
+
+
+def test_help_without_heavy_imports_for_cli():
+    """Тестирует, что --help не импортирует pandas, requests и не загружает .env"""
+    times = _import_times("-m", "src.cli", "--help")
+
+    assert HEAVY_MODULES.isdisjoint(times)
+
+
+@pytest.mark.parametrize("module", ["src.utils", "src.views"])
+def test_httpx_imported_on_first_use(module):
+    """Тестирует, что httpx импортируется только асинхронным клиентом"""
+    assert "httpx" not in _import_times("-c", f"import {module}")
+    assert "httpx" in _import_times("-c", f"import {module}; import src.utils; src.utils.AsyncMarketDataClient()")
@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+import requests
+
+import src.utils
+from src.stock_store import StockPriceStore
+from src.stub_server import StubMarketDataServer
+from src.utils import (
+    get_stock_price_history,
+    get_stock_prices,
+    get_stock_prices_dict,
+    get_stock_prices_dict_async,
+    set_api_base_urls,
+    set_stock_price_store,
+)
+
+TODAY = datetime.date(2025, 7, 11)
+
+
+def fake_history(stocks, date_from, date_to):
+    """Цена закрытия: 100 для AAPL и 200 для MSFT плюс номер дня месяца, только будни"""
+    start, end = datetime.date.fromisoformat(date_from), datetime.date.fromisoformat(date_to)
+    days = [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+    base = {"AAPL": 100, "MSFT": 200}
+    return [
+        {"symbol": stock, "date": day.isoformat(), "close": base[stock] + day.day}
+        for day in days
+        if day.weekday() < 5
+        for stock in stocks
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Фикстура возвращает хранилище во временной директории с подменённой загрузкой истории"""
+    return StockPriceStore(str(tmp_path), MagicMock(side_effect=fake_history), history_days=30)
+
+
+def test_update_fills_history_and_latest_close(store):
+    """Тестирует первоначальную загрузку истории одним запросом и последнюю цену закрытия"""
+    added = store.update(["AAPL", "MSFT"], today=TODAY)
+
+    store.fetch.assert_called_once_with(["AAPL", "MSFT"], "2025-06-11", "2025-07-11")
+    assert added == 2 * 23
+    assert store.latest_close("AAPL") == (TODAY, 111.0)
+    assert store.latest_close("MSFT") == (TODAY, 211.0)
+    assert store.latest_close("TSLA") is None
+
+
+def test_update_fetches_only_missing_bars(store):
+    """Тестирует дозагрузку только баров после последнего сохранённого и отсутствие повторного запроса за день"""
+    store.update(["AAPL"], today=TODAY)
+    store.update(["AAPL"], today=TODAY)
+    assert store.fetch.call_count == 1
+
+    added = store.update(["AAPL"], today=TODAY + datetime.timedelta(days=3))
+
+    store.fetch.assert_called_with(["AAPL"], "2025-07-12", "2025-07-14")
+    assert added == 1
+    assert store.latest_close("AAPL") == (datetime.date(2025, 7, 14), 114.0)
+
+
+def test_store_persists_between_instances(store, tmp_path):
+    """Тестирует чтение сохранённой истории новым экземпляром хранилища без запросов"""
+    store.update(["AAPL"], today=TODAY)
+    reopened = StockPriceStore(str(tmp_path), MagicMock())
+
+    assert reopened.update(["AAPL"], today=TODAY) == 0
+    reopened.fetch.assert_not_called()
+    assert reopened.latest_close("AAPL") == (TODAY, 111.0)
+
+
+def test_portfolio_value(store):
+    """Тестирует векторную оценку портфеля с переносом цены на выходные"""
+    store.update(["AAPL", "MSFT"], today=TODAY)
+
+    value = store.portfolio_value({"AAPL": 10, "MSFT": 2}, "2025-07-03", "2025-07-07")
+
+    assert list(value.index) == list(pd.to_datetime(["2025-07-03", "2025-07-04", "2025-07-07"]))
+    assert list(value) == [10 * 103 + 2 * 203, 10 * 104 + 2 * 204, 10 * 107 + 2 * 207]
+
+
+def test_get_stock_price_history_paginates():
+    """Тестирует постраничную загрузку истории цен со стенда"""
+    marketstack_url = src.utils.marketstack_api_url
+    page_limit = src.utils.MARKETSTACK_PAGE_LIMIT
+    with StubMarketDataServer() as server:
+        set_api_base_urls(marketstack_url=server.url)
+        src.utils.MARKETSTACK_PAGE_LIMIT = 5
+        try:
+            bars = get_stock_price_history(["AAPL", "MSFT"], "2025-06-30", "2025-07-11")
+        finally:
+            src.utils.MARKETSTACK_PAGE_LIMIT = page_limit
+            set_api_base_urls(marketstack_url=marketstack_url)
+
+        assert server.stats["marketstack"] == 4
+
+    assert len(bars) == 20
+    assert {bar["symbol"] for bar in bars} == {"AAPL", "MSFT"}
+    assert {bar["date"] for bar in bars} >= {"2025-06-30", "2025-07-11"}
+
+
+def test_get_stock_prices_from_store(store):
+    """Тестирует получение последних цен из локального хранилища"""
+    store.update(["AAPL", "MSFT"], today=datetime.date.today())
+    set_stock_price_store(store)
+    try:
+        result = get_stock_prices(["AAPL", "MSFT"])
+    finally:
+        set_stock_price_store(None)
+
+    assert store.fetch.call_count == 1
+    assert '"stock": "AAPL"' in result
+    assert '"stock": "MSFT"' in result
+
+
+def test_get_stock_prices_from_store_when_provider_is_down(store):
+    """Тестирует, что при ошибке провайдера возвращаются сохранённые цены, а не исключение"""
+    store.update(["AAPL"], today=datetime.date.today() - datetime.timedelta(days=1))
+    store.fetch.side_effect = requests.exceptions.ConnectionError("API недоступен")
+    set_stock_price_store(store)
+    try:
+        result = get_stock_prices_dict(["AAPL", "MSFT"])
+    finally:
+        set_stock_price_store(None)
+
+    assert [price["stock"] for price in result["stock_prices"]] == ["AAPL"]
+
+
+def test_get_stock_prices_from_empty_store_when_provider_is_down(store):
+    """Тестирует, что без сохранённых цен ошибка провайдера пробрасывается"""
+    store.fetch.side_effect = requests.exceptions.ConnectionError("API недоступен")
+    set_stock_price_store(store)
+    try:
+        with pytest.raises(requests.exceptions.RequestException):
+            get_stock_prices_dict(["AAPL"])
+    finally:
+        set_stock_price_store(None)
+
+
+def test_get_stock_prices_async_uses_store(store):
+    """Тестирует, что асинхронная функция берёт цены из того же хранилища, что и синхронная"""
+    store.update(["AAPL", "MSFT"], today=datetime.date.today())
+    set_stock_price_store(store)
+    try:
+        result = asyncio.run(get_stock_prices_dict_async(["AAPL", "MSFT"]))
+        expected = get_stock_prices_dict(["AAPL", "MSFT"])
+    finally:
+        set_stock_price_store(None)
+
+    assert result == expected
+    assert store.fetch.call_count == 1
+
+
+def test_store_rereads_files_changed_by_another_process(store, tmp_path):
+    """Тестирует, что кэш в памяти перечитывается после обновления файлов другим экземпляром"""
+    store.update(["AAPL"], today=TODAY)
+    assert store.latest_close("AAPL") == (TODAY, 111.0)
+
+    other_process = StockPriceStore(str(tmp_path), MagicMock(side_effect=fake_history))
+    other_process.update(["AAPL"], today=TODAY + datetime.timedelta(days=3))
+
+    assert store.latest_close("AAPL") == (datetime.date(2025, 7, 14), 114.0)
+    assert store.update(["AAPL"], today=TODAY + datetime.timedelta(days=3)) == 0
+    assert store.fetch.call_count == 1
+
+
+def test_meta_is_read_once_while_unchanged(store):
+    """Тестирует, что meta.json не перечитывается, пока файл не изменился"""
+    store.update(["AAPL"], today=TODAY)
+    store.update(["AAPL"], today=TODAY)
+
+    with patch("builtins.open", side_effect=AssertionError("meta.json перечитан")):
+        assert store.update(["AAPL"], today=TODAY) == 0
+
+
+def test_update_retries_tickers_without_new_bars(tmp_path):
+    """Тестирует, что тикер без новых баров не отмечается проверенным за день и запрашивается снова через интервал"""
+    clock = MagicMock(return_value=1000.0)
+    store = StockPriceStore(str(tmp_path), MagicMock(side_effect=fake_history), history_days=30, clock=clock)
+    store.update(["AAPL"], today=TODAY)
+
+    # Провайдер ещё не опубликовал бар за следующий день
+    store.fetch.side_effect = lambda stocks, date_from, date_to: []
+    next_day = TODAY + datetime.timedelta(days=3)
+    assert store.update(["AAPL"], today=next_day) == 0
+    clock.return_value += store.retry_interval / 2
+    assert store.update(["AAPL"], today=next_day) == 0
+    assert store.fetch.call_count == 2
+
+    store.fetch.side_effect = fake_history
+    clock.return_value += store.retry_interval
+    assert store.update(["AAPL"], today=next_day) == 1
+    assert store.update(["AAPL"], today=next_day) == 0
+    assert store.fetch.call_count == 3
+    assert store.latest_close("AAPL") == (datetime.date(2025, 7, 14), 114.0)
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+import requests
+
+import src.utils
+from src.stub_server import StubMarketDataServer
+from src.utils import get_currency_rate_history, get_currency_rates, get_stock_prices, set_api_base_urls
+
+
+@pytest.fixture
+def stub_server():
+    """Фикстура запускает стенд и направляет на него запросы src.utils"""
+    currency_data_url, marketstack_url = src.utils.currency_data_api_url, src.utils.marketstack_api_url
+    with StubMarketDataServer(recordings={"currency_rates": {"USD": 78.918179}}) as server:
+        set_api_base_urls(server.url, server.url)
+        yield server
+    set_api_base_urls(currency_data_url, marketstack_url)
+
+
+def test_recorded_and_generated_rates_for_stub_server(stub_server):
+    """Тестирует ответы по схеме currency_data-api: записанный и сгенерированный курс"""
+    result = json.loads(get_currency_rates(["USD", "EUR"]))
+
+    assert result["currency_rates"][0] == {"currency": "USD", "rate": 78.918179}
+    assert result["currency_rates"][1]["currency"] == "EUR"
+    assert result["currency_rates"][1]["rate"] > 0
+    assert stub_server.stats["currency_data"] == 2
+
+
+def test_stock_prices_for_stub_server(stub_server):
+    """Тестирует ответы по схеме marketstack-api"""
+    result = json.loads(get_stock_prices(["AAPL", "AMZN"]))
+
+    assert [item["stock"] for item in result["stock_prices"]] == ["AAPL", "AMZN"]
+    assert json.loads(get_stock_prices(["AAPL", "AMZN"])) == result
+
+
+def test_timeframe_for_stub_server(stub_server):
+    """Тестирует ответы по схеме timeframe currency_data-api"""
+    result = get_currency_rate_history("USD", "2025-07-01", "2025-07-03")
+
+    assert result == [
+        {"date": "2025-07-01", "rate": 78.918179},
+        {"date": "2025-07-02", "rate": 78.918179},
+        {"date": "2025-07-03", "rate": 78.918179},
+    ]
+
+
+def test_eod_range_pagination_for_stub_server(stub_server):
+    """Тестирует диапазон дат без выходных и постраничную выдачу"""
+    params = {"symbols": "AAPL,MSFT", "date_from": "2025-06-30", "date_to": "2025-07-06", "limit": 4, "offset": 8}
+    content = requests.get(f"{stub_server.url}/v1/eod", params=params).json()
+
+    assert content["pagination"] == {"limit": 4, "offset": 8, "count": 2, "total": 10}
+    assert [bar["date"][:10] for bar in content["data"]] == ["2025-06-30", "2025-06-30"]
+
+
+def test_error_rate_for_stub_server():
+    """Тестирует ответы с ошибкой 500 при error_rate=1"""
+    with StubMarketDataServer(error_rate=1) as server:
+        response = requests.get(f"{server.url}/currency_data/change", params={"source": "USD"})
+
+    assert response.status_code == 500
+    assert server.stats["errors"] == 1
+
+
+def test_rate_limit_for_stub_server():
+    """Тестирует ответ 429 при превышении лимита запросов"""
+    with StubMarketDataServer(rate_limit=0.001) as server:
+        params = {"start_date": "2025-07-07", "end_date": "2025-07-07", "source": "USD"}
+        statuses = [requests.get(f"{server.url}/currency_data/change", params=params).status_code for _ in range(3)]
+
+    assert statuses == [200, 429, 429]
+    assert server.stats["rate_limited"] == 2
+
+
+def test_unknown_path_for_stub_server(stub_server):
+    """Тестирует ответ 404 на неизвестный путь"""
+    assert requests.get(f"{stub_server.url}/unknown").status_code == 404
+
+
+def test_incorrect_error_rate_for_stub_server():
+    """Тестирует кейс, когда доля ошибок вне диапазона 0..1"""
+    with pytest.raises(ValueError) as exc_info:
+        StubMarketDataServer(error_rate=2)
+    assert str(exc_info.value) == "Доля ошибок должна быть от 0 до 1"
@@ -0,0 +1,72 @@
+import copy
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.reports import get_expenses_for_3_months_by_category
+from src.services import filter_transaction_by_search_str
+from src.views import get_events, get_events_batch
+
+
+@pytest.fixture
+def shared_operation():
+    """Фикстура возвращает общий для всех потоков DataFrame с датами в виде строк, как в operations.xlsx"""
+    rng = np.random.default_rng(7)
+    size = 2000
+    dates = pd.Timestamp("2021-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, size), unit="min")
+    categories = np.array(["Супермаркеты", "Фастфуд", "Переводы", "Наличные", "Пополнения", None], dtype=object)
+    descriptions = np.array(["Магнит", "Колхоз", "Перевод с карты", "Вкусно", None], dtype=object)
+    amounts = rng.integers(-5000, 5000, size) / 10
+    return pd.DataFrame(
+        {
+            "Дата операции": dates.strftime("%d.%m.%Y %H:%M:%S"),
+            "Дата платежа": dates.strftime("%d.%m.%Y"),
+            "Сумма операции": amounts,
+            "Категория": categories[rng.integers(0, len(categories), size)],
+            "Описание": descriptions[rng.integers(0, len(descriptions), size)],
+            "Сумма операции с округлением": np.abs(amounts),
+        }
+    )
+
+
+@patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []})
+@patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []})
+def test_concurrent_calls_on_shared_data(mock_get_currency_rates, mock_get_stock_prices, shared_operation):
+    """Тестирует одновременные вызовы публичных функций на общих данных: результаты совпадают
+    с последовательными вызовами, а переданные данные не изменяются"""
+    settings = {"user_currencies": ["USD"], "user_stocks": ["AAPL"]}
+    records = shared_operation.to_dict(orient="records")
+    timestamp_records = shared_operation.assign(
+        **{"Дата операции": pd.to_datetime(shared_operation["Дата операции"], dayfirst=True)}
+    ).to_dict(orient="records")
+
+    operation_before = shared_operation.copy()
+    records_before = copy.deepcopy(records)
+    timestamp_records_before = copy.deepcopy(timestamp_records)
+
+    calls = []
+    for date_ in ["2021-03-31", "2021-06-15", "2021-12-31"]:
+        for period in ["W", "M", "Y", "ALL"]:
+            calls.append(lambda d=date_, p=period: get_events(shared_operation, d, p, settings=settings))
+        calls.append(lambda d=date_: get_expenses_for_3_months_by_category(shared_operation, "Фастфуд", d))
+    for search_str in ["магнит", "не указано", "перевод"]:
+        calls.append(lambda s=search_str: filter_transaction_by_search_str(records, s))
+        calls.append(lambda s=search_str: filter_transaction_by_search_str(timestamp_records, s))
+    calls.append(
+        lambda: get_events_batch(shared_operation, start="2021-01-01", end="2021-12-31", period="M", settings=settings)
+    )
+
+    expected = [call() for call in calls]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in range(3):
+            results = list(executor.map(lambda call: call(), calls * 4))
+            assert results == expected * 4
+
+    pd.testing.assert_frame_equal(shared_operation, operation_before)
+    assert repr(records) == repr(records_before)
+    assert repr(timestamp_records) == repr(timestamp_records_before)
+    assert json.loads(expected[0])["expenses"]["total_amount"] >= 0
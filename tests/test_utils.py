@@ -1,11 +1,33 @@
+import asyncio
 import json
 import logging
+import sqlite3
 from unittest.mock import MagicMock, patch
 
+import httpx
+import pandas as pd
 import pytest
 import requests
 
-from src.utils import get_currency_rates, get_expenses, get_income, get_stock_prices
+from src.circuit_breaker import CircuitOpenError
+from src.utils import (
+    AsyncMarketDataClient,
+    OperationsAggregateState,
+    aggregate_operations,
+    currency_data_breaker,
+    get_currency_rates,
+    get_currency_rate_history,
+    get_currency_rates_async,
+    get_expenses,
+    get_expenses_dict,
+    get_income,
+    get_income_dict,
+    get_stock_prices,
+    get_stock_prices_dict,
+    get_stock_prices_async,
+    market_data_cache,
+    marketstack_breaker,
+)
 
 
 def test_get_expenses_for_get_expenses(get_data_for_get_expenses):
@@ -32,7 +54,7 @@ def test_get_expenses_for_get_expenses(get_data_for_get_expenses):
 
 def test_not_have_expenses_for_get_expenses(get_data_for_get_expenses, caplog):
     """Тестирует кейс, когда нет расходов"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     result = get_expenses(get_data_for_get_expenses[-4:])
 
@@ -125,9 +147,134 @@ def test_get_income_for_get_income(get_data_for_get_income):
     }
 
 
+def test_dict_and_json_results_match_for_get_expenses_and_get_income(get_data_for_get_expenses):
+    """Тестирует, что JSON-функции возвращают сериализованный результат словарных функций"""
+    assert json.loads(get_expenses(get_data_for_get_expenses)) == get_expenses_dict(get_data_for_get_expenses)
+    assert json.loads(get_income(get_data_for_get_expenses)) == get_income_dict(get_data_for_get_expenses)
+    assert get_expenses(get_data_for_get_expenses) == json.dumps(
+        get_expenses_dict(get_data_for_get_expenses), ensure_ascii=False, indent=4
+    )
+
+
+@pytest.mark.parametrize("rows", [slice(None), slice(-4, None), slice(0, 5), slice(0, 0)])
+def test_same_result_for_aggregate_operations(get_data_for_get_expenses, get_data_for_get_income, rows):
+    """Тестирует совпадение JSON общего прохода с результатами get_expenses и get_income"""
+    income = get_data_for_get_income.copy()
+    income["Сумма операции"] = income["Сумма операции с округлением"]
+    operation = pd.concat([get_data_for_get_expenses, income], ignore_index=True)[rows]
+
+    expected = {**get_expenses_dict(operation), **get_income_dict(operation)}
+
+    assert json.dumps(aggregate_operations(operation), ensure_ascii=False, indent=4) == json.dumps(
+        expected, ensure_ascii=False, indent=4
+    )
+
+
+@pytest.mark.parametrize("top_n", [1, 3, 20])
+def test_top_n_for_get_expenses_and_aggregate_operations(get_data_for_get_expenses, top_n):
+    """Тестирует настраиваемый размер топа категорий расходов"""
+    result = get_expenses_dict(get_data_for_get_expenses, top_n=top_n)["expenses"]["main"]
+    categories = [item["category"] for item in result]
+
+    assert len([category for category in categories if category != "Остальное"]) <= top_n
+    assert aggregate_operations(get_data_for_get_expenses, top_n=top_n)["expenses"]["main"] == result
+    assert json.loads(get_expenses(get_data_for_get_expenses, top_n))["expenses"]["main"] == result
+
+
+def test_not_have_operations_for_aggregate_operations(get_data_for_get_expenses, caplog):
+    """Тестирует сообщения в логе, когда операций нет"""
+    caplog.set_level(logging.DEBUG, logger="src")
+
+    result = aggregate_operations(get_data_for_get_expenses[:0])
+
+    assert result == {
+        "expenses": {"total_amount": 0, "main": [], "transfers_and_cash": []},
+        "income": {"total_amount": 0, "main": []},
+    }
+    assert [record.message for record in caplog.records] == [
+        "Расходы по категориям не найдены",
+        "Переводы и наличные не найдены",
+        "Поступления по категориям не найдены",
+    ]
+
+
+def _operations_for_aggregate_state(get_data_for_get_expenses, get_data_for_get_income) -> pd.DataFrame:
+    income = get_data_for_get_income.copy()
+    income["Сумма операции"] = income["Сумма операции с округлением"]
+    return pd.concat([get_data_for_get_expenses, income], ignore_index=True)
+
+
+@pytest.mark.parametrize(
+    "start, end",
+    [(None, None), ("2021-12-29", "2021-12-30"), ("2021-12-31", None), (None, "2021-12-28"), ("2022-01-01", None)],
+)
+def test_period_for_operations_aggregate_state(get_data_for_get_expenses, get_data_for_get_income, start, end):
+    """Тестирует совпадение результатов за период с get_expenses и get_income по операциям периода"""
+    operation = _operations_for_aggregate_state(get_data_for_get_expenses, get_data_for_get_income)
+    days = pd.to_datetime(operation["Дата операции"], dayfirst=True).dt.normalize()
+    mask = pd.Series(True, index=operation.index)
+    if start is not None:
+        mask &= days >= pd.Timestamp(start)
+    if end is not None:
+        mask &= days <= pd.Timestamp(end)
+
+    state = OperationsAggregateState()
+    for batch in (operation[:3], operation[3:7], operation[7:]):
+        state.add(batch)
+
+    assert state.expenses_dict(start, end) == get_expenses_dict(operation[mask])
+    assert state.income_dict(start, end) == get_income_dict(operation[mask])
+    assert state.expenses(start, end) == get_expenses(operation[mask])
+    assert state.income(start, end) == get_income(operation[mask])
+
+
+def test_corrections_for_operations_aggregate_state(get_data_for_get_expenses, get_data_for_get_income):
+    """Тестирует исправление операций: исключение старой версии и добавление новой"""
+    operation = _operations_for_aggregate_state(get_data_for_get_expenses, get_data_for_get_income)
+    state = OperationsAggregateState(operation)
+
+    corrected = operation.copy()
+    corrected.loc[0, "Сумма операции с округлением"] = 1000.00
+    corrected.loc[1, "Категория"] = "Переводы"
+    state.remove(operation.loc[[0, 1]])
+    state.add(corrected.loc[[0, 1]])
+
+    assert state.aggregate() == aggregate_operations(corrected)
+
+    state.remove(corrected)
+    assert len(state) == 0
+    assert state.aggregate() == aggregate_operations(corrected[:0])
+
+
+def test_remove_unknown_operations_for_operations_aggregate_state(get_data_for_get_expenses, caplog):
+    """Тестирует исключение операций, которые не были учтены: состояние не меняется"""
+    state = OperationsAggregateState(get_data_for_get_expenses[:2])
+    before = state.aggregate()
+
+    with pytest.raises(ValueError) as exc_info:
+        state.remove(get_data_for_get_expenses[1:3])
+
+    assert str(exc_info.value) == "Исключаемые операции не были учтены ранее"
+    assert caplog.records[-1].levelname == "CRITICAL"
+    assert state.aggregate() == before
+
+
+def test_incorrect_input_for_operations_aggregate_state(get_data_for_get_expenses):
+    """Тестирует неверный тип пакета и неверную границу периода"""
+    state = OperationsAggregateState(get_data_for_get_expenses)
+
+    with pytest.raises(TypeError) as exc_info:
+        state.add(get_data_for_get_expenses.to_dict(orient="records"))
+    assert str(exc_info.value) == "Транзакции должны быть переданы в виде pandas DataFrame"
+
+    with pytest.raises(ValueError) as exc_info:
+        state.expenses_dict("31-31-2021")
+    assert str(exc_info.value) == "Граница периода должна быть датой в формате YYYY-MM-DD"
+
+
 def test_not_have_income_for_get_income(get_data_for_get_expenses, caplog):
     """Тестирует кейс, когда нет поступлений"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     result = get_income(get_data_for_get_expenses)
 
@@ -174,7 +321,7 @@ def test_incorrect_input_currencies_for_get_currency_rates(input_currencies, rai
 
 def test_currencies_is_not_list_for_get_currency_rates(caplog):
     """Тестирует кейс, когда валюты переданы не в списке"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(TypeError) as exc_info:
         get_currency_rates(
@@ -254,7 +401,7 @@ def test_incorrect_input_stocks_for_get_stock_prices(input_stocks, raise_message
 
 def test_stocks_is_not_list_for_get_stock_prices(caplog):
     """Тестирует кейс, когда акции переданы не в списке"""
-    caplog.set_level(logging.DEBUG)
+    caplog.set_level(logging.DEBUG, logger="src")
 
     with pytest.raises(TypeError) as exc_info:
         get_stock_prices(
@@ -296,3 +443,242 @@ def test_other_error_for_get_stock_prices(mock_get):
     assert "Ошибка:" in str(exc_info.value)
 
     assert mock_get.call_count == 1
+
+
+def test_get_currency_rate_for_get_currency_rates_async(get_currency_response_for_get_currency_rates):
+    """Тестирует возврат курсов валют асинхронной функцией"""
+    responses = {response["source"]: response for response in get_currency_response_for_get_currency_rates}
+    requested_sources = []
+
+    def handler(request):
+        requested_sources.append(request.url.params["source"])
+        return httpx.Response(200, json=responses[request.url.params["source"]])
+
+    async def run():
+        async with AsyncMarketDataClient(transport=httpx.MockTransport(handler)) as client:
+            return await get_currency_rates_async(["USD", "EUR"], client)
+
+    result = asyncio.run(run())
+
+    assert json.loads(result) == {
+        "currency_rates": [{"currency": "USD", "rate": 78.918179}, {"currency": "EUR", "rate": 90.000}]
+    }
+    assert sorted(requested_sources) == ["EUR", "USD"]
+
+
+def test_http_error_for_get_currency_rates_async():
+    """Тестирует приведение HTTP ошибок асинхронного клиента к requests.HTTPError"""
+    transport = httpx.MockTransport(lambda request: httpx.Response(404))
+
+    async def run():
+        async with AsyncMarketDataClient(transport=transport) as client:
+            return await get_currency_rates_async(["USD", "EUR"], client)
+
+    with pytest.raises(requests.HTTPError) as exc_info:
+        asyncio.run(run())
+    assert "Ошибка HTTP:" in str(exc_info.value)
+
+
+def test_timeout_for_get_currency_rates_async():
+    """Тестирует приведение таймаута асинхронного клиента к requests.exceptions.Timeout"""
+
+    def handler(request):
+        raise httpx.ReadTimeout("timeout", request=request)
+
+    async def run():
+        async with AsyncMarketDataClient(transport=httpx.MockTransport(handler)) as client:
+            return await get_currency_rates_async(["USD"], client)
+
+    with pytest.raises(requests.exceptions.Timeout):
+        asyncio.run(run())
+
+
+def test_concurrency_limit_for_get_currency_rates_async(get_currency_response_for_get_currency_rates):
+    """Тестирует, что семафор клиента ограничивает число одновременных запросов"""
+    in_flight = 0
+    max_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json=get_currency_response_for_get_currency_rates[0])
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with AsyncMarketDataClient(max_concurrency=2, transport=transport) as client:
+            return await get_currency_rates_async(["USD"] * 6, client)
+
+    asyncio.run(run())
+
+    assert max_in_flight == 2
+
+
+def test_incorrect_max_concurrency_for_async_market_data_client():
+    """Тестирует кейс, когда лимит одновременных запросов меньше 1"""
+    with pytest.raises(ValueError) as exc_info:
+        AsyncMarketDataClient(max_concurrency=0)
+    assert str(exc_info.value) == "Число одновременных запросов должно быть больше 0"
+
+
+@pytest.mark.parametrize(
+    "input_currencies, raise_message", [([], "Список валют пустой"), (None, "Валюты не переданы")]
+)
+def test_incorrect_input_currencies_for_get_currency_rates_async(input_currencies, raise_message):
+    """Тестирует валидацию валют асинхронной функцией до выполнения запросов"""
+    with pytest.raises(ValueError) as exc_info:
+        asyncio.run(get_currency_rates_async(input_currencies))
+    assert str(exc_info.value) == raise_message
+
+
+def test_get_stock_prices_for_get_stock_prices_async(get_data_for_get_stock_prices):
+    """Тестирует возврат стоимости акций асинхронной функцией"""
+    requested_symbols = []
+
+    def handler(request):
+        requested_symbols.append(request.url.params["symbols"])
+        return httpx.Response(200, json=get_data_for_get_stock_prices)
+
+    async def run():
+        async with AsyncMarketDataClient(transport=httpx.MockTransport(handler)) as client:
+            return await get_stock_prices_async(["AAPL", "AMZN"], client)
+
+    result = asyncio.run(run())
+
+    assert json.loads(result) == {
+        "stock_prices": [{"stock": "AAPL", "price": 213.55}, {"stock": "AMZN", "price": 320.55}]
+    }
+    assert requested_symbols == ["AAPL,AMZN"]
+
+
+def test_not_have_data_key_for_get_stock_prices_async():
+    """Тестирует кейс, когда в ответе API нет ключа data"""
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"error": "limit"}))
+
+    async def run():
+        async with AsyncMarketDataClient(transport=transport) as client:
+            return await get_stock_prices_async(["AAPL"], client)
+
+    with pytest.raises(ValueError) as exc_info:
+        asyncio.run(run())
+    assert str(exc_info.value) == "В ответе нет ключа data. Проверьте ответ от API"
+
+
+@patch("requests.get")
+def test_circuit_breaker_skips_failing_provider_for_get_stock_prices(mock_get):
+    """Тестирует, что после серии ошибок запросы к провайдеру не выполняются"""
+    mock_response = MagicMock()
+    mock_response.raise_for_status.side_effect = requests.HTTPError("503 Server Error")
+    mock_get.return_value = mock_response
+
+    for _ in range(marketstack_breaker.failure_threshold):
+        with pytest.raises(requests.HTTPError):
+            get_stock_prices(["AMZN"])
+
+    with pytest.raises(CircuitOpenError):
+        get_stock_prices(["AMZN"])
+
+    assert mock_get.call_count == marketstack_breaker.failure_threshold
+
+
+@patch("requests.get")
+def test_circuit_breaker_skips_failing_provider_for_get_currency_rates(mock_get):
+    """Тестирует, что после серии ошибок запросы курсов к провайдеру не выполняются"""
+    mock_response = MagicMock()
+    mock_response.raise_for_status.side_effect = requests.HTTPError("503 Server Error")
+    mock_get.return_value = mock_response
+
+    for _ in range(currency_data_breaker.failure_threshold):
+        with pytest.raises(requests.HTTPError):
+            get_currency_rates(["USD"])
+
+    with pytest.raises(CircuitOpenError):
+        get_currency_rates(["USD"])
+
+    assert mock_get.call_count == currency_data_breaker.failure_threshold
+
+
+@patch("requests.get")
+def test_cache_last_result_for_get_stock_prices(mock_get, get_data_for_get_stock_prices):
+    """Тестирует сохранение последних полученных цен акций в кэш"""
+    mock_response = MagicMock()
+    mock_response.json.return_value = get_data_for_get_stock_prices
+    mock_get.return_value = mock_response
+
+    get_stock_prices(["AAPL", "AMZN"])
+
+    assert market_data_cache.get("stock_prices", ["AAPL", "AMZN"]).value == [
+        {"stock": "AAPL", "price": 213.55},
+        {"stock": "AMZN", "price": 320.55},
+    ]
+
+
+@patch("requests.get")
+def test_get_stock_prices_for_get_stock_prices_dict(mock_get, get_data_for_get_stock_prices):
+    """Тестирует возврат цен акций в виде словаря"""
+    mock_response = MagicMock()
+    mock_response.json.return_value = get_data_for_get_stock_prices
+    mock_get.return_value = mock_response
+
+    assert get_stock_prices_dict(["AAPL", "AMZN"]) == {
+        "stock_prices": [{"stock": "AAPL", "price": 213.55}, {"stock": "AMZN", "price": 320.55}]
+    }
+
+
+@patch("requests.get")
+def test_get_history_for_get_currency_rate_history(mock_get):
+    """Тестирует возврат истории курса валюты за период"""
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "success": True,
+        "timeframe": True,
+        "source": "USD",
+        "quotes": {"2025-07-02": {"USDRUB": 78.5}, "2025-07-01": {"USDRUB": 78.1}},
+    }
+    mock_get.return_value = mock_response
+
+    result = get_currency_rate_history("USD", "2025-07-01", "2025-07-02")
+
+    assert result == [{"date": "2025-07-01", "rate": 78.1}, {"date": "2025-07-02", "rate": 78.5}]
+    assert mock_get.call_args.kwargs["params"] == {
+        "start_date": "2025-07-01",
+        "end_date": "2025-07-02",
+        "currencies": "RUB",
+        "source": "USD",
+    }
+
+
+def test_too_long_period_for_get_currency_rate_history():
+    """Тестирует кейс, когда период длиннее лимита API"""
+    with pytest.raises(ValueError) as exc_info:
+        get_currency_rate_history("USD", "2024-01-01", "2025-07-01")
+    assert str(exc_info.value) == "Период должен быть от 1 до 365 дней"
+
+
+@patch("requests.get")
+def test_http_error_for_get_currency_rate_history(mock_get):
+    """Тестирует HTTP ошибки при запросе истории курса"""
+    mock_response = MagicMock()
+    mock_response.raise_for_status.side_effect = requests.HTTPError("500 Server Error")
+    mock_get.return_value = mock_response
+
+    with pytest.raises(requests.HTTPError) as exc_info:
+        get_currency_rate_history("USD", "2025-07-01", "2025-07-02")
+    assert "Ошибка HTTP:" in str(exc_info.value)
+
+
+@patch("requests.get")
+def test_unexpected_error_ends_trial_for_get_stock_prices(mock_get, monkeypatch, get_data_for_get_stock_prices):
+    """Тестирует, что непредвиденная ошибка пробного запроса не оставляет breaker в ожидании его результата"""
+    monkeypatch.setattr(marketstack_breaker, "_state", marketstack_breaker.HALF_OPEN)
+    mock_get.side_effect = sqlite3.OperationalError("database is locked")
+
+    with pytest.raises(sqlite3.OperationalError):
+        get_stock_prices(["AAPL"])
+
+    mock_get.side_effect = None
+    mock_get.return_value.json.return_value = get_data_for_get_stock_prices
+    assert get_stock_prices_dict(["AAPL"])["stock_prices"][0] == {"stock": "AAPL", "price": 213.55}
+    assert marketstack_breaker.state == marketstack_breaker.CLOSED
@@ -1,28 +1,35 @@
+import asyncio
 import json
-from unittest.mock import mock_open, patch
+import logging
+import os
+import threading
+from unittest.mock import AsyncMock, patch
 
 import pandas as pd
 import pytest
+import requests
 
-from src.views import get_events
+from src.data import prepare_operations
+from src.utils import get_expenses, get_income, market_data_cache
+from src.views import get_events, get_events_async, get_events_batch
 
 
-@patch("builtins.open", new_callable=mock_open, read_data='{"user_currencies": ["USD"], "user_stocks": ["AAPL"]}')
-@patch("src.views.get_stock_prices")
-@patch("src.views.get_currency_rates")
-@patch("src.views.get_income")
-@patch("src.views.get_expenses")
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict")
+@patch("src.views.get_currency_rates_dict")
+@patch("src.views.aggregate_operations")
 def test_get_result_inner_function_for_get_events(
-    mock_get_expenses,
-    mock_get_income,
+    mock_aggregate_operations,
     mock_get_currency_rates,
     mock_get_stock_prices,
-    mock_file_open,
+    mock_load_user_settings,
     result_inner_functions_for_get_events,
 ):
     """Тестирует возврат результатов от внутренних функций"""
-    mock_get_expenses.return_value = result_inner_functions_for_get_events["get_expenses"]
-    mock_get_income.return_value = result_inner_functions_for_get_events["get_income"]
+    mock_aggregate_operations.return_value = {
+        **result_inner_functions_for_get_events["get_expenses"],
+        **result_inner_functions_for_get_events["get_income"],
+    }
     mock_get_currency_rates.return_value = result_inner_functions_for_get_events["get_currency_rates"]
     mock_get_stock_prices.return_value = result_inner_functions_for_get_events["get_stock_prices"]
 
@@ -45,6 +52,7 @@ def test_get_result_inner_function_for_get_events(
         },
         "currency_rates": [{"currency": "USD", "rate": 78.918179}],
         "stock_prices": [{"stock": "AAPL", "price": 213.55}],
+        "market_data_status": {"currency_rates": {"status": "ok"}, "stock_prices": {"status": "ok"}},
     }
 
 
@@ -57,3 +65,336 @@ def test_incorrect_date_for_get_events(date_, raise_message):
         get_events(pd.DataFrame([{"test": "test"}, {"test": "test"}]), date_)
 
     assert str(exc_info.value) == raise_message
+
+
+def test_incorrect_date_log_for_get_events(caplog):
+    """Тестирует, что в журнал пишутся дата и её тип, а не их множество"""
+    caplog.set_level(logging.DEBUG, logger="src")
+
+    with pytest.raises(ValueError):
+        get_events(pd.DataFrame([{"test": "test"}]), "2025 07 07")
+
+    message = "Ошибка: Дата 2025 07 07 (тип <class 'str'>) не конвертируется в datetime"
+    assert caplog.records[-1].getMessage() == message
+
+
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict_async", new_callable=AsyncMock)
+@patch("src.views.get_currency_rates_dict_async", new_callable=AsyncMock)
+def test_get_result_inner_function_for_get_events_async(
+    mock_get_currency_rates_async,
+    mock_get_stock_prices_async,
+    mock_load_user_settings,
+    get_data_for_get_expenses,
+    result_inner_functions_for_get_events,
+):
+    """Тестирует объединение расходов, доходов и данных асинхронных API"""
+    mock_get_currency_rates_async.return_value = result_inner_functions_for_get_events["get_currency_rates"]
+    mock_get_stock_prices_async.return_value = result_inner_functions_for_get_events["get_stock_prices"]
+
+    result = asyncio.run(get_events_async(get_data_for_get_expenses, "2021-12-31", "W"))
+
+    assert json.loads(result) == {
+        **json.loads(get_expenses(get_data_for_get_expenses)),
+        **json.loads(get_income(get_data_for_get_expenses)),
+        "currency_rates": [{"currency": "USD", "rate": 78.918179}],
+        "stock_prices": [{"stock": "AAPL", "price": 213.55}],
+        "market_data_status": {"currency_rates": {"status": "ok"}, "stock_prices": {"status": "ok"}},
+    }
+    mock_get_currency_rates_async.assert_awaited_once()
+    assert mock_get_currency_rates_async.await_args.args[0] == ["USD"]
+    mock_get_stock_prices_async.assert_awaited_once()
+    assert mock_get_stock_prices_async.await_args.args[0] == ["AAPL"]
+
+
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict_async", new_callable=AsyncMock)
+@patch("src.views.get_currency_rates_dict_async", new_callable=AsyncMock)
+def test_incorrect_date_for_get_events_async(
+    mock_get_currency_rates_async, mock_get_stock_prices_async, mock_load_user_settings
+):
+    """Тестирует, что при неверной дате запросы к API не выполняются"""
+    with pytest.raises(ValueError) as exc_info:
+        asyncio.run(get_events_async(pd.DataFrame([{"Дата операции": "2025-05-07"}]), "2025 07 07"))
+
+    assert str(exc_info.value) == "Дата указана неверно. Маска: YYYY-MM-DD"
+    mock_get_currency_rates_async.assert_not_awaited()
+    mock_get_stock_prices_async.assert_not_awaited()
+
+
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict")
+@patch("src.views.get_currency_rates_dict")
+def test_timeout_returns_partial_result_for_get_events(
+    mock_get_currency_rates, mock_get_stock_prices, mock_load_user_settings, get_data_for_get_expenses
+):
+    """Тестирует, что при исчерпании бюджета возвращаются расходы, доходы и данные из кэша"""
+    release = threading.Event()
+    mock_get_currency_rates.side_effect = lambda currencies: release.wait(5) and ""
+    mock_get_stock_prices.side_effect = lambda stocks: release.wait(5) and ""
+    market_data_cache.put("currency_rates", ["USD"], [{"currency": "USD", "rate": 78.918179}])
+
+    try:
+        result = json.loads(get_events(get_data_for_get_expenses, "2021-12-31", "M", timeout=0.05))
+    finally:
+        release.set()
+
+    assert result["expenses"]["total_amount"] == 16613
+    assert result["income"] == {"total_amount": 0, "main": []}
+    assert result["currency_rates"] == [{"currency": "USD", "rate": 78.918179}]
+    assert result["stock_prices"] == []
+    assert result["market_data_status"]["currency_rates"]["status"] == "stale"
+    assert "updated_at" in result["market_data_status"]["currency_rates"]
+    assert result["market_data_status"]["stock_prices"] == {"status": "unavailable"}
+
+
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict")
+@patch("src.views.get_currency_rates_dict")
+def test_provider_error_for_get_events(
+    mock_get_currency_rates,
+    mock_get_stock_prices,
+    mock_load_user_settings,
+    get_data_for_get_expenses,
+    result_inner_functions_for_get_events,
+):
+    """Тестирует, что ошибка провайдера не прерывает формирование ответа"""
+    mock_get_currency_rates.return_value = result_inner_functions_for_get_events["get_currency_rates"]
+    mock_get_stock_prices.side_effect = requests.HTTPError("Ошибка HTTP: 500")
+
+    result = json.loads(get_events(get_data_for_get_expenses, "2021-12-31"))
+
+    assert result["currency_rates"] == [{"currency": "USD", "rate": 78.918179}]
+    assert result["stock_prices"] == []
+    assert result["market_data_status"] == {
+        "currency_rates": {"status": "ok"},
+        "stock_prices": {"status": "unavailable"},
+    }
+
+
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict_async", new_callable=AsyncMock)
+@patch("src.views.get_currency_rates_dict_async", new_callable=AsyncMock)
+def test_timeout_returns_partial_result_for_get_events_async(
+    mock_get_currency_rates_async,
+    mock_get_stock_prices_async,
+    mock_load_user_settings,
+    get_data_for_get_expenses,
+    result_inner_functions_for_get_events,
+):
+    """Тестирует, что запросы, не уложившиеся в бюджет, отменяются, а раздел берётся из кэша"""
+
+    async def slow_stock_prices(stocks, client):
+        await asyncio.sleep(5)
+
+    mock_get_currency_rates_async.return_value = result_inner_functions_for_get_events["get_currency_rates"]
+    mock_get_stock_prices_async.side_effect = slow_stock_prices
+    market_data_cache.put("stock_prices", ["AAPL"], [{"stock": "AAPL", "price": 200.0}])
+
+    result = json.loads(asyncio.run(get_events_async(get_data_for_get_expenses, "2021-12-31", timeout=0.05)))
+
+    assert result["currency_rates"] == [{"currency": "USD", "rate": 78.918179}]
+    assert result["stock_prices"] == [{"stock": "AAPL", "price": 200.0}]
+    assert result["market_data_status"]["currency_rates"] == {"status": "ok"}
+    assert result["market_data_status"]["stock_prices"]["status"] == "stale"
+
+
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict")
+@patch("src.views.get_currency_rates_dict")
+def test_fresh_cache_skips_providers_for_get_events(
+    mock_get_currency_rates,
+    mock_get_stock_prices,
+    mock_load_user_settings,
+    get_data_for_get_expenses,
+    result_inner_functions_for_get_events,
+):
+    """Тестирует, что свежие данные из кэша используются без запроса к API"""
+    mock_get_stock_prices.return_value = result_inner_functions_for_get_events["get_stock_prices"]
+    market_data_cache.put("currency_rates", ["USD"], [{"currency": "USD", "rate": 80.0}])
+
+    with patch("src.utils.market_data_max_age", 60.0):
+        result = json.loads(get_events(get_data_for_get_expenses, "2021-12-31"))
+
+    mock_get_currency_rates.assert_not_called()
+    mock_get_stock_prices.assert_called_once_with(["AAPL"])
+    assert result["currency_rates"] == [{"currency": "USD", "rate": 80.0}]
+    assert result["market_data_status"]["currency_rates"]["status"] == "ok"
+    assert "updated_at" in result["market_data_status"]["currency_rates"]
+    assert result["market_data_status"]["stock_prices"] == {"status": "ok"}
+
+
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict_async", new_callable=AsyncMock)
+@patch("src.views.get_currency_rates_dict_async", new_callable=AsyncMock)
+def test_fresh_cache_skips_providers_for_get_events_async(
+    mock_get_currency_rates_async, mock_get_stock_prices_async, mock_load_user_settings, get_data_for_get_expenses
+):
+    """Тестирует асинхронный вариант без запросов к API, когда все разделы есть в кэше"""
+    market_data_cache.put("currency_rates", ["USD"], [{"currency": "USD", "rate": 80.0}])
+    market_data_cache.put("stock_prices", ["AAPL"], [{"stock": "AAPL", "price": 200.0}])
+
+    with patch("src.utils.market_data_max_age", 60.0):
+        result = json.loads(asyncio.run(get_events_async(get_data_for_get_expenses, "2021-12-31")))
+
+    mock_get_currency_rates_async.assert_not_awaited()
+    mock_get_stock_prices_async.assert_not_awaited()
+    assert result["stock_prices"] == [{"stock": "AAPL", "price": 200.0}]
+    assert result["market_data_status"]["stock_prices"]["status"] == "ok"
+
+
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict")
+@patch("src.views.get_currency_rates_dict")
+def test_queries_for_get_events_batch(
+    mock_get_currency_rates,
+    mock_get_stock_prices,
+    mock_load_user_settings,
+    get_data_for_get_expenses,
+    result_inner_functions_for_get_events,
+):
+    """Тестирует совпадение периодов пакета с get_events и однократный запрос рыночных данных"""
+    mock_get_currency_rates.return_value = result_inner_functions_for_get_events["get_currency_rates"]
+    mock_get_stock_prices.return_value = result_inner_functions_for_get_events["get_stock_prices"]
+    queries = [("2021-12-31", "W"), ("2021-12-31", "M"), ("2021-12-15", "Y"), ("2021-12-31", "ALL")]
+    operation = get_data_for_get_expenses.copy()
+
+    result = json.loads(get_events_batch(operation, queries))
+
+    mock_get_currency_rates.assert_called_once_with(["USD"])
+    mock_get_stock_prices.assert_called_once_with(["AAPL"])
+    mock_load_user_settings.assert_called_once()
+    assert operation.equals(get_data_for_get_expenses)
+    assert result["currency_rates"] == [{"currency": "USD", "rate": 78.918179}]
+    assert result["market_data_status"] == {"currency_rates": {"status": "ok"}, "stock_prices": {"status": "ok"}}
+    for event, (date_, period) in zip(result["events"], queries):
+        expected = json.loads(get_events(get_data_for_get_expenses.copy(), date_, period))
+        assert event == {
+            "date": date_,
+            "period": period,
+            "expenses": expected["expenses"],
+            "income": expected["income"],
+        }
+
+
+@pytest.mark.parametrize(
+    "start, end, period, dates",
+    [
+        ("2021-01-01", "2021-03-15", "M", ["2021-01-31", "2021-02-28", "2021-03-15"]),
+        ("2021-12-20", "2022-01-02", "W", ["2021-12-26", "2022-01-02"]),
+        ("2020-06-01", "2021-12-31", "Y", ["2020-12-31", "2021-12-31"]),
+    ],
+)
+@patch("src.views.load_user_settings", return_value={"user_currencies": [], "user_stocks": []})
+@patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []})
+@patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []})
+def test_date_range_for_get_events_batch(
+    mock_get_currency_rates,
+    mock_get_stock_prices,
+    mock_load_user_settings,
+    get_data_for_get_expenses,
+    start,
+    end,
+    period,
+    dates,
+):
+    """Тестирует периоды, построенные по диапазону дат"""
+    result = json.loads(get_events_batch(get_data_for_get_expenses, start=start, end=end, period=period))
+
+    assert [event["date"] for event in result["events"]] == dates
+    assert {event["period"] for event in result["events"]} == {period}
+
+
+@pytest.mark.parametrize(
+    "kwargs, raise_message",
+    [
+        ({}, "Передайте список пар (дата, период) или диапазон дат start и end"),
+        (
+            {"start": "2021-01-01", "end": "2021-12-31", "period": "ALL"},
+            "Для диапазона дат период должен быть W, M или Y",
+        ),
+        ({"queries": [("2021-12-31", "M"), ("2021 12 31", "M")]}, "Дата указана неверно. Маска: YYYY-MM-DD"),
+    ],
+)
+@patch("src.views.get_currency_rates_dict")
+def test_incorrect_input_for_get_events_batch(
+    mock_get_currency_rates, get_data_for_get_expenses, kwargs, raise_message
+):
+    """Тестирует неверные параметры пакета: запросы к API не выполняются"""
+    with pytest.raises(ValueError) as exc_info:
+        get_events_batch(get_data_for_get_expenses, **kwargs)
+
+    assert str(exc_info.value) == raise_message
+    mock_get_currency_rates.assert_not_called()
+
+
+@pytest.mark.parametrize("period", ["W", "M", "Y", "ALL"])
+@patch("src.views.load_user_settings", return_value={"user_currencies": ["USD"], "user_stocks": ["AAPL"]})
+@patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []})
+@patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []})
+def test_prepared_operations_for_get_events(
+    mock_get_currency_rates, mock_get_stock_prices, mock_load_user_settings, get_data_for_get_expenses, period
+):
+    """Тестирует, что подготовленные операции дают тот же результат, что и исходный DataFrame"""
+    prepared = prepare_operations(get_data_for_get_expenses)
+    expected = get_events(get_data_for_get_expenses.copy(), "2021-12-31", period)
+
+    assert get_events(prepared, "2021-12-31", period) == expected
+    batch = json.loads(get_events_batch(prepared, [("2021-12-31", period)]))
+    assert batch["events"][0]["expenses"] == json.loads(expected)["expenses"]
+
+
+@pytest.fixture(scope="module")
+def real_operations():
+    """Фикстура возвращает операции из data/operations.xlsx"""
+    return pd.read_excel(os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "operations.xlsx"))
+
+
+@patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []})
+@patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []})
+def test_prepared_operations_match_raw_on_real_data_for_get_events(
+    mock_get_currency_rates, mock_get_stock_prices, real_operations
+):
+    """Тестирует, что суммы подготовленных операций совпадают с исходными для многих периодов реальных данных"""
+    settings = {"user_currencies": [], "user_stocks": []}
+    prepared = prepare_operations(real_operations)
+    dates = pd.date_range("2018-01-01", "2022-01-05", freq="7D").strftime("%Y-%m-%d")
+    queries = [(date_, period) for date_ in dates for period in ["W", "M", "Y", "ALL"]]
+
+    raw_events = json.loads(get_events_batch(real_operations, queries, settings=settings))["events"]
+    prepared_events = json.loads(get_events_batch(prepared, queries, settings=settings))["events"]
+
+    assert prepared_events == raw_events
+    # Периоды, на которых суммирование float в другом порядке давало расхождение в 1 рубль
+    for date_ in ["2021-08-06", "2021-09-14"]:
+        expected = get_events(real_operations, date_, "Y", settings=settings)
+        assert get_events(prepared, date_, "Y", settings=settings) == expected
+
+
+@patch("src.views.load_user_settings")
+@patch("src.views.get_stock_prices_dict", return_value={"stock_prices": []})
+@patch("src.views.get_currency_rates_dict", return_value={"currency_rates": []})
+def test_explicit_settings_for_get_events(
+    mock_get_currency_rates, mock_get_stock_prices, mock_load_user_settings, get_data_for_get_expenses
+):
+    """Тестирует передачу настроек в get_events без обращения к файлу настроек"""
+    get_events(get_data_for_get_expenses, "2021-12-31", settings={"user_currencies": ["EUR"], "user_stocks": []})
+
+    mock_load_user_settings.assert_not_called()
+    mock_get_currency_rates.assert_called_once_with(["EUR"])
+    mock_get_stock_prices.assert_not_called()
+
+
+def test_empty_settings_skip_providers_for_get_events(get_data_for_get_expenses, caplog):
+    """Тестирует пустые списки валют и акций: разделы пусты со статусом ok, провайдеры не запрашиваются"""
+    settings = {"user_currencies": [], "user_stocks": []}
+
+    with patch("requests.get", side_effect=AssertionError("запрос к провайдеру")):
+        result = json.loads(get_events(get_data_for_get_expenses, "2021-12-31", settings=settings))
+    async_events = get_events_async(get_data_for_get_expenses, "2021-12-31", settings=settings)
+    async_result = json.loads(asyncio.run(async_events))
+
+    for events in (result, async_result):
+        assert (events["currency_rates"], events["stock_prices"]) == ([], [])
+        assert events["market_data_status"] == {"currency_rates": {"status": "ok"}, "stock_prices": {"status": "ok"}}
+    assert not [record for record in caplog.records if record.levelno >= logging.CRITICAL]